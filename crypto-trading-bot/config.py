@@ -41,6 +41,115 @@ MODEL_PATH = "model/latest_model.xgb"
 
 MAX_CANDLES_PER_PAIR = 1440  # 24 hours of 1m candles
 
+# Use the incremental indicator engine instead of calculate_indicators on every tick
+USE_STREAMING_INDICATORS = True
+# calculate_indicators columns the engine doesn't stream are taken from this many trailing candles
+STREAMING_BATCH_TAIL = 200
+# Take *_15m/_1h/_4h/_1d indicator features from the bar builder's streaming engines before ta_strategy.
+# Off until `python -m scripts.check_indicator_parity --timeframes` shows them matching ta_strategy.
+STREAMING_TIMEFRAME_FEATURES = False
+
+# Pairs that tick within this window share one predict call per model
+USE_BATCH_PREDICTION = True
+BATCH_PREDICTION_WINDOW_MS = 5
+
+# Sampled feature snapshots written off the tick path (see utils/debug_sink.py)
+FEATURE_DEBUG = {
+    "path": "logs/feature_debug.jsonl",
+    "every_n_ticks": 60,      # per pair; ticks with a signal are always kept
+    "queue_size": 256,
+    "max_bytes": 50_000_000,  # rotate to .1 past this size
+}
+
+# Long-lived publisher for signals sent to the trading server (see utils/send_trader.py)
+SIGNAL_SERVER = {
+    "url": "http://localhost:5000/signal/update",
+    "batch_url": "http://localhost:5000/signal/batch",
+    "batch_size": 1,         # >1 sends several tokens as one JSON list to batch_url
+    "max_pending": 64,       # tokens waiting to be sent; oldest is dropped past this
+    "max_in_flight": 4,      # concurrent POSTs over the keep-alive pool
+    "timeout_seconds": 2.0,
+}
+
+# "inline" runs the tick pipeline on the websocket event loop,
+# "sharded" runs it in worker processes that each own a subset of WATCHED_PAIRS
+EXECUTION_MODE = "inline"
+SHARDING = {
+    "shards": 2,
+    "heartbeat_seconds": 5,
+}
+
+# Latest-wins ingestion between the websocket listener and on_price_update (see utils/tick_coalescer.py)
+TICK_COALESCING = True
+MAX_CLOSED_BACKLOG = 16  # closed candles kept per pair while processing is behind
+
+# Ingestion and pipeline health, rewritten from the event loop (see main.log_health)
+HEALTH_LOG = {
+    "path": "logs/health.json",
+    "seconds": 60,
+}
+
+# Per-pair, per-stage latency histograms for the tick pipeline (see utils/latency.py)
+LATENCY_METRICS = {
+    "enabled": True,
+    "path": "logs/tick_latency.jsonl",
+    "dump_seconds": 60,
+}
+
+# Background group-commit writer for the wallet and prediction logs (see utils/log_writer.py)
+LOG_WRITER = {
+    "flush_interval_ms": 200,  # records queued within this window share one write per file
+    "max_batch": 1000,
+    "fsync": "interval",       # "never" (OS decides), "batch" (every group commit) or "interval"
+    "fsync_interval_seconds": 5,
+}
+
+# Write-ahead journal + compact snapshots of the paper wallet, replayed on restart (see trading/wallet_journal.py)
+WALLET_JOURNAL = {
+    "enabled": True,
+    "dir": "logs/wallet",
+    "snapshot_every": 200,  # journal events between snapshots; the journal is truncated after each
+    "fsync": True,          # fsync each batch the journal's writer thread commits
+    "flush_interval_ms": 50,  # how long that thread gathers events before a batch; the tick path never waits
+}
+
+# Many simulated accounts trading the same signals, each with its own risk settings (see trading/multi_account.py)
+MULTI_ACCOUNT = {
+    "enabled": False,
+    "accounts_path": "logs/accounts.json",  # [{"id": "alice", "trade_risk_pct": 0.05, ...}], unset keys use defaults
+    "status_path": "logs/accounts_status.json",  # summary and per-account balances, rewritten once a minute
+    "defaults": {
+        "starting_balance": 10000.0,
+        "trade_risk_pct": 0.1,
+        "leverage": 1,
+        "stop_loss_pct": 0.01,
+        "take_profit_pct": 0.02,
+        "min_confidence": 0.0,
+        "max_multiplier": 3.0,
+        "allow_short": True,
+    },
+}
+
+# Slow horizons only re-predict on their bar close or when one of their timeframe's inputs moves more than epsilon (see utils/horizon_scheduler.py)
+HORIZON_SCHEDULING = {
+    "enabled": True,
+    "epsilon": 0.001,    # relative change of a watched input (one the horizon's own timeframe drives)
+    "epsilon_by_feature": {},  # per-feature overrides, e.g. {"macd_1h": 0.01}
+    "always": ["1m"],    # frames predicted on every tick
+}
+
+# Parameter grid for `python -m trading.sweep` (min_trend_scale None = base filters don't gate, as live)
+SWEEP_GRID = {
+    "threshold_1m": [0.7, 0.75, 0.8],
+    "threshold_15m": [0.65, 0.7, 0.75],
+    "threshold_1h": [0.65, 0.7],
+    "threshold_1d": [0.6, 0.65],
+    "min_trend_scale": [None, 0.5, 1.0, 1.5],
+    "doji_offset": [0, 1],
+    "stop_loss_pct": [0.005, 0.01, 0.015],
+    "take_profit_pct": [0.01, 0.02, 0.03],
+}
+
 DAILY_DIR = "data/daily"
 FEATURE_DIR = "data/daily/features"
 
@@ -88,6 +197,48 @@ MIN_TREND = {
     "1d": 0.15   # was 0.25
 }
 
+DOJI_THRESHOLDS = {
+    "1m": 5,
+    "15m": 4,
+    "1h": 3,
+    "1d": 2,
+}
+
+# Entry filters, compiled by trading/rules.py into scalar checks (live) and numpy masks (backtests).
+# Each rule is a failure condition: the filter passes when no rule fires. A condition compares
+# features.get(feature, default) against a number, another feature ({"feature", "default", "offset"})
+# or a per-horizon table ({"by_horizon", "default", "param"}; "param" lets a sweep override it).
+# Without a "default", a missing feature never fires the rule.
+STRATEGY_RULES = {
+    "base_filters": [
+        {"name": "high_doji_weak_trend", "all": [
+            {"feature": "doji_count", "default": 0, "op": ">",
+             "value": {"by_horizon": DOJI_THRESHOLDS, "default": 4, "param": "doji_threshold"}},
+            {"feature": "trend_strength_5", "default": 1, "op": "<",
+             "value": {"by_horizon": MIN_TREND, "default": 0.4, "param": "min_trend"}},
+        ]},
+        {"name": "high_noise_ratio", "feature": "noise_ratio", "default": 0, "op": ">", "value": 0.75},
+        {"name": "weak_trend", "feature": "trend_strength_5", "default": 1, "op": "<",
+         "value": {"by_horizon": MIN_TREND, "default": 0.4, "param": "min_trend"}},
+    ],
+    "macd_long": [
+        {"name": "rsi_below_48", "feature": "rsi", "op": "<", "value": 48},
+        {"name": "macd_histogram_negative", "feature": "macd_histogram", "default": -1, "op": "<", "value": -0.01},
+        {"name": "macd_falling", "feature": "macd_direction_3", "default": -1, "op": "<", "value": 0},
+        {"name": "low_volume_surge", "feature": "volume_surge", "default": 0, "op": "<", "value": 0.5},
+    ],
+    "short_setup": [
+        {"name": "rsi_above_55", "feature": "rsi", "op": ">", "value": 55},
+        {"name": "macd_histogram_positive", "feature": "macd_histogram", "default": 0, "op": ">", "value": 0.01},
+        {"name": "ema_20_rising", "feature": "ema_20", "default": 0, "op": ">=",
+         "value": {"feature": "ema_20_prev", "default": 0, "offset": 0.1}},
+        {"name": "sma_20_rising", "feature": "sma_20", "default": 0, "op": ">=",
+         "value": {"feature": "sma_20_prev", "default": 0, "offset": 0.1}},
+        {"name": "no_downside_momentum", "feature": "momentum_5", "default": 0, "op": ">", "value": -0.0005},
+        {"name": "few_bearish_candles", "feature": "bearish_count_5", "default": 0, "op": "<", "value": 2},
+    ],
+}
+
 STRATEGY_CONFIG = {
     "BTC": {
         "confidence_thresholds": {
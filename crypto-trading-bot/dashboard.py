@@ -11,6 +11,8 @@ from config import WATCHED_PAIRS
 PREDICTION_LOG = "logs/prediction_history.jsonl"
 ACCOUNT_SNAPSHOT = "logs/account_snapshot.json"
 LIVE_ACCOUNT_LOG = "logs/live_account.jsonl"
+PORTFOLIO_SNAPSHOT = "logs/portfolio.json"
+TICK_LATENCY_LOG = "logs/tick_latency.jsonl"
 
 def load_history():
     if not os.path.exists(PREDICTION_LOG):
@@ -34,6 +36,12 @@ def load_account_snapshot():
     with open(ACCOUNT_SNAPSHOT, "r") as f:
         return json.load(f)
 
+def load_portfolio():
+    if not os.path.exists(PORTFOLIO_SNAPSHOT):
+        return {}
+    with open(PORTFOLIO_SNAPSHOT, "r") as f:
+        return json.load(f)
+
 def load_live_account():
     if not os.path.exists(LIVE_ACCOUNT_LOG):
         return pd.DataFrame()
@@ -65,6 +73,20 @@ def show_open_trades():
     df['timestamp'] = pd.to_datetime(df['timestamp'])
     st.dataframe(df, use_container_width=True)
 
+def show_portfolio():
+    portfolio = load_portfolio()
+    if not portfolio:
+        return
+
+    st.subheader("📐 Mark-to-Market")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Equity", f"${portfolio['equity']:,.2f}")
+    col2.metric("Unrealized PnL", f"${portfolio['unrealized_pnl']:,.2f}")
+    col3.metric("Exposure", f"${portfolio['exposure']:,.2f}")
+    col4.metric("Max Drawdown", f"{portfolio['max_drawdown'] * 100:.2f}%")
+    if portfolio.get("by_pair"):
+        st.dataframe(pd.DataFrame.from_dict(portfolio["by_pair"], orient="index"), use_container_width=True)
+
 def analyze(df):
     if df.empty:
         st.warning("No prediction data found.")
@@ -84,6 +106,7 @@ def analyze(df):
     col5, col6 = st.columns(2)
     col5.metric("📊 Historical Win Rate", f"{win_rate * 100:.1f}%")
     col6.metric("📂 Snapshot Win Rate", f"{snapshot.get('win_rate', 0) * 100:.1f}%")
+    show_portfolio()
 
     df['timestamp'] = pd.to_datetime(df['timestamp'])
     df['success'] = df['success'].fillna("unknown")
@@ -130,7 +153,7 @@ def plot_live_account():
     df['timestamp'] = pd.to_datetime(df['timestamp'])
     df = df.set_index('timestamp')
     st.subheader("📈 Live Balance and PnL Over Time")
-    st.line_chart(df[['balance', 'net_pnl']])
+    st.line_chart(df[[col for col in ('balance', 'equity', 'net_pnl', 'unrealized_pnl') if col in df.columns]])
 
     if 'price_SOL_USDT' in df.columns:
         st.subheader("📊 Live Price Tracking")
@@ -138,6 +161,38 @@ def plot_live_account():
         
         
 
+def load_tick_latency():
+    if not os.path.exists(TICK_LATENCY_LOG):
+        return pd.DataFrame()
+    with open(TICK_LATENCY_LOG, "r") as f:
+        records = [json.loads(line.strip()) for line in f if line.strip()]
+    df = pd.DataFrame(records)
+    if not df.empty:
+        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="s")
+    return df
+
+def plot_tick_latency():
+    df = load_tick_latency()
+    if df.empty:
+        st.info("No tick latency metrics yet.")
+        return
+
+    st.subheader("⏱️ Tick Pipeline Latency")
+    latest = df[df["timestamp"] == df["timestamp"].max()]
+    st.dataframe(
+        latest.pivot_table(index="stage", columns="pair", values="p99_ms"),
+        use_container_width=True
+    )
+
+    stage = st.selectbox("Stage", sorted(df["stage"].unique()))
+    stage_df = df[df["stage"] == stage]
+    st.line_chart(stage_df.pivot_table(index="timestamp", columns="pair", values="p99_ms"))
+    st.dataframe(
+        stage_df.sort_values("timestamp").groupby("pair").tail(1)[["pair", "count", "p50_ms", "p99_ms", "max_ms"]],
+        use_container_width=True
+    )
+
+
 st.set_page_config(page_title="Crypto Bot Dashboard", layout="wide")
 st.title("📊 Crypto AI Prediction Dashboard")
 
@@ -145,3 +200,5 @@ df = load_history()
 analyze(df)
 
 plot_live_account()
+
+plot_tick_latency()
@@ -0,0 +1,251 @@
+# features/bar_builder.py
+import math
+from collections import deque
+from itertools import takewhile
+
+import pandas as pd
+
+from config import MAX_CANDLES_PER_PAIR, STREAMING_TIMEFRAME_FEATURES, TIMEFRAMES
+from features.streaming_indicators import MAX_CATCHUP, StreamingIndicators
+from utils.ring_buffer import to_epoch_ms
+
+BAR_MS = {"1m": 60_000, "15m": 15 * 60_000, "1h": 60 * 60_000, "4h": 4 * 60 * 60_000, "1d": 24 * 60 * 60_000}
+OHLCV = ["open", "high", "low", "close", "volume"]
+
+
+def _ohlcv(candle):
+    close = float(candle["close"])
+    return (float(candle.get("open", close)), float(candle.get("high", close)),
+            float(candle.get("low", close)), close, float(candle.get("volume", 0) or 0))
+
+
+def _merge(bar, bucket, candle):
+    """bar extended by one 1m candle; a new bar if the candle starts the next bucket."""
+    open_, high, low, close, volume = _ohlcv(candle)
+    if bar is None or bar["timestamp"] != bucket:
+        return {"timestamp": bucket, "open": open_, "high": high, "low": low, "close": close, "volume": volume}
+    return {"timestamp": bucket, "open": bar["open"],
+            "high": max(bar["high"], high), "low": min(bar["low"], low),
+            "close": close, "volume": bar["volume"] + volume}
+
+
+class _TimeframeBars:
+    """
+    Closed bars, the open bar and (optionally) a streaming indicator engine for one timeframe.
+
+    bars holds the same window a resample of the 1m buffer does: when a 1m
+    candle leaves the buffer, drop() trims it out of the oldest bar in place
+    and pops that bar once it is empty. The engine folds each bar once when it
+    closes and is never replayed, so it keeps history the buffer has dropped.
+    """
+
+    def __init__(self, tf, max_bars, indicators=False):
+        self.tf = tf
+        self.bar_ms = BAR_MS[tf]
+        self.bars = deque(maxlen=max_bars)
+        self.open_bar = None    # committed 1m candles of the current bucket
+        self.live = None        # open_bar plus the forming 1m candle
+        self.engine = StreamingIndicators() if indicators else None
+        self.closed_version = 0
+        self._frame = None
+        self._frame_version = -1
+        self._frame_live = None
+
+    def _roll(self, bucket):
+        if self.open_bar is not None and self.open_bar["timestamp"] != bucket:
+            if self.engine is not None:
+                # Final version of the bar replaces the engine's pending one before it is committed
+                self.engine.update(self.open_bar)
+            self.bars.append(self.open_bar)
+            self.closed_version += 1
+            self.open_bar = None
+
+    def commit(self, ts_ms, candle):
+        bucket = ts_ms - ts_ms % self.bar_ms
+        self._roll(bucket)
+        self.open_bar = _merge(self.open_bar, bucket, candle)
+
+    def forming(self, ts_ms, candle):
+        bucket = ts_ms - ts_ms % self.bar_ms
+        self._roll(bucket)
+        live = _merge(self.open_bar, bucket, candle)
+        if live != self.live:
+            self.live = live
+            if self.engine is not None:
+                self.engine.update(live)
+
+    def drop(self, candle, remaining):
+        """
+        candle, a (ts_ms, open, high, low, close, volume) tuple, left the 1m buffer;
+        remaining are the committed candles still in it, oldest first. Returns True
+        if it was part of the open bar, so the live bar has to be re-overlaid.
+        """
+        bucket = candle[0] - candle[0] % self.bar_ms
+        if self.bars and self.bars[0]["timestamp"] == bucket:
+            first = self._trim(self.bars[0], candle, remaining)
+            if first is None:
+                self.bars.popleft()
+            else:
+                self.bars[0] = first
+            self.closed_version += 1
+        elif self.open_bar is not None and self.open_bar["timestamp"] == bucket:
+            # Buffer shorter than one bar
+            self.open_bar = self._trim(self.open_bar, candle, remaining)
+            self.live = None
+            return True
+        return False
+
+    def _trim(self, bar, candle, remaining):
+        """bar without its oldest candle; None once none of its candles are left. High/low are rescanned only if candle held one."""
+        bucket_end = bar["timestamp"] + self.bar_ms
+        head = remaining[0] if remaining else None
+        if head is None or head[0] >= bucket_end:
+            return None
+        bar = dict(bar, open=head[1], volume=bar["volume"] - candle[5])
+        if candle[2] >= bar["high"] or candle[3] <= bar["low"]:
+            inside = list(takewhile(lambda c: c[0] < bucket_end, remaining))
+            bar["high"] = max(c[2] for c in inside)
+            bar["low"] = min(c[3] for c in inside)
+        return bar
+
+    def state_key(self):
+        """Changes exactly when frame() would: the closed bars' version, the last closed bar and the live bar's close."""
+        last_closed = self.bars[-1]["timestamp"] if self.bars else None
+        live = None if self.live is None else (self.live["timestamp"], self.live["close"], self.live["high"],
+                                               self.live["low"], self.live["volume"])
+        return self.closed_version, last_closed, live
+
+    def frame(self):
+        """
+        OHLCV DataFrame indexed by bar open time, shaped like a convert_tf frame.
+        Rebuilt when the closed bars change; a move of the open bar only rewrites
+        its row in place, so callers that keep it must copy it.
+        """
+        if self._frame is not None and self._frame_live is self.live:
+            return self._frame
+        in_place = (self._frame is not None and self._frame_version == self.closed_version
+                    and self.live is not None and self._frame_live is not None
+                    and self._frame_live["timestamp"] == self.live["timestamp"])
+        if in_place:
+            self._frame.iloc[-1] = [self.live[col] for col in OHLCV]
+        else:
+            self._frame = _bars_to_frame(list(self.bars) + ([self.live] if self.live is not None else []))
+            self._frame_version = self.closed_version
+        self._frame_live = self.live
+        return self._frame
+
+
+def _bars_to_frame(bars):
+    df = pd.DataFrame(bars, columns=["timestamp"] + OHLCV)
+    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms", utc=True)
+    return df.set_index("timestamp")
+
+
+class BarBuilder:
+    """
+    Rolling 15m/1h/4h/1d bars for one pair, built from its 1m candle buffer.
+
+    Each closed 1m candle is folded into the open bar of every timeframe once;
+    the forming candle is overlaid on top. Bars are finalized when a candle
+    from the next bucket arrives. Candles that leave the buffer are trimmed
+    out of the oldest bar, so the bars cover what a resample of the buffer
+    would. With indicators on (STREAMING_TIMEFRAME_FEATURES), every timeframe
+    also keeps a StreamingIndicators engine, so e.g. rsi_4h is an O(1) update
+    per tick.
+    """
+
+    def __init__(self, timeframes=None, max_candles=MAX_CANDLES_PER_PAIR, indicators=STREAMING_TIMEFRAME_FEATURES):
+        self.timeframes = list(timeframes or TIMEFRAMES)
+        self.with_indicators = indicators
+        # Same history a resample of the 1m buffer would see
+        self._max_bars = {tf: math.ceil(max_candles * 60_000 / BAR_MS[tf]) + 1 for tf in self.timeframes}
+        self.reset()
+
+    def reset(self):
+        self.tfs = {tf: _TimeframeBars(tf, self._max_bars[tf], self.with_indicators) for tf in self.timeframes}
+        self._pending_ts = None
+        self._pending_candle = None
+        self._candles = deque()  # committed 1m candles still in the buffer, as (ts_ms, *OHLCV) tuples
+
+    def _commit(self, candle):
+        ts_ms = to_epoch_ms(candle["timestamp"])
+        self._candles.append((ts_ms,) + _ohlcv(candle))
+        for bars in self.tfs.values():
+            bars.commit(ts_ms, candle)
+
+    def update(self, candle):
+        """Feed one 1m candle; same timestamp replaces the forming candle, a newer one closes it."""
+        ts = candle.get("timestamp")
+        if self._pending_candle is not None and ts != self._pending_ts:
+            self._commit(self._pending_candle)
+        self._pending_ts = ts
+        self._pending_candle = candle
+        ts_ms = to_epoch_ms(ts)
+        for bars in self.tfs.values():
+            bars.forming(ts_ms, candle)
+
+    def sync(self, candle_history):
+        """Steps only the candles added since the last call; the first call replays the buffer."""
+        if not candle_history:
+            return
+        n = len(candle_history)
+        i = n - 1
+        if self._pending_candle is not None:
+            stop = max(-1, n - 1 - MAX_CATCHUP)
+            while i > stop and candle_history[i].get("timestamp") != self._pending_ts:
+                i -= 1
+            if i == stop:
+                i = -1
+        else:
+            i = -1
+
+        if i == n - 1:
+            self.update(candle_history[i])
+            return
+        if i < 0:
+            self.reset()
+            start = 0
+        else:
+            # candle_history[i] is the final version of the forming candle
+            self._pending_candle = None
+            self._commit(candle_history[i])
+            start = i + 1
+
+        for candle in candle_history[start:n - 1]:
+            self._commit(candle)
+        self.update(candle_history[n - 1])
+        self._slide(candle_history)
+
+    def _slide(self, candle_history):
+        """Trims the candles that have left the buffer out of every timeframe's oldest bar."""
+        start_ms = to_epoch_ms(candle_history[0]["timestamp"])
+        while self._candles and self._candles[0][0] < start_ms:
+            dropped = self._candles.popleft()
+            for bars in self.tfs.values():
+                if bars.drop(dropped, self._candles) and self._pending_candle is not None:
+                    bars.forming(to_epoch_ms(self._pending_ts), self._pending_candle)
+
+    def indicators(self, tf):
+        """Streaming indicator values for the timeframe's latest (possibly open) bar; {} with indicators off."""
+        engine = self.tfs[tf].engine
+        return engine.values if engine is not None else {}
+
+    def frame(self, tf):
+        return self.tfs[tf].frame()
+
+    def state_key(self, tf):
+        return self.tfs[tf].state_key()
+
+    def frames(self):
+        """{tf: DataFrame}, the same shape convert_tf returns."""
+        return {tf: bars.frame() for tf, bars in self.tfs.items()}
+
+
+_builders = {}
+
+
+def get_bar_builder(pair):
+    builder = _builders.get(pair)
+    if builder is None:
+        builder = _builders[pair] = BarBuilder()
+    return builder
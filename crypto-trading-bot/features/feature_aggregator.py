@@ -1,12 +1,15 @@
+from collections import defaultdict
+
 import numpy as np
 import pandas as pd
-from data.utils.convert_to_features import enrich_ohlcv
 import pandas_ta as ta
 from data.indicators import calculate_indicators
 from data.ta_strat import ta_strategy
 from data.final_features import compute_missing_feature
-from data.utils.timeframes import convert_tf
-from data.utils.timeframes import update_multi_tf_buffers
+from features.bar_builder import get_bar_builder
+from features.streaming_indicators import latest_indicators
+from utils.ring_buffer import ColumnarRingBuffer, as_frame
+from config import STREAMING_BATCH_TAIL, USE_STREAMING_INDICATORS
 
 REQUIRED_ALWAYS = [
     # General Indicators
@@ -40,25 +43,50 @@ REQUIRED_ALWAYS = [
     "realtime_close", "realtime_volume"
 ]
 
+def latest_indicator_row(pair, candle_history):
+    """
+    calculate_indicators(...).iloc[-1] with the streamed columns from the incremental
+    engine (O(1) per tick) and every other column from calculate_indicators over the
+    last STREAMING_BATCH_TAIL candles.
+    """
+    tail = calculate_indicators(as_frame(candle_history, STREAMING_BATCH_TAIL))
+    row = tail.iloc[-1].to_dict()
+    row.update(latest_indicators(pair, candle_history))
+    return row
+
+
 def aggregate_features(pair, features_history, latest_data, feature_names, candle_history):
+    final_features, _ = collect_features(pair, features_history, latest_data, feature_names, candle_history)
+    return final_features
+
+
+def collect_features(pair, features_history, latest_data, feature_names, candle_history):
+    """
+    Same as aggregate_features, but also returns the keys every caller gets
+    regardless of feature_names (REQUIRED_ALWAYS plus the indicator row).
+    """
     weighted = {}
     final_features = {}  # Store final features
     missing_features = []
-    multi_tf_history = {}
-    multi_tf_history = update_multi_tf_buffers(candle_history)
-    tf_dfs = convert_tf(multi_tf_history)
+    # Higher-timeframe bars are folded in incrementally instead of resampling the whole buffer
+    bars = get_bar_builder(pair)
+    bars.sync(candle_history)
     if len(features_history) < 30:
         print(f"[Aggregate] ⚠️ Not enough candles for {pair}. Only {len(features_history)} rows.")
-        return {}
-
-    # --- Use the enriched 1-minute data directly
-    df_1m = pd.DataFrame(features_history).copy()
-    df_1m["timestamp"] = pd.to_datetime(df_1m["timestamp"], errors="coerce", utc=True)
-    df_1m = df_1m.dropna(subset=["timestamp"]).set_index("timestamp").sort_index()
+        return {}, set()
 
     try:
         # Directly use the enriched data (no need to re-enrich it)
-        latest_enriched = df_1m.iloc[-2].to_dict()  # Get the last row (most recent data)
+        if isinstance(features_history, ColumnarRingBuffer):
+            # Already in time order; read the row straight from the columns
+            latest_enriched = features_history[-2]
+            latest_enriched.pop("timestamp", None)
+        else:
+            # --- Use the enriched 1-minute data directly
+            df_1m = pd.DataFrame(features_history).copy()
+            df_1m["timestamp"] = pd.to_datetime(df_1m["timestamp"], errors="coerce", utc=True)
+            df_1m = df_1m.dropna(subset=["timestamp"]).set_index("timestamp").sort_index()
+            latest_enriched = df_1m.iloc[-2].to_dict()  # Get the last row (most recent data)
         weighted.update(latest_enriched)
     except Exception as e:
         print(f"[Aggregate] ❌ Failed to aggregate enriched data for {pair}: {e}")
@@ -68,46 +96,113 @@ def aggregate_features(pair, features_history, latest_data, feature_names, candl
     weighted["wick_top_4h"] = latest_data.get("wick_top_4h", 0)
     # --- Final Feature Vector ---  
     
-    base_df = pd.DataFrame(candle_history)
-    base_df = base_df.copy()
-    df_with_indicators = calculate_indicators(base_df)
-    enriched_feature_keys = list(df_with_indicators.columns)
+    base_df = None
+    if USE_STREAMING_INDICATORS:
+        indicator_row = latest_indicator_row(pair, candle_history)
+    else:
+        base_df = as_frame(candle_history)
+        df_with_indicators = calculate_indicators(base_df.copy())
+        indicator_row = df_with_indicators.iloc[-1].to_dict()
+    enriched_feature_keys = list(indicator_row)
     required_features = list(set(feature_names + REQUIRED_ALWAYS + enriched_feature_keys))
     # Check for missing features
     for feature in required_features:
-        if feature not in weighted and feature not in df_with_indicators.columns:
+        if feature not in weighted and feature not in indicator_row:
             missing_features.append(feature)
 
-    # Fill known indicator-based features from df_with_indicators
+    # Fill known indicator-based features from the latest indicator row
     for feature in required_features:
-        if feature in df_with_indicators.columns:
-            final_features[feature] = df_with_indicators[feature].iloc[-1]
+        if feature in indicator_row:
+            final_features[feature] = indicator_row[feature]
         elif feature in weighted:
             final_features[feature] = weighted[feature]
 
-    # Fill multi-timeframe features using ta_strategy or fallback
-    for feature in missing_features:
-        # Try to infer timeframe (e.g., "rsi_4h" → "4h")
-        for tf in tf_dfs:
-            if feature.endswith(f"_{tf}"):
-                df_tf = tf_dfs[tf]
-                if df_tf is None or df_tf.empty:
-                    print(f"⚠️ Skipping {feature} — empty {tf} data")
-                    continue
-
-                try:
-                    val = ta_strategy(feature, df_tf, tf_name=tf)
-                    if val is not None:
-                        final_features[feature] = val
-                        break
-                except Exception as e:
-                    print(f"❌ Error computing {feature} from {tf}: {e}")
-        # Final fallback (logic-based)
+    # Fill multi-timeframe features, one pass per timeframe
+    resolved, leftover = resolve_timeframe_features(pair, bars, missing_features)
+    final_features.update(resolved)
+
+    # Final fallback (logic-based) only for what no timeframe could provide
+    if leftover and base_df is None:
+        base_df = as_frame(candle_history)
+    for feature in leftover:
+        compute_missing_feature(feature, weighted, base_df, final_features)
         if feature not in final_features:
-            compute_missing_feature(feature, weighted, base_df, final_features)
-            
-    if feature not in final_features:
-        print(f"⚠️ Feature {feature} not found in any DataFrame or computed.")
-        
-            
-    return final_features
\ No newline at end of file
+            print(f"⚠️ Feature {feature} not found in any DataFrame or computed.")
+
+    return final_features, set(REQUIRED_ALWAYS) | set(enriched_feature_keys)
+
+
+# (pair, tf) -> {"key", "features", "ta"}: ta_strategy values for every feature ever asked of that
+# timeframe, recomputed in one pass when the timeframe's bars change
+_tf_cache = {}
+
+
+def _timeframe_values(pair, tf, bars, features):
+    cache = _tf_cache.setdefault((pair, tf), {"key": None, "features": set(), "ta": {}})
+    key = bars.state_key(tf)
+    new = set(features) - cache["features"]
+    if key == cache["key"] and not new:
+        return cache["ta"]
+
+    df_tf = bars.frame(tf)
+    if df_tf is None or df_tf.empty:
+        return None
+    df_tf = df_tf.copy()  # the builder rewrites its live row in place
+    cache["features"] |= new
+    todo = cache["features"] if key != cache["key"] else new
+    if key != cache["key"]:
+        cache["key"], cache["ta"] = key, {}
+    for feature in todo:
+        try:
+            cache["ta"][feature] = ta_strategy(feature, df_tf, tf_name=tf)
+        except Exception as e:
+            print(f"❌ Error computing {feature} from {tf}: {e}")
+            cache["ta"][feature] = None
+    return cache["ta"]
+
+
+def resolve_timeframe_features(pair, bars, features):
+    """
+    Groups suffixed features ("rsi_4h", "macd_4h", ...) by timeframe and resolves
+    each with ta_strategy on that timeframe's frame, as before, once per change of
+    that timeframe's bars. With STREAMING_TIMEFRAME_FEATURES on, the bar builder's
+    streaming values come first.
+    Returns ({feature: value}, unresolved features).
+    """
+    by_tf = defaultdict(list)
+    leftover = []
+    for feature in features:
+        for tf in bars.timeframes:
+            if feature.endswith(f"_{tf}"):
+                by_tf[tf].append(feature)
+                break
+        else:
+            leftover.append(feature)
+
+    resolved = {}
+    for tf, group in by_tf.items():
+        pending = []
+        streaming = bars.indicators(tf)  # {} unless STREAMING_TIMEFRAME_FEATURES
+        for feature in group:
+            val = streaming.get(feature[:-len(tf) - 1])
+            if val is not None and not np.isnan(val):
+                resolved[feature] = val
+            else:
+                pending.append(feature)
+        if not pending:
+            continue
+
+        # Computed once per bar update; every other tick reads the cached values
+        values = _timeframe_values(pair, tf, bars, pending)
+        if values is None:
+            print(f"⚠️ Skipping {pending} — empty {tf} data")
+            leftover.extend(pending)
+            continue
+        for feature in pending:
+            val = values.get(feature)
+            if val is not None:
+                resolved[feature] = val
+            else:
+                leftover.append(feature)
+
+    return resolved, leftover
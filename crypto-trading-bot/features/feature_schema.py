@@ -0,0 +1,69 @@
+# features/feature_schema.py
+import math
+from operator import itemgetter
+
+import numpy as np
+
+
+def _to_float(value):
+    if value is None:
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class FeatureSchema:
+    """
+    Column layout of one model's input row, compiled once when the model is
+    (re)loaded. Slot i is feature_names[i]; missing features are reported as a
+    bitmask with bit i set, and written to the row as NaN.
+    """
+
+    def __init__(self, feature_names):
+        self.source = feature_names
+        self.names = list(feature_names)
+        self.size = len(self.names)
+        self.slots = {name: i for i, name in enumerate(self.names)}
+        self.name_set = frozenset(self.names)
+        self._getter = itemgetter(*self.names) if self.names else None
+
+    def missing_mask(self, features):
+        absent = self.name_set.difference(features)
+        mask = 0
+        for name in absent:
+            mask |= 1 << self.slots[name]
+        return mask
+
+    def missing_names(self, mask):
+        return [name for i, name in enumerate(self.names) if mask >> i & 1]
+
+    def fill(self, features, out=None, mask=None):
+        """Writes the features into out (a float32 row of self.size) in slot order."""
+        if out is None:
+            out = np.empty(self.size, dtype=np.float32)
+        if not self.size:
+            return out
+        if mask is None:
+            mask = self.missing_mask(features)
+
+        if mask:
+            values = [features.get(name) for name in self.names]
+        elif self.size == 1:
+            values = (self._getter(features),)
+        else:
+            values = self._getter(features)
+        try:
+            out[:] = values
+        except (TypeError, ValueError):
+            out[:] = [_to_float(v) for v in values]
+        return out
+
+
+def schema_for(model_info):
+    """The compiled schema for a models[token][frame] entry, built on first use if the loader didn't."""
+    schema = model_info.get("schema")
+    if schema is None or schema.source is not model_info["features"]:
+        schema = model_info["schema"] = FeatureSchema(model_info["features"])
+    return schema
@@ -0,0 +1,39 @@
+# features/feature_snapshot.py
+from features.feature_aggregator import collect_features
+from trading.momentum import add_live_momentum_features
+from utils.latency import timed
+
+
+class FeatureSnapshot:
+    """
+    Features for one pair on one tick, built once for the union of every
+    horizon model's inputs. Each horizon reads a projection that looks exactly
+    like what aggregate_features would have returned for its own feature list.
+    """
+
+    def __init__(self, pair, features, base_keys, union):
+        self.pair = pair
+        self.features = features
+        # Keys that only exist because some horizon asked for them
+        self._requested_only = union - base_keys
+
+    def for_frame(self, feature_names):
+        drop = self._requested_only.difference(feature_names)
+        if not drop:
+            return dict(self.features)
+        return {k: v for k, v in self.features.items() if k not in drop}
+
+
+def build_feature_snapshot(pair, features_history, latest_data, feature_names_by_frame, candle_history):
+    union = set()
+    for names in feature_names_by_frame.values():
+        union.update(names)
+
+    with timed(pair, "aggregate_features"):
+        features, base_keys = collect_features(pair, features_history, latest_data, list(union), candle_history)
+    with timed(pair, "add_live_momentum_features"):
+        momentum = add_live_momentum_features(features_history)
+    features.update(momentum)
+    base_keys.update(momentum)
+
+    return FeatureSnapshot(pair, features, base_keys, union)
@@ -0,0 +1,233 @@
+# features/streaming_indicators.py
+import math
+from collections import deque
+
+# Same windows calculate_indicators uses for the 1m frame
+RSI_LENGTH = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+MA_LENGTH = 20
+BB_STD = 2.0
+ATR_LENGTH = 14
+
+INDICATOR_COLUMNS = [
+    "sma_20", "ema_20", "rsi",
+    "macd", "macd_signal", "macd_histogram",
+    "bb_upper", "bb_lower", "atr_14",
+]
+
+# How far back sync() looks for the last candle it has seen before giving up and replaying
+MAX_CATCHUP = 120
+
+NAN = float("nan")
+
+
+class _Ema:
+    """EMA seeded with the SMA of the first `length` values (pandas_ta style)."""
+    __slots__ = ("length", "alpha", "count", "total", "value")
+
+    def __init__(self, length, alpha=None):
+        self.length = length
+        self.alpha = alpha if alpha is not None else 2.0 / (length + 1)
+        self.count = 0
+        self.total = 0.0
+        self.value = NAN
+
+    def peek(self, x):
+        """Returns (count, total, value) after x without mutating the state."""
+        count = self.count + 1
+        if count < self.length:
+            return count, self.total + x, NAN
+        if count == self.length:
+            total = self.total + x
+            return count, total, total / self.length
+        return count, self.total, self.value + self.alpha * (x - self.value)
+
+    def set(self, state):
+        self.count, self.total, self.value = state
+
+
+class StreamingIndicators:
+    """
+    Incremental version of calculate_indicators for one pair.
+
+    Closed candles are folded into the committed state once. The newest candle
+    (which may still be forming) is evaluated on top of the committed state, so
+    re-sending it with updated prices costs the same O(1) step again.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._closes = deque(maxlen=MA_LENGTH - 1)
+        self._ema_20 = _Ema(MA_LENGTH)
+        self._ema_fast = _Ema(MACD_FAST)
+        self._ema_slow = _Ema(MACD_SLOW)
+        self._ema_signal = _Ema(MACD_SIGNAL)
+        self._avg_gain = _Ema(RSI_LENGTH, alpha=1.0 / RSI_LENGTH)
+        self._avg_loss = _Ema(RSI_LENGTH, alpha=1.0 / RSI_LENGTH)
+        self._atr = _Ema(ATR_LENGTH, alpha=1.0 / ATR_LENGTH)
+        self._prev_close = None
+
+        self._pending_ts = None
+        self._pending_candle = None
+        self._pending_state = None
+        self.values = {}
+        self.candles_seen = 0
+
+    # --- core step -------------------------------------------------------
+
+    def _step(self, candle):
+        close = float(candle["close"])
+        high = float(candle.get("high", close))
+        low = float(candle.get("low", close))
+
+        ema_20 = self._ema_20.peek(close)
+        ema_fast = self._ema_fast.peek(close)
+        ema_slow = self._ema_slow.peek(close)
+
+        macd = ema_fast[2] - ema_slow[2]
+        if math.isnan(macd):
+            ema_signal = (self._ema_signal.count, self._ema_signal.total, NAN)
+        else:
+            ema_signal = self._ema_signal.peek(macd)
+
+        prev_close = self._prev_close
+        if prev_close is None:
+            avg_gain = (self._avg_gain.count, self._avg_gain.total, NAN)
+            avg_loss = (self._avg_loss.count, self._avg_loss.total, NAN)
+            true_range = high - low
+        else:
+            change = close - prev_close
+            avg_gain = self._avg_gain.peek(max(change, 0.0))
+            avg_loss = self._avg_loss.peek(max(-change, 0.0))
+            true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        atr = self._atr.peek(true_range)
+
+        gain, loss = avg_gain[2], avg_loss[2]
+        if math.isnan(gain) or math.isnan(loss):
+            rsi = NAN
+        elif gain + loss == 0:
+            rsi = 50.0
+        else:
+            rsi = 100.0 * gain / (gain + loss)
+
+        if len(self._closes) == MA_LENGTH - 1:
+            window = list(self._closes)
+            window.append(close)
+            sma = math.fsum(window) / MA_LENGTH
+            std = math.sqrt(math.fsum((x - sma) ** 2 for x in window) / MA_LENGTH)
+            bb_upper = sma + BB_STD * std
+            bb_lower = sma - BB_STD * std
+        else:
+            sma = bb_upper = bb_lower = NAN
+
+        values = {
+            "sma_20": sma,
+            "ema_20": ema_20[2],
+            "rsi": rsi,
+            "macd": macd,
+            "macd_signal": ema_signal[2],
+            "macd_histogram": macd - ema_signal[2],
+            "bb_upper": bb_upper,
+            "bb_lower": bb_lower,
+            "atr_14": atr[2],
+        }
+        state = (close, ema_20, ema_fast, ema_slow, ema_signal, avg_gain, avg_loss, atr)
+        return values, state
+
+    def _commit(self, state):
+        close, ema_20, ema_fast, ema_slow, ema_signal, avg_gain, avg_loss, atr = state
+        self._closes.append(close)
+        self._ema_20.set(ema_20)
+        self._ema_fast.set(ema_fast)
+        self._ema_slow.set(ema_slow)
+        self._ema_signal.set(ema_signal)
+        self._avg_gain.set(avg_gain)
+        self._avg_loss.set(avg_loss)
+        self._atr.set(atr)
+        self._prev_close = close
+        self.candles_seen += 1
+
+    # --- public API ------------------------------------------------------
+
+    def update(self, candle):
+        """
+        Feed one 1m candle. A candle with the same timestamp as the pending one
+        replaces it; a newer timestamp closes the pending candle first.
+        """
+        ts = candle.get("timestamp")
+        if self._pending_state is not None and ts != self._pending_ts:
+            self._commit(self._pending_state)
+
+        values, state = self._step(candle)
+        self._pending_ts = ts
+        self._pending_candle = candle
+        self._pending_state = state
+        self.values = values
+        return values
+
+    def sync(self, candle_history):
+        """
+        Brings the engine up to date with a candle buffer (list of dicts, oldest first).
+        Only the candles added since the last call are stepped; the first call
+        replays the whole buffer once.
+        """
+        if not candle_history:
+            return self.values
+
+        n = len(candle_history)
+        i = n - 1
+        if self._pending_state is not None:
+            stop = max(-1, n - 1 - MAX_CATCHUP)
+            while i > stop and candle_history[i].get("timestamp") != self._pending_ts:
+                i -= 1
+            if i == stop:
+                i = -1
+        else:
+            i = -1
+
+        if i == n - 1:
+            return self.update(candle_history[i])
+        if i < 0:
+            self.reset()
+            start = 0
+        else:
+            # candle_history[i] is the final version of the pending candle
+            self._pending_state = None
+            self._step_and_commit(candle_history[i])
+            start = i + 1
+
+        for candle in candle_history[start:n - 1]:
+            self._step_and_commit(candle)
+        if start <= n - 1:
+            self.update(candle_history[n - 1])
+        return self.values
+
+    def _step_and_commit(self, candle):
+        _, state = self._step(candle)
+        self._commit(state)
+
+    def latest(self):
+        """Latest candle fields plus indicators, shaped like calculate_indicators(...).iloc[-1]."""
+        row = dict(self._pending_candle or {})
+        row.update(self.values)
+        return row
+
+
+_engines = {}
+
+
+def get_indicator_engine(pair):
+    engine = _engines.get(pair)
+    if engine is None:
+        engine = _engines[pair] = StreamingIndicators()
+    return engine
+
+
+def latest_indicators(pair, candle_history):
+    engine = get_indicator_engine(pair)
+    engine.sync(candle_history)
+    return engine.latest()
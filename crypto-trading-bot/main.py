@@ -1,36 +1,47 @@
 
 import threading
 from data.ws_client import init_all_buffers, start_ws_listener
-from features.feature_aggregator import aggregate_features
-from config import    HORIZONS,  WATCHED_PAIRS
+from config import    WATCHED_PAIRS
 from data.daily_fetcher import fetch_all_candles
-from trading.momentum import add_live_momentum_features
 import asyncio
-from model.predictor import log_prediction_batch, predict
 import platform
 import json
-from config import models, RL_MODELS
-from robot.helper_function import evaluate_rl_bot
+import time
+from config import USE_BATCH_PREDICTION, EXECUTION_MODE, SHARDING, TICK_COALESCING, MAX_CLOSED_BACKLOG, HEALTH_LOG
 from data.utils.convert_to_features import convert_all_from_daily
 from model.utils.model_watcher import start_model_reload_watcher
 from utils.model_loaders import load_all_models
+from utils.batch_predictor import prediction_service
+from utils.send_trader import signal_publisher
+from utils.shard_pool import ShardPool
+from utils.tick_pipeline import prepare_tick, predict_tick, finish_tick, horizon_thresholds, due_features
+from utils.tick_coalescer import TickCoalescer
+from utils.latency import timed
+from utils.log_writer import log_writer
+from trading.paper_wallet import restore_wallet
 
 
 booting_up = True  # global flag to suppress reloads if needed
 
 async def boot():
+    # Bring the paper wallet back from its journal before any tick can trade
+    restore_wallet()
+
     # Async boot step
     await fetch_all_candles()
 
     # Sync steps after async completes
     convert_all_from_daily(days=3)   # CSV -> feature JSONL
-    load_all_models()                # Load XGB, RL, etc.
+    sharded = EXECUTION_MODE == "sharded"  # shard workers load and watch their own models
+    if not sharded:
+        load_all_models()                # Load XGB, RL, etc.
 
     global booting_up
     booting_up = False               # ✅ Now it's safe to start watching
 
     # Start model file watcher
-    threading.Thread(target=start_model_reload_watcher, daemon=True).start()
+    if not sharded:
+        threading.Thread(target=start_model_reload_watcher, daemon=True).start()
 
     # Start main async app loop
     await main()   
@@ -40,16 +51,22 @@ async def boot():
 def symbol_from_pair(pair: str) -> str:
     return pair.replace("/USDT", "").upper()
 
-def validate_features(expected_features, features):
-    """Validate if all expected features are present in the features dictionary."""
-    missing_features = []
-    for feature in expected_features:
-        if feature not in features:
-            missing_features.append(feature)
 
-    if missing_features:
-        print(f"⚠️ Missing features: {missing_features}")
-        
+async def log_health(coalescer, shard_pool):
+    """Every HEALTH_LOG["seconds"], writes the ingestion and shard stats to HEALTH_LOG["path"] from the event loop."""
+    while True:
+        await asyncio.sleep(HEALTH_LOG["seconds"])
+        health = {"timestamp": time.time()}
+        if shard_pool is not None:
+            health["shards"] = shard_pool.log_health()
+        if coalescer is not None:
+            stats = coalescer.stats()
+            health["coalescer"] = stats
+            print(f"📥 Coalescer | backlog={coalescer.queue_depth()} "
+                  f"merged={sum(s['merged'] for s in stats.values())} "
+                  f"dropped={sum(s['dropped'] for s in stats.values())} "
+                  f"max lag={max((s['max_lag_ms'] for s in stats.values()), default=0)} ms")
+        log_writer.replace(HEALTH_LOG["path"], health, indent=2)
 
 
 async def main():
@@ -60,75 +77,56 @@ async def main():
     await init_all_buffers()
     print("Bootstrapping historical data...")
     current_prices = {}
-    
+
+    def publish_result(tick, predictions):
+        # Non-blocking: the publisher sends from its own task and keeps only the newest signal per token
+        with timed(tick["pair"], "send_signal_to_trading_server"):
+            signal_publisher.publish(tick["token"], tick["latest_data"], tick["features_by_horizon"], predictions, tick["rl_result"])
+
+    shard_pool = None
+    if EXECUTION_MODE == "sharded":
+        shard_pool = ShardPool(WATCHED_PAIRS, SHARDING["shards"], on_result=publish_result)
+        shard_pool.start(asyncio.get_running_loop())
+
     async def on_price_update(pair, latest_data, latest_feature, candle_history, symbol, feature_buffer):
-        token = pair.split("/")[0]        
-        
-        # RL agent (per token)
-        result = evaluate_rl_bot(token, latest_feature, RL_MODELS)
-        if result:
-            print(f"[RL] {token} | Action: {result['action']} | Reward: {result['reward']:.4f}")
-                
         current_prices[pair] = latest_data["close"]
-        predictions = {}
-        features_by_horizon = {}
-        for _, info in HORIZONS.items():
-            frame = info["frame"]
-            threshold = info["threshold"]
-
-            model = models[token][frame]["model"]
-            feature_names = models[token][frame]["features"]
-
-            features = aggregate_features(
-                pair,
-                feature_buffer[symbol],
-                latest_feature,
-                feature_names,
-                candle_history[symbol]
-            )
-            validate_features(feature_names, features)
-            features.update(add_live_momentum_features(feature_buffer[symbol]))
-
-            predictions[frame] = predict(model, features, feature_names, threshold, token, frame)
-            features_by_horizon[frame] = features
-            from utils.send_trader import send_signal_to_trading_server
-            
-            debug_path = f"logs/feature_debug_{pair}_{frame}.txt"
-            with open(debug_path, "w", encoding="utf-8") as f:
-                f.write(f"🔎 Feature Snapshot for {pair} {frame} \n")
-                f.write("=" * 40 + "\n")
-                for key in sorted(features.keys()):
-                    val = features[key]
-                    try:
-                        if isinstance(val, float):
-                            f.write(f"{key:<30}: {val:.6f}\n")
-                        else:
-                            f.write(f"{key:<30}: {val}\n")
-                    except Exception as e:
-                        f.write(f"{key:<30}: ❌ Error printing value ({e})\n")
-                        
-        prediction_entries = [
-            (
-                predictions[frame]["probability"],
-                predictions[frame]["threshold"],
-                predictions[frame]["direction"],
-                frame
-            )
-            for frame in predictions
-        ]
-
-        # Get latest price from incoming data
-        latest_price = latest_data["close"]
-
-        # Log predictions for all frames
-        log_prediction_batch(token, latest_price, prediction_entries)
-        try:
-            await send_signal_to_trading_server(token, latest_data, features_by_horizon, predictions, result)
-        except Exception as e:
-            print(f"❌ Error sending signal to trading server: {e}")
+
+        if shard_pool:
+            # Features, predictions and RL run in the worker that owns this pair
+            shard_pool.submit(pair, latest_data, latest_feature, candle_history[symbol], feature_buffer[symbol])
+            return
+
+        with timed(pair, "total"):
+            tick = prepare_tick(pair, latest_data, latest_feature, candle_history[symbol], feature_buffer[symbol])
+
+            if USE_BATCH_PREDICTION:
+                # One predict per model, shared with every pair ticking in the same window
+                with timed(pair, "predict"):
+                    predictions = await prediction_service.predict_tick(
+                        tick["token"], due_features(tick), horizon_thresholds(), tick["missing_by_horizon"]
+                    ) if tick["due_frames"] else {}
+            else:
+                predictions = predict_tick(tick)
+
+            predictions = finish_tick(tick, predictions)
+            publish_result(tick, predictions)
     
+    # Keep only the newest pending update per pair (closed candles still go through) when processing falls behind
+    listener_callback = on_price_update
+    coalescer = None
+    if TICK_COALESCING:
+        coalescer = TickCoalescer(on_price_update, MAX_CLOSED_BACKLOG)
+        listener_callback = coalescer.submit
+    health_task = asyncio.create_task(log_health(coalescer, shard_pool))
+
     print("Starting WebSocket listeners...")
-    await start_ws_listener([s.lower().replace("/", "") for s in WATCHED_PAIRS], on_price_update)
+    try:
+        await start_ws_listener([s.lower().replace("/", "") for s in WATCHED_PAIRS], listener_callback)
+    finally:
+        health_task.cancel()
+        await signal_publisher.close()
+        if shard_pool:
+            shard_pool.stop()
 
 
 if __name__ == "__main__":
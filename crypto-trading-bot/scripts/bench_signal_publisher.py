@@ -0,0 +1,72 @@
+# Throughput of the pooled SignalPublisher vs. one ClientSession per signal.
+# Usage: python -m scripts.bench_signal_publisher [--signals 3000] [--delay-ms 0] [--batch-size 1]
+import argparse
+import asyncio
+import contextlib
+import io
+import random
+import time
+
+from config import TOKENS
+from scripts.stub_trading_server import start_stub_server
+from utils.send_trader import SignalPublisher, send_signal_to_trading_server
+
+FRAMES = ["1m", "15m", "1h", "1d"]
+
+
+def fake_signal(token):
+    features = {f"feature_{i}": random.random() for i in range(150)}
+    candle = {"timestamp": int(time.time() * 1000), "open": 1.0, "high": 1.1, "low": 0.9, "close": 1.05, "volume": 10.0}
+    predictions = {f: {"probability": random.random(), "threshold": 0.003, "direction": "up"} for f in FRAMES}
+    return token, candle, {f: dict(features) for f in FRAMES}, predictions, {"action": 1, "reward": 0.1}
+
+
+async def bench_per_call_session(base_url, signals):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for signal in signals:
+            await send_signal_to_trading_server(*signal, url=f"{base_url}/signal/update")
+    return time.perf_counter() - start
+
+
+async def bench_publisher(base_url, signals, batch_size, coalesce=True):
+    publisher = SignalPublisher(f"{base_url}/signal/update", f"{base_url}/signal/batch", batch_size=batch_size)
+    start = time.perf_counter()
+    for signal in signals:
+        while not coalesce and signal[0] in publisher._pending:
+            await asyncio.sleep(0)  # wait for this token's previous signal to go out so none is replaced
+        publisher.publish(*signal)
+        await asyncio.sleep(0)  # one tick of the event loop per incoming update
+    await publisher.close(timeout=60)
+    return time.perf_counter() - start, publisher.stats
+
+
+async def main(args):
+    runner, base_url = await start_stub_server(delay_ms=args.delay_ms)
+    signals = [fake_signal(random.choice(TOKENS)) for _ in range(args.signals)]
+    try:
+        baseline = await bench_per_call_session(base_url, signals[: args.baseline_signals])
+        print(f"📦 Session per signal : {args.baseline_signals / baseline:8.0f} signals/s delivered")
+
+        # Same work as the baseline: every signal delivered, none coalesced
+        total, stats = await bench_publisher(base_url, signals, args.batch_size, coalesce=False)
+        print(f"🚀 Pooled, no coalesce: {stats['sent'] / total:8.0f} signals/s delivered")
+        print(f"   sent={stats['sent']} failed={stats['failed']} posts={stats['posts']}")
+
+        # Live behaviour: newer updates replace pending ones, so fewer signals go out
+        total, stats = await bench_publisher(base_url, signals, args.batch_size)
+        print(f"🔀 Pooled, coalescing : {stats['sent'] / total:8.0f} signals/s delivered "
+              f"({len(signals) / total:.0f} updates/s accepted)")
+        print(f"   sent={stats['sent']} coalesced={stats['coalesced']} dropped={stats['dropped']} "
+              f"failed={stats['failed']} posts={stats['posts']}")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--signals", type=int, default=3000)
+    parser.add_argument("--baseline-signals", type=int, default=300)
+    parser.add_argument("--delay-ms", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,74 @@
+# Checks trading.exit_sim.simulate_exits against stepping should_exit_trade tick by tick.
+# Usage: python -m scripts.check_exit_sim_parity [--trades 2000] [--bars 600] [--seed 7] [--sl 0.005] [--tp 0.01]
+import argparse
+import contextlib
+import io
+import sys
+import time
+from datetime import timedelta
+
+import numpy as np
+
+from config import TRADE_CONFIG
+from trading.exit_sim import REASONS, TIMEOUT, reason_counts, simulate_exits
+from trading.paper_wallet import _check_trailing_logic, should_exit_trade
+
+
+def scalar_exit(close, entry_bar, direction, decay, max_bars, sl_pct, tp_pct):
+    """(exit bar, reason) from the live rules, one minute bar per tick; the peak follows _check_trailing_logic."""
+    entry = close[entry_bar]
+    trade = {"direction": direction, "entry_price": entry, "peak_price": entry,
+             "features": {"volume_surge": 0.5} if decay else {}}
+    sl_price = entry * (1 - sl_pct) if direction == "up" else entry * (1 + sl_pct)
+    tp_price = entry * (1 + tp_pct) if direction == "up" else entry * (1 - tp_pct)
+    for k in range(1, max_bars + 1):
+        price = close[entry_bar + k]
+        _check_trailing_logic(trade, price, 1.0, direction)
+        exit_now, reason = should_exit_trade(trade, price, timedelta(minutes=k), sl_price, tp_price)
+        if exit_now:
+            return entry_bar + k, reason
+    return entry_bar + max_bars, "timeout"
+
+
+def check_parity(trades, bars, rng, sl=None, tp=None):
+    n = trades + bars + 1
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    entry_bars = rng.integers(0, trades, trades)
+    directions = rng.choice(np.array(["up", "down"]), trades)
+    decay = rng.random(trades) < 0.1
+    sl = TRADE_CONFIG["stop_loss_pct"] if sl is None else sl
+    tp = TRADE_CONFIG["take_profit_pct"] if tp is None else tp
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = [scalar_exit(close, i, d, f, bars, sl, tp) for i, d, f in zip(entry_bars, directions, decay)]
+    scalar_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    result = simulate_exits(entry_bars, directions, close, stop_loss_pct=sl, take_profit_pct=tp, max_bars=bars, decay=decay)
+    batch_s = time.perf_counter() - started
+
+    mismatches = []
+    for j, (bar, reason) in enumerate(expected):
+        got = (int(result["exit_bar"][j]), REASONS[result["reason"][j]] if result["reason"][j] != TIMEOUT else "timeout")
+        if got != (bar, reason):
+            mismatches.append((j, (bar, reason), got))
+
+    print(f"🔎 {trades} trades x {bars} bars | scalar {scalar_s:.2f}s, vectorized {batch_s * 1000:.1f}ms | {reason_counts(result['reason'])}")
+    for j, want, got in mismatches[:10]:
+        print(f"❌ trade {j}: scalar={want} vectorized={got}")
+    if not mismatches:
+        print("✅ Vectorized exits match should_exit_trade trade for trade")
+    return not mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trades", type=int, default=2000)
+    parser.add_argument("--bars", type=int, default=600)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--sl", type=float, help="stop loss pct (defaults to TRADE_CONFIG)")
+    parser.add_argument("--tp", type=float, help="take profit pct (defaults to TRADE_CONFIG)")
+    args = parser.parse_args()
+
+    sys.exit(0 if check_parity(args.trades, args.bars, np.random.default_rng(args.seed), args.sl, args.tp) else 1)
@@ -0,0 +1,143 @@
+# Compares the streaming indicator row against calculate_indicators on real candles.
+# Usage: python -m scripts.check_indicator_parity [CSV] [--tolerance 1e-6] [--timeframes]
+import argparse
+import glob
+import sys
+
+import numpy as np
+import pandas as pd
+
+from config import DAILY_DIR, MAX_CANDLES_PER_PAIR
+from data.indicators import calculate_indicators
+from data.ta_strat import ta_strategy
+from data.utils.timeframes import convert_tf, update_multi_tf_buffers
+from features.bar_builder import OHLCV, BarBuilder
+from features.feature_aggregator import latest_indicator_row
+from features.streaming_indicators import INDICATOR_COLUMNS
+
+WARMUP = 400  # candles before the first comparison so EMA/RMA seeds have decayed
+PARITY_PAIR = "PARITY/CHECK"  # own engine, so a running bot's state isn't touched
+
+
+def load_candles(path):
+    df = pd.read_csv(path)
+    return df.to_dict("records")
+
+
+def _rel_diff(expected, actual):
+    if pd.isna(expected) and np.isnan(actual):
+        return 0.0
+    return abs(expected - actual) / max(1.0, abs(expected))
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, np.number)) and not isinstance(value, bool)
+
+
+def _report(worst, tolerance):
+    failed = False
+    for col, err in worst.items():
+        status = "❌" if err > tolerance else "✅"
+        failed |= err > tolerance
+        print(f"{status} {col:<20}: max rel diff {err:.3e}")
+    return not failed
+
+
+def check_parity(candles, tolerance=1e-6, every=25):
+    """
+    The row collect_features uses with USE_STREAMING_INDICATORS on, against
+    calculate_indicators over the whole buffer: same keys, same values.
+    """
+    history = []
+    worst = {}
+    only_batch, only_streaming = set(), set()
+
+    for i, candle in enumerate(candles):
+        history.append(candle)
+        history = history[-MAX_CANDLES_PER_PAIR:]
+        row = latest_indicator_row(PARITY_PAIR, history)
+
+        if i < WARMUP or i % every:
+            continue
+
+        ref = calculate_indicators(pd.DataFrame(history).copy()).iloc[-1]
+        only_batch |= set(ref.index) - set(row)
+        only_streaming |= set(row) - set(ref.index)
+        for col in ref.index:
+            if col not in row:
+                continue
+            if _is_number(ref[col]) and _is_number(row[col]):
+                worst[col] = max(worst.get(col, 0.0), _rel_diff(ref[col], row[col]))
+            elif ref[col] != row[col]:
+                worst[col] = float("inf")
+
+    print(f"🔎 Compared {len(candles)} candles (tolerance {tolerance:g})")
+    for col in sorted(only_batch):
+        print(f"❌ {col} is missing from the streaming row")
+    for col in sorted(only_streaming):
+        print(f"❌ {col} is only in the streaming row")
+    return _report(worst, tolerance) and not only_batch and not only_streaming
+
+
+def check_timeframe_parity(candles, tolerance=1e-6, every=25):
+    """
+    BarBuilder bars against convert_tf on the same 1m buffer, and its per-timeframe
+    streaming indicators against calculate_indicators over those same resampled
+    bars, so indicators that keep history beyond the buffer show up as diffs.
+    The "ta:" rows compare them with ta_strategy, which feature_aggregator uses
+    unless STREAMING_TIMEFRAME_FEATURES is on.
+    """
+    builder = BarBuilder(indicators=True)
+    history = []
+    worst = {}
+
+    for i, candle in enumerate(candles):
+        history.append(candle)
+        history = history[-MAX_CANDLES_PER_PAIR:]
+        builder.sync(history)
+
+        if i < WARMUP or i % every:
+            continue
+
+        ref_frames = convert_tf(update_multi_tf_buffers(history))
+        for tf in builder.timeframes:
+            ours = builder.frame(tf)
+            ref = ref_frames[tf]
+            # The bar at the buffer edge is partial in both, so it is compared too
+            common = ours.index.intersection(ref.index)
+            for col in OHLCV:
+                key = f"{col}_{tf}"
+                for ts in common:
+                    worst[key] = max(worst.get(key, 0.0), _rel_diff(ref.at[ts, col], ours.at[ts, col]))
+
+            ref_row = calculate_indicators(ref.copy()).iloc[-1]
+            for col in INDICATOR_COLUMNS:
+                if col in ref_row:
+                    key = f"{col}_{tf}"
+                    worst[key] = max(worst.get(key, 0.0), _rel_diff(ref_row[col], builder.indicators(tf)[col]))
+                try:
+                    expected = ta_strategy(f"{col}_{tf}", ref.copy(), tf_name=tf)
+                except Exception:
+                    expected = None
+                if expected is not None:
+                    key = f"ta:{col}_{tf}"
+                    worst[key] = max(worst.get(key, 0.0), _rel_diff(expected, builder.indicators(tf)[col]))
+
+    print(f"🔎 Compared {len(candles)} candles across {builder.timeframes} (tolerance {tolerance:g})")
+    return _report(worst, tolerance)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("csv", nargs="?", help="1m OHLCV csv (defaults to the first BTCUSDT file in data/daily)")
+    parser.add_argument("--tolerance", type=float, default=1e-6)
+    parser.add_argument("--timeframes", action="store_true", help="check the 15m/1h/4h/1d bar builder instead of 1m")
+    args = parser.parse_args()
+
+    path = args.csv or next(iter(sorted(glob.glob(f"{DAILY_DIR}/BTCUSDT_1m*.csv"))), None)
+    if not path:
+        print(f"❌ No candles found in {DAILY_DIR}")
+        sys.exit(1)
+
+    check = check_timeframe_parity if args.timeframes else check_parity
+    sys.exit(0 if check(load_candles(path), args.tolerance) else 1)
@@ -0,0 +1,82 @@
+# Checks BatchPredictor.predict_batch against model.predictor.predict row by row on the loaded models.
+# Usage: python -m scripts.check_prediction_parity [--pairs BTC/USDT ETH/USDT] [--rows 200] [--seed 7]
+import argparse
+import contextlib
+import io
+import math
+import sys
+import time
+
+import numpy as np
+
+from config import HORIZONS, WATCHED_PAIRS, models
+from model.predictor import predict
+from utils.batch_predictor import BatchPredictor
+from utils.model_loaders import reload_llm_model
+from utils.tick_pipeline import horizon_thresholds
+
+MISSING_RATE = 0.05  # share of features left out, so the NaN path is covered too
+TOLERANCE = 1e-6     # float32 batch matrix vs predict's own row
+
+
+def random_rows(names, rows, rng):
+    out = []
+    for _ in range(rows):
+        values = rng.normal(0, 10, len(names))
+        keep = rng.random(len(names)) >= MISSING_RATE
+        out.append({name: float(v) for name, v, k in zip(names, values, keep) if k})
+    return out
+
+
+def same(a, b):
+    if a.keys() != b.keys():
+        return False
+    for key in a:
+        x, y = a[key], b[key]
+        if isinstance(x, float) or isinstance(y, float):
+            if not (math.isclose(x, y, rel_tol=0, abs_tol=TOLERANCE) or (math.isnan(x) and math.isnan(y))):
+                return False
+        elif x != y:
+            return False
+    return True
+
+
+def check_parity(tokens, rows, rng):
+    thresholds = horizon_thresholds()
+    entries, expected = [], []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for token in tokens:
+            for info in HORIZONS.values():
+                frame = info["frame"]
+                model_info = models[token][frame]
+                for features in random_rows(model_info["features"], rows, rng):
+                    entries.append((token, frame, features, thresholds[frame]))
+                    expected.append(predict(model_info["model"], features, model_info["features"], thresholds[frame], token, frame))
+
+        started = time.perf_counter()
+        got = BatchPredictor().predict_batch(entries)
+        batch_s = time.perf_counter() - started
+
+    mismatches = [(i, want, have) for i, (want, have) in enumerate(zip(expected, got)) if not same(want, have)]
+    print(f"🔎 {len(entries)} rows over {len(tokens)} token(s) x {len(HORIZONS)} horizon(s) | batch {batch_s * 1000:.1f}ms")
+    for i, want, have in mismatches[:10]:
+        print(f"❌ {entries[i][0]} {entries[i][1]} row {i}: predict={want} batch={have}")
+    if not mismatches:
+        print("✅ Batched predictions match predict() dict for dict")
+    return not mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pairs", nargs="+", default=WATCHED_PAIRS)
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    tokens = sorted({pair.split("/")[0].upper() for pair in args.pairs})
+    for token in tokens:
+        models.setdefault(token, {})
+        for info in HORIZONS.values():
+            reload_llm_model(token, info["frame"])
+
+    sys.exit(0 if check_parity(tokens, args.rows, np.random.default_rng(args.seed)) else 1)
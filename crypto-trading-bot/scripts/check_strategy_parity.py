@@ -0,0 +1,105 @@
+# Checks evaluate_multi_signal_batch against the scalar evaluate_multi_signal row by row.
+# Usage: python -m scripts.check_strategy_parity [--rows 20000] [--token BTC] [--seed 7]
+import argparse
+import contextlib
+import io
+import sys
+import time
+
+import numpy as np
+
+from trading.strategy import evaluate_multi_signal
+from trading.strategy_batch import HORIZON_ORDER, evaluate_multi_signal_batch, horizon_columns
+
+# Feature ranges straddle every threshold the filters and hold-duration rules use
+FEATURE_RANGES = {
+    "rsi": (30, 70),
+    "macd_histogram": (-0.05, 0.05),
+    "macd_direction_3": (-1, 1),
+    "macd_cross": (0, 1),
+    "volume_surge": (0.2, 2.5),
+    "ema_20": (99.5, 100.5),
+    "ema_20_prev": (99.5, 100.5),
+    "sma_20": (99.5, 100.5),
+    "sma_20_prev": (99.5, 100.5),
+    "momentum_5": (-0.002, 0.001),
+    "bearish_count_5": (0, 5),
+    "doji_count": (0, 6),
+    "trend_strength_5": (0, 2),
+    "noise_ratio": (0.5, 1.0),
+}
+INTEGER_FEATURES = {"macd_direction_3", "macd_cross", "bearish_count_5", "doji_count"}
+
+
+def random_rows(n, rng):
+    rows = []
+    for _ in range(n):
+        predictions, features = {}, {}
+        for horizon in HORIZON_ORDER:
+            if rng.random() < 0.05:
+                continue  # horizon missing at this timestamp
+            confidence = float(rng.choice([rng.uniform(0.5, 1.0), 0.75, 0.85, 0.9, 0.95]))
+            direction = str(rng.choice(["up", "down"]))
+            predictions[horizon] = {"confidence": confidence, "direction": direction}
+            f = {}
+            for name, (low, high) in FEATURE_RANGES.items():
+                if rng.random() < 0.05:
+                    continue  # key missing
+                value = rng.uniform(low, high)
+                if name in INTEGER_FEATURES:
+                    value = float(round(value))
+                if rng.random() < 0.01:
+                    value = float("nan")
+                f[name] = value
+            features[horizon] = f
+        rows.append((predictions, features))
+    return rows
+
+
+def check_parity(rows, token):
+    started = time.perf_counter()
+    expected = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for predictions, features in rows:
+            expected.append(evaluate_multi_signal(predictions, token, features, 100.0)[0])
+    scalar_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    columns = {
+        horizon: horizon_columns([p.get(horizon) for p, _ in rows], [f.get(horizon) for _, f in rows])
+        for horizon in HORIZON_ORDER
+    }
+    build_s = time.perf_counter() - started
+    started = time.perf_counter()
+    batch = evaluate_multi_signal_batch(token, columns)
+    batch_s = time.perf_counter() - started
+
+    mismatches = []
+    for i, decision in enumerate(expected):
+        if decision is None:
+            if batch["signal"][i]:
+                mismatches.append((i, None, batch["horizon"][i]))
+            continue
+        got = (batch["direction"][i], batch["horizon"][i], int(batch["duration"][i]), float(batch["multiplier"][i]), float(batch["confidence"][i]))
+        want = (decision["direction"], decision["horizon"], decision["duration"], decision["multiplier"], float(decision["confidence"]))
+        if not batch["signal"][i] or got != want:
+            mismatches.append((i, want, got))
+
+    signals = sum(d is not None for d in expected)
+    print(f"🔎 {len(rows)} rows, {signals} signals | scalar {scalar_s:.2f}s, batch {batch_s * 1000:.1f}ms (+{build_s:.2f}s to build columns)")
+    for i, want, got in mismatches[:10]:
+        print(f"❌ row {i}: scalar={want} batch={got}")
+    if not mismatches:
+        print("✅ Batch decisions match the scalar function row for row")
+    return not mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--token", default="BTC")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rows = random_rows(args.rows, np.random.default_rng(args.seed))
+    sys.exit(0 if check_parity(rows, args.token) else 1)
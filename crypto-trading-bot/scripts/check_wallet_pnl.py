@@ -0,0 +1,60 @@
+# Checks that the paper wallet books closed trades with the same signed return Portfolio.mark carries while they are open.
+# Usage: python -m scripts.check_wallet_pnl
+import contextlib
+import io
+import sys
+import tempfile
+
+from config import TRADE_CONFIG
+from trading import paper_wallet
+from utils.clock import SimulatedClock, use_clock
+from utils.log_writer import log_writer
+
+START_MS = 1_700_000_000_000
+HOLD_MS = 10 * 60_000  # past the min hold
+
+
+def close_trade(pair, direction, entry, exit_price):
+    """Opens and closes one trade; returns (won, balance change, equity just before the close, equity just after)."""
+    clock = SimulatedClock()
+    with use_clock(clock), contextlib.redirect_stdout(io.StringIO()):
+        clock.set_ms(START_MS)
+        paper_wallet.simulate_trade(pair, direction, 0.9, entry, {"volume_surge": 1.0})
+        clock.set_ms(START_MS + HOLD_MS)
+        balance = paper_wallet.account["balance"]
+        equity_open = paper_wallet.portfolio.mark({pair: exit_price}, balance)
+        paper_wallet.update_trade_outcomes({pair: exit_price}, pair, False)
+    result = paper_wallet.account["trade_log"][-1]
+    equity_closed = paper_wallet.portfolio.mark({pair: exit_price}, paper_wallet.account["balance"])
+    return result["won"], paper_wallet.account["balance"] - balance, equity_open, equity_closed
+
+
+def check_pnl():
+    tp = TRADE_CONFIG["take_profit_pct"]
+    sl = TRADE_CONFIG["stop_loss_pct"]
+    cases = [
+        # (pair, direction, entry, exit, should win)
+        ("SHORTWIN/USDT", "down", 100.0, 100.0 * (1 - tp * 1.05), True),
+        ("SHORTLOSS/USDT", "down", 100.0, 100.0 * (1 + sl * 1.05), False),
+        ("LONGWIN/USDT", "up", 100.0, 100.0 * (1 + tp * 1.05), True),
+        ("LONGLOSS/USDT", "up", 100.0, 100.0 * (1 - sl * 1.05), False),
+    ]
+    ok = True
+    for pair, direction, entry, exit_price, should_win in cases:
+        paper_wallet.reset_wallet()
+        size = paper_wallet.account["balance"] * TRADE_CONFIG.get("trade_risk_pct", 0.1)
+        expected = size * TRADE_CONFIG.get("leverage", 1) * (1 if direction == "up" else -1) * (exit_price / entry - 1)
+        won, pnl, equity_open, equity_closed = close_trade(pair, direction, entry, exit_price)
+        good = won == should_win and abs(pnl - expected) < 1e-9 and abs(equity_open - equity_closed) < 1e-9
+        ok &= good
+        print(f"{'✅' if good else '❌'} {direction:>4} {entry} -> {exit_price:.2f}: won={won} pnl={pnl:+.4f} "
+              f"(expected {expected:+.4f}) equity {equity_open:.4f} -> {equity_closed:.4f}")
+    return ok
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as out:
+        log_writer.root = out
+        ok = check_pnl()
+        log_writer.flush()
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,55 @@
+# Minimal stand-in for the trading server's signal endpoints.
+# Usage: python -m scripts.stub_trading_server [--port 5000] [--delay-ms 0]
+import argparse
+import asyncio
+
+from aiohttp import web
+
+
+def create_app(delay_ms=0):
+    app = web.Application()
+    app["received"] = {"signals": 0, "posts": 0, "tokens": {}}
+
+    async def record(request, payloads):
+        if delay_ms:
+            await asyncio.sleep(delay_ms / 1000)
+        stats = request.app["received"]
+        stats["posts"] += 1
+        for payload in payloads:
+            stats["signals"] += 1
+            stats["tokens"][payload.get("token")] = stats["tokens"].get(payload.get("token"), 0) + 1
+        return web.json_response({"ok": True, "count": len(payloads)})
+
+    async def update(request):
+        return await record(request, [await request.json()])
+
+    async def batch(request):
+        return await record(request, await request.json())
+
+    async def stats(request):
+        return web.json_response(request.app["received"])
+
+    app.router.add_post("/signal/update", update)
+    app.router.add_post("/signal/batch", batch)
+    app.router.add_get("/stats", stats)
+    return app
+
+
+async def start_stub_server(port=0, delay_ms=0):
+    """Starts the stub on localhost; returns (runner, base_url). Port 0 picks a free port."""
+    app = create_app(delay_ms)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--delay-ms", type=int, default=0, help="simulated server latency")
+    args = parser.parse_args()
+    print(f"🧪 Stub trading server on http://127.0.0.1:{args.port}")
+    web.run_app(create_app(args.delay_ms), host="127.0.0.1", port=args.port)
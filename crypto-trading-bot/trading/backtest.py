@@ -0,0 +1,223 @@
+# trading/backtest.py
+"""
+Replays data/daily candles through the live chain, faster than real time:
+
+    prepare_tick -> BatchPredictor -> finish_tick -> evaluate_multi_signal
+        -> execute_trade -> update_trade_outcomes
+
+A SimulatedClock (utils/clock.py) is moved to each candle's timestamp, so trade
+times, min holds and exits follow market time. Pairs sharing a minute go through
+one predict call per model, like the shard workers. The wallet starts empty with
+journaling off, the multi-account engine (when enabled) starts from fresh
+accounts, and every log the chain writes goes under the output directory.
+metrics.json also counts how often each strategy rule blocked a signal.
+
+Usage: python -m trading.backtest [--pairs BTC/USDT ETH/USDT] [--days 30] [--out DIR] [--verbose]
+"""
+import argparse
+import contextlib
+import glob
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import DAILY_DIR, FEATURE_DIR, WATCHED_PAIRS
+from trading import multi_account, paper_wallet
+from trading.rules import reset_rule_failure_counts, rule_failure_counts
+from trading.strategy import evaluate_multi_signal
+from trading.trade_executor import execute_trade
+from utils.batch_predictor import BatchPredictor
+from utils.clock import SimulatedClock, use_clock
+from utils.debug_sink import feature_debug_sink
+from utils.horizon_scheduler import horizon_scheduler
+from utils.log_writer import log_writer
+from utils.ring_buffer import ColumnarRingBuffer, to_epoch_ms
+from utils.tick_pipeline import batch_entries, finish_tick, prepare_tick
+
+PROGRESS_EVERY = 5000  # timestamps between progress lines
+
+
+def load_candles(pair, days=None):
+    """1m candles for pair from every matching data/daily CSV, deduplicated and sorted; the last `days` only."""
+    symbol = pair.replace("/", "").upper()
+    paths = sorted(glob.glob(os.path.join(DAILY_DIR, f"{symbol}_1m*.csv")))
+    if not paths:
+        return []
+    df = pd.concat([pd.read_csv(path) for path in paths], ignore_index=True)
+    df["ts_ms"] = [to_epoch_ms(ts) for ts in df["timestamp"]]
+    df = df.drop_duplicates("ts_ms", keep="last").sort_values("ts_ms")
+    if days:
+        df = df[df["ts_ms"] >= df["ts_ms"].iloc[-1] - days * 86_400_000]
+    return df.to_dict("records")
+
+
+def load_features(pair):
+    """Feature rows from convert_all_from_daily, keyed by epoch ms."""
+    token = pair.split("/")[0].upper()
+    path = os.path.join(FEATURE_DIR, f"{token}_features.jsonl")
+    if not os.path.exists(path):
+        return {}
+    rows = {}
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                rows[to_epoch_ms(row["timestamp"])] = row
+    return rows
+
+
+class Backtester:
+    def __init__(self, pairs, out_dir, starting_balance=10000.0, equity_every_minutes=60):
+        self.pairs = list(pairs)
+        self.out_dir = out_dir
+        self.starting_balance = starting_balance
+        self.equity_every_ms = equity_every_minutes * 60_000
+        self.clock = SimulatedClock()
+        self.predictor = BatchPredictor()
+        self.fills = []
+        self.equity = []
+
+    def _reset(self):
+        paper_wallet.reset_wallet(self.starting_balance)
+        multi_account.reset_accounts()
+        horizon_scheduler.reset()
+        reset_rule_failure_counts()
+        log_writer.root = self.out_dir
+        feature_debug_sink.path = os.path.join(self.out_dir, os.path.basename(feature_debug_sink.path))
+        self.fills, self.equity = [], []
+
+    def run(self, candles_by_pair, features_by_pair, verbose=False):
+        self._reset()
+        events = {}
+        for pair, candles in candles_by_pair.items():
+            for candle in candles:
+                events.setdefault(candle["ts_ms"], []).append((pair, candle))
+        timestamps = sorted(events)
+        total = sum(len(c) for c in candles_by_pair.values())
+
+        candle_history = {pair: ColumnarRingBuffer(float_dtype=np.float64) for pair in candles_by_pair}
+        feature_buffer = {pair: ColumnarRingBuffer() for pair in candles_by_pair}
+        last_feature = {pair: {} for pair in candles_by_pair}
+        prices = {}
+        next_equity = timestamps[0] if timestamps else 0
+        out = sys.stdout
+        quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+
+        started = time.perf_counter()
+        processed = 0
+        with use_clock(self.clock), quiet:
+            for n, ts in enumerate(timestamps):
+                self.clock.set_ms(ts)
+                ticks = []
+                for pair, candle in events[ts]:
+                    feature = features_by_pair.get(pair, {}).get(ts) or last_feature[pair]
+                    last_feature[pair] = feature
+                    candle_history[pair].append(candle)
+                    if feature:
+                        feature_buffer[pair].append(feature)
+                    prices[pair] = candle["close"]
+                    try:
+                        ticks.append(prepare_tick(pair, candle, feature, candle_history[pair], feature_buffer[pair]))
+                    except Exception as e:
+                        print(f"⚠️ {pair} @ {ts}: prepare_tick failed: {e}", file=out)
+                processed += len(events[ts])
+
+                entries = [entry for tick in ticks for entry in batch_entries(tick)]
+                results = self.predictor.predict_batch(entries) if entries else []
+                offset = 0
+                for tick in ticks:
+                    frames = tick["due_frames"]
+                    predictions = {frame: results[offset + k] for k, frame in enumerate(frames)}
+                    offset += len(frames)
+                    self._step(tick, finish_tick(tick, predictions), prices)
+
+                if ts >= next_equity:
+                    self._record_equity(ts, prices)
+                    next_equity = ts + self.equity_every_ms
+                if n and n % PROGRESS_EVERY == 0:
+                    rate = processed / (time.perf_counter() - started)
+                    print(f"⏩ {processed}/{total} candles | {rate:,.0f} candles/s | balance ${paper_wallet.account['balance']:,.2f}", file=out)
+
+            if timestamps:
+                self._record_equity(timestamps[-1], prices)
+        elapsed = time.perf_counter() - started
+        log_writer.flush()
+        return self._finish(processed, elapsed)
+
+    def _step(self, tick, predictions, prices):
+        pair = tick["pair"]
+        price = prices[pair]
+        decision, _ = evaluate_multi_signal(predictions, tick["token"], tick["features_by_horizon"], price)
+        if decision:
+            open_before = paper_wallet.paper_trades.open_count
+            execute_trade(pair, decision)
+            if paper_wallet.paper_trades.open_count > open_before:
+                self.fills.append({"time_ms": self.clock.timestamp() * 1000, "pair": pair, "side": "open",
+                                   "direction": decision["direction"], "price": price, "horizon": decision["horizon"]})
+        closed_before = len(paper_wallet.account["trade_log"])
+        paper_wallet.update_trade_outcomes(prices, pair, False)
+        for result in paper_wallet.account["trade_log"][closed_before:]:
+            self.fills.append({"time_ms": self.clock.timestamp() * 1000, "pair": result.get("pair", pair), "side": "close",
+                               "direction": result.get("direction"), "price": result.get("exit_price", price),
+                               "pnl": result.get("pnl"), "reason": result.get("reason")})
+
+    def _record_equity(self, ts, prices):
+        equity = paper_wallet.portfolio.mark(prices, paper_wallet.account["balance"])
+        self.equity.append({"time_ms": ts, "balance": paper_wallet.account["balance"], "equity": equity,
+                            "open_trades": paper_wallet.paper_trades.open_count})
+
+    def _finish(self, processed, elapsed):
+        account = paper_wallet.account
+        closed = account["win_count"] + account["loss_count"]
+        metrics = {
+            "pairs": self.pairs,
+            "candles": processed,
+            "seconds": round(elapsed, 2),
+            "candles_per_second": round(processed / elapsed, 1) if elapsed else None,
+            "trades": closed,
+            "wins": account["win_count"],
+            "losses": account["loss_count"],
+            "win_rate": round(account["win_count"] / closed, 4) if closed else 0.0,
+            "net_pnl": round(account["net_pnl"], 2),
+            "final_balance": round(account["balance"], 2),
+            "return_pct": round((account["balance"] / self.starting_balance - 1) * 100, 2),
+            "max_drawdown": round(paper_wallet.portfolio.max_drawdown, 4),
+            "open_at_end": paper_wallet.paper_trades.open_count,
+            # Which strategy rules blocked signals, and how often
+            "rule_failures": rule_failure_counts(),
+        }
+        os.makedirs(self.out_dir, exist_ok=True)
+        pd.DataFrame(self.fills).to_csv(os.path.join(self.out_dir, "fills.csv"), index=False)
+        pd.DataFrame(self.equity).to_csv(os.path.join(self.out_dir, "equity.csv"), index=False)
+        with open(os.path.join(self.out_dir, "metrics.json"), "w") as f:
+            json.dump(metrics, f, indent=2)
+        return metrics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pairs", nargs="+", default=WATCHED_PAIRS)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--balance", type=float, default=10000.0)
+    parser.add_argument("--out", default=os.path.join("logs", "backtest", time.strftime("%Y%m%d_%H%M%S")))
+    parser.add_argument("--verbose", action="store_true", help="keep the pipeline's per-tick prints")
+    args = parser.parse_args()
+
+    from utils.model_loaders import load_all_models
+    load_all_models(args.pairs)
+
+    candles = {pair: load_candles(pair, args.days) for pair in args.pairs}
+    features = {pair: load_features(pair) for pair in args.pairs}
+    for pair in args.pairs:
+        print(f"📦 {pair}: {len(candles[pair])} candles, {len(features[pair])} feature rows")
+
+    metrics = Backtester(args.pairs, args.out, args.balance).run(candles, features, args.verbose)
+    print(f"✅ {metrics['candles']} candles in {metrics['seconds']}s ({metrics['candles_per_second']:,.0f} candles/s) → {args.out}")
+    print(f"💰 {metrics['trades']} trades | win rate {metrics['win_rate'] * 100:.1f}% | PnL ${metrics['net_pnl']:,.2f} | max drawdown {metrics['max_drawdown'] * 100:.2f}%")
+    for rule_set, counts in metrics["rule_failures"].items():
+        if counts:
+            print(f"🚧 {rule_set} blocked by: " + ", ".join(f"{rule} {count}" for rule, count in list(counts.items())[:5]))
@@ -0,0 +1,174 @@
+# trading/exit_engine.py
+import heapq
+from bisect import bisect_left, bisect_right, insort
+
+from config import TRADE_CONFIG
+
+MIN_HOLD_SECONDS = 5 * 60
+TRAILING_EXIT_PCT = 0.01
+# Levels are widened by this much so float rounding can only add candidates, never drop one
+LEVEL_MARGIN = 1e-9
+
+
+def has_momentum_decay(features):
+    return (
+        features.get("rsi_reversal", False)
+        or (features.get("macd_histogram", 0) < 0 and features.get("macd_direction_3", 0) < 0)
+        or features.get("volume_surge", 1) < 0.8
+    )
+
+
+def exit_levels(trade, sl_pct, tp_pct):
+    """(lower, upper): should_exit_trade can only fire on a price <= lower or >= upper (after min hold)."""
+    entry = trade["entry_price"]
+    peak = trade.get("peak_price") or entry
+    if trade["direction"] == "up":
+        lower = max(entry * (1 - sl_pct), peak * (1 - TRAILING_EXIT_PCT))
+        upper = entry * (1 + tp_pct)
+    else:
+        lower = entry * (1 - tp_pct)
+        upper = min(entry * (1 + sl_pct), peak * (1 + TRAILING_EXIT_PCT))
+    return lower * (1 + LEVEL_MARGIN), upper * (1 - LEVEL_MARGIN)
+
+
+class _Registered:
+    __slots__ = ("trade", "seq", "levels", "armed")
+
+    def __init__(self, trade, seq, levels):
+        self.trade = trade
+        self.seq = seq
+        self.levels = levels
+        self.armed = False
+
+
+class ExitEngine:
+    """
+    Narrows each price update down to the open trades that could exit on it.
+
+    Once its min hold has passed, a trade's lower and upper exit levels (stop loss,
+    take profit and trailing stop) sit in per-pair sorted lists. A price update
+    bisects those lists, so it only touches trades whose level was crossed.
+    Min-hold expiries and soft-timeout checks are queued on a time wheel.
+    Trades whose entry features already show momentum decay are always candidates.
+
+    The engine only picks candidates. The caller still runs should_exit_trade on
+    each one, so exits are exactly what a full scan would produce.
+    """
+
+    def __init__(self, min_hold_seconds=MIN_HOLD_SECONDS, resolution=1.0):
+        self.min_hold_seconds = min_hold_seconds
+        self.resolution = resolution
+        self._trades = {}
+        self._lower = {}
+        self._upper = {}
+        self._always = {}
+        self._due = {}
+        self._wheel = {}
+        self._buckets = []
+        self._seq = 0
+        self._ids = {}
+
+    def __len__(self):
+        return len(self._trades)
+
+    def register(self, trade, sl_pct=None, tp_pct=None):
+        sl_pct = TRADE_CONFIG["stop_loss_pct"] if sl_pct is None else sl_pct
+        tp_pct = TRADE_CONFIG["take_profit_pct"] if tp_pct is None else tp_pct
+        self._seq += 1
+        self._trades[trade["id"]] = _Registered(trade, self._seq, exit_levels(trade, sl_pct, tp_pct))
+        self._ids[self._seq] = trade["id"]
+
+        opened = trade["opened_ms"] / 1000
+        self._schedule(opened + self.min_hold_seconds, trade["id"], "arm")
+        self._schedule(opened + trade.get("duration_minutes", 15) * 2 * 60, trade["id"], "soft_timeout")
+
+    def remove(self, trade):
+        registered = self._trades.pop(trade["id"], None)
+        if registered is None:
+            return
+        self._unlink(registered)
+        del self._ids[registered.seq]
+        self._due.get(trade["pair"], set()).discard(trade["id"])
+
+    def reprice(self, trade, sl_pct=None, tp_pct=None):
+        """Re-registers the levels after the trade's peak price moved."""
+        registered = self._trades.get(trade["id"])
+        if registered is None:
+            return
+        sl_pct = TRADE_CONFIG["stop_loss_pct"] if sl_pct is None else sl_pct
+        tp_pct = TRADE_CONFIG["take_profit_pct"] if tp_pct is None else tp_pct
+        if registered.armed:
+            self._unlink(registered)
+            registered.levels = exit_levels(trade, sl_pct, tp_pct)
+            self._link(registered)
+        else:
+            registered.levels = exit_levels(trade, sl_pct, tp_pct)
+
+    def advance(self, now):
+        """Fires every time-wheel event due at or before now (epoch seconds)."""
+        current = int(now // self.resolution)
+        while self._buckets and self._buckets[0] <= current:
+            bucket = heapq.heappop(self._buckets)
+            later = []
+            for at, trade_id, kind in self._wheel.pop(bucket):
+                registered = self._trades.get(trade_id)
+                if registered is None:
+                    continue
+                if at > now:
+                    later.append((at, trade_id, kind))
+                elif kind == "arm":
+                    registered.armed = True
+                    self._link(registered)
+                else:
+                    self._due.setdefault(registered.trade["pair"], set()).add(trade_id)
+            if later:
+                self._wheel[bucket] = later
+                heapq.heappush(self._buckets, bucket)
+                break
+
+    def candidates(self, pair, price, now):
+        """Open trades on pair that could exit at price, in the order they were opened."""
+        self.advance(now)
+        ids = set(self._always.get(pair, ()))
+        ids.update(self._due.pop(pair, ()))
+
+        lower = self._lower.get(pair)
+        if lower:
+            ids.update(self._ids[seq] for _, seq in lower[bisect_left(lower, (price,)):])
+        upper = self._upper.get(pair)
+        if upper:
+            ids.update(self._ids[seq] for _, seq in upper[:bisect_right(upper, (price, float("inf")))])
+
+        registered = sorted((self._trades[trade_id] for trade_id in ids if trade_id in self._trades), key=lambda r: r.seq)
+        return [r.trade for r in registered]
+
+    def _schedule(self, at, trade_id, kind):
+        bucket = int(at // self.resolution)
+        if bucket not in self._wheel:
+            self._wheel[bucket] = []
+            heapq.heappush(self._buckets, bucket)
+        self._wheel[bucket].append((at, trade_id, kind))
+
+    def _link(self, registered):
+        trade = registered.trade
+        pair, trade_id = trade["pair"], trade["id"]
+        if has_momentum_decay(trade.get("features", {})):
+            self._always.setdefault(pair, set()).add(trade_id)
+            return
+        lower, upper = registered.levels
+        insort(self._lower.setdefault(pair, []), (lower, registered.seq))
+        insort(self._upper.setdefault(pair, []), (upper, registered.seq))
+
+    def _unlink(self, registered):
+        if not registered.armed:
+            return
+        trade = registered.trade
+        pair, trade_id = trade["pair"], trade["id"]
+        if trade_id in self._always.get(pair, ()):
+            self._always[pair].discard(trade_id)
+            return
+        lower, upper = registered.levels
+        for levels, level in ((self._lower.get(pair), lower), (self._upper.get(pair), upper)):
+            i = bisect_left(levels, (level, registered.seq))
+            if i < len(levels) and levels[i] == (level, registered.seq):
+                del levels[i]
@@ -0,0 +1,218 @@
+# trading/exit_sim.py
+"""
+Vectorized should_exit_trade: finds the first exit bar and reason of many
+hypothetical trades at once from a price series.
+
+Each entry enters at close[entry_bar]. Its forward bars form one row of a
+(trades x bars) matrix, and the live rules run on the whole matrix. The rules
+are the exit_engine constants, checked in should_exit_trade's order: min hold,
+trailing stop from the running peak, stop loss, take profit, momentum decay.
+The first bar where any rule fires is the exit.
+
+With only close given, every bar is a price tick, like the live loop. With high
+and low given, the stops and the trailing stop test the bar's adverse extreme,
+take profit tests its favorable extreme, and these exits fill at the level
+itself (the sweep's candle model).
+
+Trades that exit drop out as the scan moves forward, and rows are processed
+in chunks, so memory stays bounded however many entries are scored.
+"""
+import numpy as np
+
+from config import TRADE_CONFIG
+from trading.exit_engine import MIN_HOLD_SECONDS, TRAILING_EXIT_PCT
+
+REASONS = (None, "trailing_stop", "stop_loss", "take_profit", "momentum_decay", "timeout")
+OPEN, TRAILING_STOP, STOP_LOSS, TAKE_PROFIT, MOMENTUM_DECAY, TIMEOUT = range(len(REASONS))
+CHUNK_CELLS = 1 << 20  # trades x bars held in memory at once
+FIRST_BLOCK = 16  # forward bars checked before the first drop-out
+
+
+def simulate_exits(entry_bars, directions, close, high=None, low=None, stop_loss_pct=None, take_profit_pct=None,
+                   max_bars=240, decay=None, trailing_pct=TRAILING_EXIT_PCT, min_hold_bars=None, bar_seconds=60):
+    """
+    entry_bars: indices into close. directions: +1/-1 or "up"/"down" per entry.
+    max_bars: scalar or per-entry window; a trade still open after it exits at
+    that bar's close ("timeout"). One that runs out of data first stays open
+    (reason code OPEN) and is marked at the last close.
+    decay: per-entry momentum-decay flags (has_momentum_decay of the entry features).
+    trailing_pct=None turns the trailing stop off; min_hold_bars defaults to MIN_HOLD_SECONDS.
+
+    Returns a dict of arrays aligned with entry_bars: exit_bar, reason (codes
+    into REASONS), exit_price, bars_held, and return (signed fraction, no leverage).
+    """
+    close = np.asarray(close, dtype=np.float64)
+    entry_bars = np.asarray(entry_bars, dtype=np.int64)
+    n, m = len(close), len(entry_bars)
+    sign = _signs(directions, m)
+    sl = TRADE_CONFIG["stop_loss_pct"] if stop_loss_pct is None else stop_loss_pct
+    tp = TRADE_CONFIG["take_profit_pct"] if take_profit_pct is None else take_profit_pct
+    if min_hold_bars is None:
+        min_hold_bars = -(-MIN_HOLD_SECONDS // bar_seconds)
+    decay = np.zeros(m, dtype=bool) if decay is None else np.asarray(decay, dtype=bool)
+    candles = high is not None and low is not None
+    if candles:
+        high = np.asarray(high, dtype=np.float64)
+        low = np.asarray(low, dtype=np.float64)
+
+    # Last bar each trade can reach: its window end, cut at the end of the data
+    window = np.broadcast_to(np.asarray(max_bars, dtype=np.int64), (m,))
+    last = np.minimum(entry_bars + window, n - 1)
+    width = np.maximum(last - entry_bars, 0)
+
+    exit_bar = last.copy()
+    reason = np.where(entry_bars + window <= n - 1, TIMEOUT, OPEN).astype(np.int8)
+    exit_price = close[np.clip(last, 0, n - 1)] if n else np.zeros(m)
+    entry = close[np.clip(entry_bars, 0, n - 1)] if n else np.zeros(m)
+
+    for start in range(0, m, CHUNK_CELLS // FIRST_BLOCK):
+        idx = np.arange(start, min(m, start + CHUNK_CELLS // FIRST_BLOCK))
+        _simulate_rows(idx[width[idx] > 0], entry_bars, sign, entry, width, close, high if candles else None,
+                       low if candles else None, sl, tp, decay, trailing_pct, min_hold_bars,
+                       exit_bar, reason, exit_price)
+
+    no_trade = (width == 0) | ~(entry > 0)
+    exit_bar[no_trade] = entry_bars[no_trade]
+    exit_price[no_trade] = entry[no_trade]
+    reason[no_trade] = OPEN
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.where(no_trade, 0.0, sign * (exit_price / entry - 1.0))
+    return {
+        "exit_bar": exit_bar,
+        "reason": reason,
+        "exit_price": exit_price,
+        "bars_held": exit_bar - entry_bars,
+        "return": returns,
+    }
+
+
+def _signs(directions, m):
+    directions = np.asarray(directions)
+    if directions.dtype.kind in "OUS":
+        return np.where(directions == "up", 1.0, -1.0)
+    return np.broadcast_to(np.where(directions > 0, 1.0, -1.0), (m,)).astype(np.float64)
+
+
+def _simulate_rows(idx, entry_bars, sign, entry, width, close, high, low, sl, tp, decay,
+                   trailing_pct, min_hold_bars, exit_bar, reason, exit_price):
+    """
+    Walks the forward bars in blocks that double in length. Rows that exit or
+    reach their window end drop out, so the work follows how long trades
+    actually stay open rather than the longest window.
+
+    Prices are compared as signed returns from entry (x = sign * (price / entry - 1)),
+    so longs and shorts share one set of comparisons: stop loss is x <= -sl, take
+    profit x >= tp, and the trailing stop fires when x falls more than trailing_pct
+    of the peak price below the best x so far.
+    """
+    best = np.zeros(len(idx))  # best signed return so far, carried between blocks
+    done, block = 0, FIRST_BLOCK
+    while len(idx):
+        block = min(block, max(FIRST_BLOCK, CHUNK_CELLS // len(idx)), int(width[idx].max()) - done)
+        k = np.arange(done + 1, done + block + 1)
+        cols = np.minimum(entry_bars[idx, None] + k, len(close) - 1)
+        valid = k <= width[idx, None]
+        s = sign[idx, None]
+        scale = s / entry[idx, None]
+
+        if high is None:
+            favorable = adverse = close[cols] * scale - s
+        else:
+            up = s > 0
+            favorable = np.where(up, high[cols], low[cols]) * scale - s
+            adverse = np.where(up, low[cols], high[cols]) * scale - s
+
+        rules = [adverse <= -sl, favorable >= tp, np.broadcast_to(decay[idx, None], valid.shape)]
+        codes = [STOP_LOSS, TAKE_PROFIT, MOMENTUM_DECAY]
+        if trailing_pct is not None:
+            # Columns past a row's window only ever follow its valid ones, so they need no masking here
+            running = np.maximum(favorable, best[:, None])
+            np.maximum.accumulate(running, axis=1, out=running)
+            best = running[:, -1].copy()
+            # Fires when running - adverse > trailing_pct * (peak price / entry), peak price / entry = 1 + s * running
+            rules.insert(0, running * (1 - trailing_pct * s) - adverse > trailing_pct)
+            codes.insert(0, TRAILING_STOP)
+
+        hit = valid & (k >= min_hold_bars) & np.logical_or.reduce(rules)
+        exited = hit.any(axis=1)
+        rows = np.flatnonzero(exited)
+        if len(rows):
+            at = hit[rows].argmax(axis=1)
+            # Earlier rules win on the exit bar, as in should_exit_trade
+            code = np.zeros(len(rows), dtype=np.int8)
+            for rule, rule_code in zip(reversed(rules), reversed(codes)):
+                code[rule[rows, at]] = rule_code
+            target = idx[rows]
+            price = close[cols[rows, at]]
+            if high is not None:
+                # Candle mode fills stops and targets at their level (as a signed return, then a price)
+                x = np.select([code == STOP_LOSS, code == TAKE_PROFIT], [-sl, tp], np.nan)
+                if trailing_pct is not None:
+                    trail = (1 + sign[target] * running[rows, at]) * (1 - sign[target] * trailing_pct)
+                    x = np.where(code == TRAILING_STOP, sign[target] * (trail - 1), x)
+                price = np.where(np.isnan(x), price, entry[target] * (1 + sign[target] * x))
+            exit_bar[target] = entry_bars[target] + done + at + 1
+            reason[target] = code
+            exit_price[target] = price
+
+        done += block
+        keep = ~exited & (width[idx] > done)
+        idx, best = idx[keep], best[keep]
+        block *= 2
+
+
+def reason_counts(reasons):
+    counts = np.bincount(np.asarray(reasons, dtype=np.int64), minlength=len(REASONS))
+    return {REASONS[code] or "open": int(count) for code, count in enumerate(counts) if count}
+
+
+def label_candles(df, max_bars=240, candles=False, **rules):
+    """Long and short exit labels for an entry at every candle of df (timestamp, close[, high, low])."""
+    close = df["close"].to_numpy(dtype=np.float64)
+    high = df["high"].to_numpy(dtype=np.float64) if candles else None
+    low = df["low"].to_numpy(dtype=np.float64) if candles else None
+    bars = np.arange(len(close))
+    labels = {"timestamp": df["timestamp"].to_numpy()}
+    for name, direction in (("long", 1), ("short", -1)):
+        result = simulate_exits(bars, direction, close, high, low, max_bars=max_bars, **rules)
+        labels[f"{name}_reason"] = np.asarray(REASONS, dtype=object)[result["reason"]]
+        labels[f"{name}_bars"] = result["bars_held"]
+        labels[f"{name}_return"] = result["return"]
+    return labels
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+    import os
+    import time
+
+    import pandas as pd
+
+    from config import DAILY_DIR
+
+    parser = argparse.ArgumentParser(description="Label every 1m candle with its long and short exit under the live exit rules")
+    parser.add_argument("pair", help="e.g. BTC/USDT; reads the newest data/daily/<SYMBOL>_1m*.csv unless --csv is given")
+    parser.add_argument("--csv")
+    parser.add_argument("--max-bars", type=int, default=240)
+    parser.add_argument("--candles", action="store_true", help="test stops against high/low instead of close")
+    parser.add_argument("--out", help="labels CSV (defaults to logs/exit_labels_<SYMBOL>.csv)")
+    args = parser.parse_args()
+
+    symbol = args.pair.replace("/", "").upper()
+    path = args.csv or max(glob.glob(os.path.join(DAILY_DIR, f"{symbol}_1m*.csv")), default=None)
+    if path is None:
+        raise SystemExit(f"❌ No 1m candles for {args.pair} in {DAILY_DIR}")
+    df = pd.read_csv(path)
+
+    started = time.perf_counter()
+    labels = pd.DataFrame(label_candles(df, args.max_bars, candles=args.candles))
+    elapsed = time.perf_counter() - started
+
+    out = args.out or f"logs/exit_labels_{symbol}.csv"
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    labels.to_csv(out, index=False)
+    print(f"✅ Labeled {2 * len(df)} entries in {elapsed:.2f}s ({2 * len(df) / elapsed:,.0f}/s) → {out}")
+    for side in ("long", "short"):
+        counts = labels[f"{side}_reason"].fillna("open").value_counts().to_dict()
+        print(f"📊 {side}: mean return {labels[f'{side}_return'].mean() * 100:.3f}% | {counts}")
@@ -2,8 +2,13 @@
 
 import pandas as pd
 
+from utils.ring_buffer import ColumnarRingBuffer
+
 
 def add_live_momentum_features(history):
+    if isinstance(history, ColumnarRingBuffer):
+        return _momentum_from_columns(history.window(5))
+
     df = pd.DataFrame(history[-5:])  # use last 5 candles for recent activity
 
     if len(df) < 2:
@@ -16,4 +21,20 @@ def add_live_momentum_features(history):
         "candle_body": abs(df["close"].iloc[-1] - df["open"].iloc[-1]),
         "volume_surge": df["volume"].iloc[-1] / (df["volume"].mean() + 1e-6),
         
-    }
\ No newline at end of file
+    }
+
+
+def _momentum_from_columns(window):
+    """Same features from zero-copy column views of the last 5 rows."""
+    close, high, low = window["close"], window["high"], window["low"]
+    if len(close) < 2:
+        return {}
+
+    volume = window["volume"]
+    return {
+        "volatility_5": float(high.max() - low.min()),
+        "momentum_5": float(close[-1] - close[0]),
+        "candle_spread": float(high[-1] - low[-1]),
+        "candle_body": float(abs(close[-1] - window["open"][-1])),
+        "volume_surge": float(volume[-1] / (volume.mean() + 1e-6)),
+    }
@@ -0,0 +1,294 @@
+# trading/multi_account.py
+import json
+import os
+
+import numpy as np
+
+from config import MULTI_ACCOUNT
+from trading.exit_engine import MIN_HOLD_SECONDS, TRAILING_EXIT_PCT, has_momentum_decay
+from utils import clock
+
+CONFIG_FIELDS = ("trade_risk_pct", "leverage", "stop_loss_pct", "take_profit_pct", "min_confidence", "max_multiplier", "allow_short")
+REASONS = (None, "trailing_stop", "stop_loss", "take_profit", "momentum_decay")
+
+
+class _PositionBook:
+    """One pair's positions, one slot per account (an account holds at most one position per pair)."""
+
+    FIELDS = {
+        "open": bool, "sign": np.float64, "entry": np.float64, "size": np.float64, "leverage": np.float64,
+        "peak": np.float64, "opened_ms": np.int64, "decay": bool, "confidence": np.float64,
+    }
+
+    def __init__(self, n):
+        for name, dtype in self.FIELDS.items():
+            setattr(self, name, np.zeros(n, dtype=dtype))
+
+    def grow(self, n):
+        for name in self.FIELDS:
+            old = getattr(self, name)
+            if len(old) < n:
+                grown = np.zeros(n, dtype=old.dtype)
+                grown[:len(old)] = old
+                setattr(self, name, grown)
+
+
+class MultiAccountEngine:
+    """
+    Many paper accounts trading the same signal stream.
+
+    Account state and risk config are parallel arrays indexed by account. A
+    decision opens positions for every eligible account with one masked
+    assignment. Eligible means no open position on the pair, confidence at or
+    above the account's minimum, and shorts allowed when the signal is short.
+    A price update runs should_exit_trade's rules (min hold, trailing stop,
+    stop loss, take profit, momentum decay) on every account's position in the
+    pair at once. Closed trades go to columnar chunks, which trades() filters
+    per account.
+
+    PnL is signed by direction. The trailing stop is measured from the entry
+    price, as for the paper wallet, whose peak update_trade_outcomes leaves alone.
+
+    account(), trades() and summary() are this engine's own views (flat risk
+    settings, no trade ids); they are not the frontend's Account/Trade/Config
+    shapes. log_live_account_status writes them to MULTI_ACCOUNT["status_path"].
+    """
+
+    def __init__(self, defaults=None):
+        self.defaults = dict(MULTI_ACCOUNT["defaults"] if defaults is None else defaults)
+        self.ids = []
+        self._index = {}
+        self.capacity = 0
+        self.starting_balance = np.zeros(0)
+        self.balance = np.zeros(0)
+        self.net_pnl = np.zeros(0)
+        self.wins = np.zeros(0, dtype=np.int64)
+        self.losses = np.zeros(0, dtype=np.int64)
+        self.config = {name: np.zeros(0, dtype=bool if name == "allow_short" else np.float64) for name in CONFIG_FIELDS}
+        self._books = {}
+        self._prices = {}
+        self._closed = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add_account(self, account_id, **overrides):
+        if account_id in self._index:
+            raise ValueError(f"Account {account_id!r} already exists")
+        settings = {**self.defaults, **overrides}
+        i = len(self.ids)
+        if i == self.capacity:
+            self._grow(max(16, self.capacity * 2))
+        self.ids.append(account_id)
+        self._index[account_id] = i
+        self.starting_balance[i] = self.balance[i] = settings["starting_balance"]
+        for name in CONFIG_FIELDS:
+            self.config[name][i] = settings[name]
+        return i
+
+    def account_config(self, account_id):
+        i = self._index[account_id]
+        config = {name: self.config[name][i].item() for name in CONFIG_FIELDS}
+        config["starting_balance"] = float(self.starting_balance[i])
+        return config
+
+    def set_account_config(self, account_id, **changes):
+        i = self._index[account_id]
+        unknown = set(changes) - set(CONFIG_FIELDS)
+        if unknown:
+            raise KeyError(f"Unknown account settings: {sorted(unknown)}")
+        for name, value in changes.items():
+            self.config[name][i] = value
+        return self.account_config(account_id)
+
+    def account(self, account_id):
+        i = self._index[account_id]
+        unrealized, open_positions = 0.0, []
+        for pair, book in self._books.items():
+            if i >= len(book.open) or not book.open[i]:
+                continue
+            price = self._prices.get(pair, book.entry[i])
+            pnl = book.size[i] * book.leverage[i] * book.sign[i] * (price / book.entry[i] - 1.0)
+            unrealized += pnl
+            open_positions.append({
+                "pair": pair,
+                "direction": "up" if book.sign[i] > 0 else "down",
+                "entry_price": float(book.entry[i]),
+                "trade_size": float(book.size[i]),
+                "opened_ms": int(book.opened_ms[i]),
+                "unrealized_pnl": round(float(pnl), 2),
+            })
+        wins, losses = int(self.wins[i]), int(self.losses[i])
+        return {
+            "id": account_id,
+            "balance": round(float(self.balance[i]), 2),
+            "net_pnl": round(float(self.net_pnl[i]), 2),
+            "unrealized_pnl": round(unrealized, 2),
+            "equity": round(float(self.balance[i]) + unrealized, 2),
+            "wins": wins,
+            "losses": losses,
+            "win_rate": round(wins / (wins + losses), 4) if wins + losses else 0.0,
+            "open_positions": open_positions,
+        }
+
+    def trades(self, account_id, limit=100):
+        """Most recent closed trades of one account, newest last."""
+        i = self._index[account_id]
+        rows = []
+        for chunk in reversed(self._closed):
+            hits = np.flatnonzero(chunk["account"] == i)
+            for j in reversed(hits):
+                rows.append({
+                    "pair": chunk["pair"],
+                    "direction": "up" if chunk["sign"][j] > 0 else "down",
+                    "entry": float(chunk["entry"][j]),
+                    "exit_price": chunk["exit_price"],
+                    "trade_size": float(chunk["size"][j]),
+                    "pnl": round(float(chunk["pnl"][j]), 2),
+                    "won": bool(chunk["pnl"][j] > 0),
+                    "reason": REASONS[chunk["reason"][j]],
+                    "opened_ms": int(chunk["opened_ms"][j]),
+                    "closed_ms": chunk["closed_ms"],
+                })
+                if len(rows) >= limit:
+                    return rows[::-1]
+        return rows[::-1]
+
+    def summary(self):
+        """Aggregates across all accounts (vectorized; no per-account dicts)."""
+        n = len(self.ids)
+        total = self.wins[:n] + self.losses[:n]
+        return {
+            "accounts": n,
+            "total_balance": round(float(self.balance[:n].sum()), 2),
+            "total_net_pnl": round(float(self.net_pnl[:n].sum()), 2),
+            "profitable_accounts": int((self.net_pnl[:n] > 0).sum()),
+            "open_positions": int(sum(book.open[:n].sum() for book in self._books.values())),
+            "trades": int(total.sum()),
+        }
+
+    def on_signal(self, pair, decision, price, now_ms=None):
+        """Opens a position for every eligible account. Returns how many opened."""
+        n = len(self.ids)
+        if not n:
+            return 0
+        now_ms = clock.now_ms() if now_ms is None else now_ms
+        book = self._book(pair)
+        sign = 1.0 if decision["direction"] == "up" else -1.0
+        confidence = float(decision["confidence"])
+
+        eligible = ~book.open[:n] & (confidence >= self.config["min_confidence"][:n]) & (self.balance[:n] > 0)
+        if sign < 0:
+            eligible &= self.config["allow_short"][:n]
+        idx = np.flatnonzero(eligible)
+        if not len(idx):
+            return 0
+
+        multiplier = np.minimum(decision.get("multiplier", 1.0), self.config["max_multiplier"][idx])
+        book.open[idx] = True
+        book.sign[idx] = sign
+        book.entry[idx] = price
+        book.peak[idx] = price
+        book.size[idx] = self.balance[idx] * self.config["trade_risk_pct"][idx] * multiplier
+        book.leverage[idx] = self.config["leverage"][idx]
+        book.opened_ms[idx] = now_ms
+        book.decay[idx] = bool(has_momentum_decay(decision.get("features") or {}))
+        book.confidence[idx] = confidence
+        self._prices[pair] = price
+        return len(idx)
+
+    def on_price(self, pair, price, now_ms=None):
+        """Closes every position on pair that should_exit_trade would exit at this price. Returns how many closed."""
+        self._prices[pair] = price
+        book = self._books.get(pair)
+        if book is None:
+            return 0
+        idx = np.flatnonzero(book.open[:len(self.ids)])
+        if not len(idx):
+            return 0
+        now_ms = clock.now_ms() if now_ms is None else now_ms
+
+        sign, entry, peak = book.sign[idx], book.entry[idx], book.peak[idx]
+
+        sl = self.config["stop_loss_pct"][idx]
+        tp = self.config["take_profit_pct"][idx]
+        held = now_ms - book.opened_ms[idx] >= MIN_HOLD_SECONDS * 1000
+        reason = np.select(
+            [
+                sign * (peak - price) / peak > TRAILING_EXIT_PCT,
+                sign * (price - entry * (1 - sign * sl)) <= 0,
+                sign * (price - entry * (1 + sign * tp)) >= 0,
+                book.decay[idx],
+            ],
+            [1, 2, 3, 4],
+            0,
+        )
+        reason = np.where(held, reason, 0)
+        exiting = reason > 0
+        if not exiting.any():
+            return 0
+
+        idx, sign, entry, reason = idx[exiting], sign[exiting], entry[exiting], reason[exiting]
+        size = book.size[idx]
+        pnl = size * book.leverage[idx] * sign * (price / entry - 1.0)
+        won = sign * (price - entry) > 0
+
+        self.balance[idx] += pnl
+        self.net_pnl[idx] += pnl
+        self.wins[idx] += won
+        self.losses[idx] += ~won
+        book.open[idx] = False
+
+        self._closed.append({
+            "pair": pair, "exit_price": price, "closed_ms": now_ms,
+            "account": idx, "sign": sign, "entry": entry, "size": size, "pnl": pnl,
+            "reason": reason, "opened_ms": book.opened_ms[idx].copy(),
+        })
+        return len(idx)
+
+    def _book(self, pair):
+        book = self._books.get(pair)
+        if book is None:
+            book = self._books[pair] = _PositionBook(self.capacity)
+        return book
+
+    def _grow(self, capacity):
+        def grown(old):
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            return new
+
+        self.starting_balance = grown(self.starting_balance)
+        self.balance = grown(self.balance)
+        self.net_pnl = grown(self.net_pnl)
+        self.wins = grown(self.wins)
+        self.losses = grown(self.losses)
+        self.config = {name: grown(values) for name, values in self.config.items()}
+        for book in self._books.values():
+            book.grow(capacity)
+        self.capacity = capacity
+
+
+def status(engine):
+    """Summary plus every account, for the status file."""
+    return {"summary": engine.summary(), "accounts": [engine.account(account_id) for account_id in engine.ids]}
+
+
+def load_accounts(path=MULTI_ACCOUNT["accounts_path"], defaults=None):
+    engine = MultiAccountEngine(defaults)
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            for settings in json.load(f):
+                settings = dict(settings)
+                engine.add_account(settings.pop("id"), **settings)
+        print(f"👥 Loaded {len(engine)} paper accounts from {path}")
+    return engine
+
+
+def reset_accounts():
+    """Fresh engine from accounts_path (None when disabled), e.g. for a backtest; live balances and books are dropped."""
+    global multi_accounts
+    multi_accounts = load_accounts() if MULTI_ACCOUNT["enabled"] else None
+
+
+multi_accounts = load_accounts() if MULTI_ACCOUNT["enabled"] else None
@@ -1,18 +1,31 @@
 import hashlib
 import json
 import os
-from pathlib import Path
-import uuid
-from datetime import  datetime, timedelta, timezone
-from collections import deque
+import time
+from datetime import timedelta
 
 from matplotlib import pyplot as plt
 import pandas as pd
-from config import  TRADE_CONFIG
-from utils.logger import LOG_DIR,  make_json_safe
-
-# Simulated wallet state
-paper_trades = deque()
+from config import  MULTI_ACCOUNT, TRADE_CONFIG, WALLET_JOURNAL
+from trading.exit_engine import ExitEngine, MIN_HOLD_SECONDS, TRAILING_EXIT_PCT, has_momentum_decay
+from trading import multi_account
+from trading.portfolio import Portfolio
+from trading.trade_record import TradeRecord
+from trading.trade_store import TradeStore
+from trading.wallet_journal import WalletJournal
+from utils import clock
+from utils.log_writer import log_writer
+from utils.logger import LOG_DIR
+
+TRADE_RESULTS_LOG = os.path.join(LOG_DIR, "trade_results.jsonl")
+
+# Simulated wallet state: open trades indexed by pair, closed trades archived
+paper_trades = TradeStore()
+# Open trades' exit levels and timers, so a price update only re-checks trades that could exit
+exit_engine = ExitEngine()
+# Open positions as arrays, marked to market on every price update
+portfolio = Portfolio()
+PORTFOLIO_SNAPSHOT = "logs/portfolio.json"
 
 account = {
     "starting_balance": 10000.0,
@@ -24,6 +37,70 @@ account = {
     "loss_count": 0,
     "trade_log": []
 }
+# Account fields restored from the wallet journal (trade_log stays in logs/trade_results.jsonl)
+JOURNALED_FIELDS = ("balance", "net_pnl", "win_count", "loss_count")
+
+wallet_journal = WalletJournal(
+    WALLET_JOURNAL["dir"],
+    snapshot_every=WALLET_JOURNAL["snapshot_every"],
+    fsync=WALLET_JOURNAL["fsync"],
+    flush_interval_ms=WALLET_JOURNAL.get("flush_interval_ms", 50),
+) if WALLET_JOURNAL["enabled"] else None
+
+
+def wallet_state():
+    return {
+        "account": {field: account[field] for field in JOURNALED_FIELDS},
+        "open_trades": [trade.to_state() for trade in paper_trades.open_trades()],
+    }
+
+
+def journal_event(kind, **data):
+    if wallet_journal is None:
+        return
+    wallet_journal.record(kind, **data)
+    if wallet_journal.snapshot_due():
+        wallet_journal.snapshot(wallet_state())
+
+
+def restore_wallet():
+    """
+    Rebuilds balance, counters and open trades (with peaks) from the last snapshot plus the journal.
+    Called once at bot startup; importing this module never touches the journal.
+    """
+    if wallet_journal is None:
+        return
+    started = time.perf_counter()
+    state, events = wallet_journal.load()
+    if state is None and not events:
+        return
+
+    open_trades = {}
+    if state is not None:
+        account.update(state["account"])
+        for trade_state in state["open_trades"]:
+            open_trades[trade_state["id"]] = TradeRecord.from_state(trade_state)
+
+    for event in events:
+        if event["type"] == "open":
+            open_trades[event["trade"]["id"]] = TradeRecord.from_state(event["trade"])
+        elif event["type"] == "close":
+            open_trades.pop(event["id"], None)
+            account.update({field: event[field] for field in JOURNALED_FIELDS})
+        elif event["type"] == "peak" and event["id"] in open_trades:  # journals from before peaks went to snapshots only
+            trade = open_trades[event["id"]]
+            trade.peak_price = event["peak_price"]
+            trade.peak_confidence = event["peak_confidence"]
+
+    for trade in sorted(open_trades.values(), key=lambda t: t.opened_ms):
+        paper_trades.add(trade)
+        exit_engine.register(trade)
+        portfolio.add(trade, TRADE_CONFIG.get("leverage", 1))
+    portfolio.mark({}, account["balance"])
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"♻️ Restored wallet: balance ${account['balance']:.2f} | {len(open_trades)} open trades | {len(events)} journal events replayed in {elapsed_ms:.1f}ms")
+
 
 def get_adaptive_prediction_window(confidence):
     if confidence >= 0.9:
@@ -41,12 +118,22 @@ def has_momentum_reversal(entry, current_price, direction):
         return True
     return False
 
+def reset_wallet(starting_balance=10000.0):
+    """Empty in-memory wallet with journaling off, e.g. for a backtest; the live journal files are untouched."""
+    global paper_trades, exit_engine, portfolio, wallet_journal
+    paper_trades = TradeStore()
+    exit_engine = ExitEngine()
+    portfolio = Portfolio()
+    wallet_journal = None
+    account.update(starting_balance=starting_balance, balance=starting_balance, net_pnl=0.0,
+                   win_count=0, loss_count=0, trade_log=[])
+
+
 def simulate_trade(pair, direction, confidence, price, features=None, duration_minutes=15, multiplier=1.0):
     # Prevent duplicate open trades for the same pair
-    for trade in reversed(paper_trades):
-        if trade["pair"] == pair and not trade["evaluated"]:
-            print(f"⚠️ Skipping duplicate trade for {pair} — still open.")
-            return None
+    if paper_trades.has_open(pair):
+        print(f"⚠️ Skipping duplicate trade for {pair} — still open.")
+        return None
 
     # Risk management
     trade_risk_pct = TRADE_CONFIG.get("trade_risk_pct", 0.1)
@@ -54,24 +141,17 @@ def simulate_trade(pair, direction, confidence, price, features=None, duration_m
     adjusted_size = base_size * multiplier
     leverage = TRADE_CONFIG.get("leverage", 1)
 
-    now = datetime.now(timezone.utc)
-    trade = {
-        "id": str(uuid.uuid4()),
-        "pair": pair,
-        "direction": direction,
-        "confidence": float(confidence),
-        "entry_price": price,
-        "trade_size": adjusted_size,
-        "timestamp": now.isoformat(),
-        "check_after": (now + timedelta(minutes=duration_minutes)).isoformat(),
-        "evaluated": False,
-        "status": "open",
-        "duration_minutes": duration_minutes,
-        "features": features or {},
-        "multiplier": multiplier,
-        "peak_price": price,
-        "peak_confidence": float(confidence),
-    }
+    trade = TradeRecord(
+        pair=pair,
+        direction=direction,
+        confidence=confidence,
+        entry_price=price,
+        trade_size=adjusted_size,
+        opened_ms=clock.now_ms(),
+        duration_minutes=duration_minutes,
+        multiplier=multiplier,
+        features=features,
+    )
 
     log_prediction(
         pair=pair,
@@ -90,25 +170,33 @@ def simulate_trade(pair, direction, confidence, price, features=None, duration_m
     print(f"⚡️ Effective position: ${adjusted_size * leverage:.2f} (Leverage: {leverage}x | Multiplier: {multiplier}x)")
     print(f"🧪 Simulated {direction.upper()} trade for {pair} at ${price:.2f} | Hold: {duration_minutes}m | Size: ${adjusted_size:.2f}")    
 
-    paper_trades.append(trade)
+    paper_trades.add(trade)
+    exit_engine.register(trade)
+    portfolio.add(trade, leverage)
+    journal_event("open", trade=trade.to_state())
     return trade
 
 
 
 def update_trade_outcomes(current_prices, pair, PassedSignal):
-    now = datetime.now(timezone.utc)
-
-    
-    for trade in list(paper_trades):
-        
-        if trade["evaluated"] or trade["pair"] != pair:
-            continue
-
-        current_price = current_prices.get(pair)
-        if current_price is None:
+    current_price = current_prices.get(pair)
+    if current_price is None:
+        return
+    portfolio.mark({pair: current_price}, account["balance"])
+    if multi_account.multi_accounts is not None:
+        multi_account.multi_accounts.on_price(pair, current_price)
+    if PassedSignal:
+        open_trades = paper_trades.open_for(pair)
+        if open_trades:
+            entry = open_trades[0]["entry_price"]
+            print(f"⚠️ Trade {open_trades[0]['id']} Start: {entry} Current:{current_price} Profit: {entry - current_price}")
+        return
+
+    now = clock.now()
+    now_ms = int(now.timestamp() * 1000)
+    for trade in exit_engine.candidates(pair, current_price, now_ms / 1000):
+        if trade["evaluated"]:
             continue
-        
-        
 
         entry = trade["entry_price"]
         direction = trade["direction"]
@@ -121,11 +209,7 @@ def update_trade_outcomes(current_prices, pair, PassedSignal):
         sl_price = entry * (1 - sl_pct) if direction == "up" else entry * (1 + sl_pct)
         tp_price = entry * (1 + tp_pct) if direction == "up" else entry * (1 - tp_pct)
 
-        entry_time = datetime.fromisoformat(trade["timestamp"])
-        time_held = now - entry_time
-        if PassedSignal:
-            print(f"⚠️ Trade {trade['id']} Start: {entry} Current:{current_price} Profit: {entry - current_price}")
-            return
+        time_held = timedelta(milliseconds=now_ms - trade.opened_ms)
 
         # ❌ Check for early exit (e.g., stop loss, trailing stop, etc.)
         early_exit, reason = should_exit_trade(trade, current_price, time_held, sl_price, tp_price)
@@ -138,13 +222,10 @@ def update_trade_outcomes(current_prices, pair, PassedSignal):
             print(f"🔁 Holding {pair} open — confidence still high and no valid exit reason.")
             continue  # don't close
 
-        # Otherwise: evaluate trade
-        won = (
-            (direction == "up" and current_price > entry) or
-            (direction == "down" and current_price < entry)
-        )
-
-        change = (current_price - entry) / entry
+        # Otherwise: evaluate trade. Signed by direction, the same return Portfolio.mark carries while it is open
+        sign = 1.0 if direction == "up" else -1.0
+        change = sign * (current_price / entry - 1.0)
+        won = change > 0
         pnl = trade_size * change * leverage
 
         account["balance"] += pnl
@@ -174,6 +255,12 @@ def update_trade_outcomes(current_prices, pair, PassedSignal):
 
         trade["evaluated"] = True
         trade["status"] = "closed"
+        paper_trades.close(trade)
+        exit_engine.remove(trade)
+        portfolio.remove(trade.id)
+        portfolio.mark({}, account["balance"])
+        journal_event("close", id=trade.id, exit_price=current_price, reason=trade_result["reason"],
+                      **{field: account[field] for field in JOURNALED_FIELDS})
         account["trade_log"].append(trade_result)
 
         export_account_snapshot()
@@ -198,13 +285,9 @@ def should_soft_timeout(trade, confidence, time_held):
 
 
 def should_exit_trade(trade, current_price, time_held, sl_price, tp_price):
-    min_hold = timedelta(minutes=5)
+    min_hold = timedelta(seconds=MIN_HOLD_SECONDS)
     direction = trade["direction"]
     features = trade.get("features", {})
-    rsi_reversal = features.get("rsi_reversal", False)
-    macd_hist = features.get("macd_histogram", 0)
-    macd_dir = features.get("macd_direction_3", 0)
-    volume_surge = features.get("volume_surge", 1)
 
     trailing_price = trade.get("peak_price", current_price)
 
@@ -215,7 +298,7 @@ def should_exit_trade(trade, current_price, time_held, sl_price, tp_price):
     if time_held < min_hold:
         return False, "still_valid"
 
-    if price_drop_pct > 0.01:
+    if price_drop_pct > TRAILING_EXIT_PCT:
         return True, "trailing_stop"
     if direction == "up" and current_price <= sl_price:
         return True, "stop_loss"
@@ -225,7 +308,7 @@ def should_exit_trade(trade, current_price, time_held, sl_price, tp_price):
         return True, "stop_loss"
     if direction == "down" and current_price <= tp_price:
         return True, "take_profit"
-    if rsi_reversal or (macd_hist < 0 and macd_dir < 0) or volume_surge < 0.8:
+    if has_momentum_decay(features):
         return True, "momentum_decay"
 
     return False, "still_valid"
@@ -236,6 +319,15 @@ def check_trailing_logic(trade, current_price, confidence, direction):
     Updates peak values stored in the trade object.
     Returns (should_exit: bool, reason: str)
     """
+    peaks = (trade.get("peak_price"), trade.get("peak_confidence"))
+    result = _check_trailing_logic(trade, current_price, confidence, direction)
+    if trade["peak_price"] != peaks[0]:
+        exit_engine.reprice(trade)
+    # Peaks are persisted with the next snapshot, not journaled tick by tick
+    return result
+
+
+def _check_trailing_logic(trade, current_price, confidence, direction):
     trail_stop_pct = TRADE_CONFIG.get("trailing_stop_pct", 0.01)
     trail_conf_pct = TRADE_CONFIG.get("trailing_confidence_pct", 0.2)
 
@@ -286,20 +378,11 @@ def plot_trade_history(pair, price_history, trades):
 
 
 def log_full_trade(trade_data, stage="open", path="logs/trade_history.jsonl"):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    safe_data = make_json_safe(trade_data)
-    with open(path, "a") as f:
-        f.write(json.dumps(safe_data) + "\n")
+    log_writer.append(path, trade_data)
         
 
 def log_trade_result(trade_result: dict):
-    log_path = Path(LOG_DIR) / "trade_results.jsonl"
-    log_path.parent.mkdir(parents=True, exist_ok=True)
-
-    safe_result = make_json_safe(trade_result)
-
-    with open(log_path, "a") as f:
-        f.write(json.dumps(safe_result) + "\n")
+    log_writer.append(TRADE_RESULTS_LOG, trade_result)
 
 
 _last_snapshot_hash = None
@@ -308,7 +391,7 @@ _last_logged_minute = None
 def log_live_account_status(current_prices):
     global _last_snapshot_hash, _last_logged_minute
 
-    now = datetime.now(timezone.utc).replace(second=0, microsecond=0)  # ⏱️ round to nearest minute
+    now = clock.now().replace(second=0, microsecond=0)  # ⏱️ round to nearest minute
 
     if _last_logged_minute == now:
         return  # already logged for this minute
@@ -324,9 +407,15 @@ def log_live_account_status(current_prices):
         snapshot[f"price_{pair.replace('/', '_')}"] = price
 
     # Add open trades info
-    open_trades = [t for t in paper_trades if not t["evaluated"]]
-    snapshot["open_trades"] = len(open_trades)
-    snapshot["risk_exposure"] = round(sum(t["trade_size"] for t in open_trades), 2)
+    snapshot["open_trades"] = paper_trades.open_count
+    snapshot["risk_exposure"] = round(paper_trades.risk_exposure, 2)
+
+    # Mark-to-market aggregates; the full per-pair breakdown goes to PORTFOLIO_SNAPSHOT
+    portfolio.mark(current_prices, account["balance"])
+    metrics = portfolio.metrics()
+    snapshot["unrealized_pnl"] = metrics["unrealized_pnl"]
+    snapshot["equity"] = metrics["equity"]
+    snapshot["max_drawdown"] = metrics["max_drawdown"]
 
     # Hash the snapshot to check for changes
     snapshot_str = json.dumps(snapshot, sort_keys=True)
@@ -336,11 +425,11 @@ def log_live_account_status(current_prices):
         return  # nothing changed, skip logging
 
     # ✅ Log it
-    log_path = "logs/live_account.jsonl"
-    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    log_writer.append("logs/live_account.jsonl", snapshot_str)
 
-    with open(log_path, "a") as f:
-        f.write(snapshot_str + "\n")
+    log_writer.replace(PORTFOLIO_SNAPSHOT, {"timestamp": snapshot["timestamp"], **metrics}, indent=2)
+    if multi_account.multi_accounts is not None:
+        log_writer.replace(MULTI_ACCOUNT["status_path"], {"timestamp": snapshot["timestamp"], **multi_account.status(multi_account.multi_accounts)})
 
     _last_snapshot_hash = snapshot_hash
     _last_logged_minute = now
@@ -349,7 +438,7 @@ _last_snapshot_time = {}
 
 def log_live_account(current_prices):
     entry = {
-        "timestamp": datetime.now(timezone.utc),
+        "timestamp": clock.now(),
         "balance": account["balance"],
         "net_pnl": account["net_pnl"]
     }
@@ -357,32 +446,27 @@ def log_live_account(current_prices):
         token = pair.replace("/", "_")
         entry[f"price_{token}"] = price
 
-    with open("logs/live_account.jsonl", "a") as f:
-        f.write(json.dumps(entry) + "\n")
+    log_writer.append("logs/live_account.jsonl", entry)
         
 def log_live_snapshot(pair=None, price=None, interval_seconds=60):
     global _last_snapshot_time
-    now = datetime.utcnow()
+    now = clock.now()
     last = _last_snapshot_time.get(pair)
     if last and (now - last).total_seconds() < interval_seconds:
         return  # Skip until time threshold passes
     _last_snapshot_time[pair] = now
     snapshot = {
-        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "timestamp": clock.now().isoformat(),
         "balance": round(account["balance"], 2),
         "net_pnl": round(account["net_pnl"], 2),
-        "open_trades": len([t for t in paper_trades if not t["evaluated"]]),
+        "open_trades": paper_trades.open_count,
         "win_count": account["win_count"],
         "loss_count": account["loss_count"],
         "pair": pair,
         "current_price": price,
     }
 
-    log_path = "logs/live_account_snapshots.jsonl"
-    os.makedirs(os.path.dirname(log_path), exist_ok=True)
-
-    with open(log_path, "a") as f:
-        f.write(json.dumps(snapshot) + "\n")
+    log_writer.append("logs/live_account_snapshots.jsonl", snapshot)
 
 
 def export_trades_to_csv(path="logs/paper_trades.csv"):
@@ -400,14 +484,11 @@ def export_account_snapshot(path="logs/account_snapshot.json"):
             account["win_count"] / (account["win_count"] + account["loss_count"]), 4
         ) if (account["win_count"] + account["loss_count"]) > 0 else 0.0
     }
-    
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w") as f:
-        json.dump(snapshot, f, indent=2)
+    log_writer.replace(path, snapshot, indent=2)
             
 def log_prediction(pair, direction, confidence, success, price=None, features=None, reason=None, exit_price=None, duration="15min", pnl=None, change=None):
     log_entry = {
-        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "timestamp": clock.now().isoformat(),
         "pair": pair,
         "direction": direction,
         "confidence": float(confidence),
@@ -421,14 +502,9 @@ def log_prediction(pair, direction, confidence, success, price=None, features=No
         "change": change
     }
 
-    log_path = "logs/prediction_history.jsonl"
-    os.makedirs(os.path.dirname(log_path), exist_ok=True)
-
-    with open(log_path, "a") as f:
-        safe_entry = make_json_safe(log_entry)
-        f.write(json.dumps(safe_entry) + "\n")
+    log_writer.append("logs/prediction_history.jsonl", log_entry)
         
 def export_open_trades(path="logs/open_trades.json"):
-    open_trades = [t for t in paper_trades if not t["evaluated"]]
+    open_trades = [t.to_dict() for t in paper_trades.open_trades()]
     with open(path, "w") as f:
-        json.dump(open_trades, f, indent=2, default=str)
\ No newline at end of file
+        json.dump(open_trades, f, indent=2, default=str)
@@ -0,0 +1,121 @@
+# trading/portfolio.py
+import numpy as np
+
+from trading.trade_record import PAIR_NAMES, intern_pair
+
+
+class Portfolio:
+    """
+    Open positions as parallel arrays (entry price, size, direction sign, leverage,
+    pair id), marked to market in one vectorized step.
+
+    mark() takes the latest price per pair and recomputes unrealized PnL, exposure
+    per pair (via bincount over pair ids), equity, and the running peak equity
+    and max drawdown. Closing a position swaps the last row into its slot, so
+    adds and removes are O(1) and the arrays stay dense.
+    """
+
+    def __init__(self, capacity=64):
+        self._entry = np.zeros(capacity)
+        self._size = np.zeros(capacity)
+        self._sign = np.zeros(capacity)
+        self._leverage = np.zeros(capacity)
+        self._pair = np.zeros(capacity, dtype=np.int64)
+        self._ids = []
+        self._slots = {}
+        self._prices = np.full(max(len(PAIR_NAMES), 1), np.nan)
+        self.balance = 0.0
+        self.unrealized = 0.0
+        self.equity = 0.0
+        self.peak_equity = 0.0
+        self.max_drawdown = 0.0
+        self._unrealized_by_pair = np.zeros(0)
+        self._exposure_by_pair = np.zeros(0)
+        self._net_by_pair = np.zeros(0)
+        self._count_by_pair = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, trade, leverage=1):
+        n = len(self._ids)
+        if n == len(self._entry):
+            for name in ("_entry", "_size", "_sign", "_leverage", "_pair"):
+                old = getattr(self, name)
+                grown = np.zeros(len(old) * 2, dtype=old.dtype)
+                grown[:n] = old
+                setattr(self, name, grown)
+        self._entry[n] = trade["entry_price"]
+        self._size[n] = trade["trade_size"]
+        self._sign[n] = 1.0 if trade["direction"] == "up" else -1.0
+        self._leverage[n] = leverage
+        self._pair[n] = trade.pair_id if hasattr(trade, "pair_id") else intern_pair(trade["pair"])
+        self._slots[trade["id"]] = n
+        self._ids.append(trade["id"])
+
+    def remove(self, trade_id):
+        slot = self._slots.pop(trade_id, None)
+        if slot is None:
+            return
+        last = len(self._ids) - 1
+        if slot != last:
+            for array in (self._entry, self._size, self._sign, self._leverage, self._pair):
+                array[slot] = array[last]
+            moved = self._ids[last]
+            self._ids[slot] = moved
+            self._slots[moved] = slot
+        self._ids.pop()
+
+    def mark(self, prices, balance):
+        """Marks every open position at the latest known price of its pair; returns equity."""
+        if len(self._prices) < len(PAIR_NAMES):
+            grown = np.full(len(PAIR_NAMES), np.nan)
+            grown[:len(self._prices)] = self._prices
+            self._prices = grown
+        for pair, price in prices.items():
+            if price is not None:
+                self._prices[intern_pair(pair)] = price
+
+        n = len(self._ids)
+        pairs = self._pair[:n]
+        notional = self._size[:n] * self._leverage[:n]
+        price = self._prices[pairs]
+        # A pair with no price yet is carried at entry (zero unrealized PnL)
+        change = np.where(np.isnan(price), 0.0, price / self._entry[:n] - 1.0)
+        pnl = notional * self._sign[:n] * change
+
+        bins = len(self._prices)
+        self._unrealized_by_pair = np.bincount(pairs, weights=pnl, minlength=bins)
+        self._exposure_by_pair = np.bincount(pairs, weights=notional, minlength=bins)
+        self._net_by_pair = np.bincount(pairs, weights=notional * self._sign[:n], minlength=bins)
+        self._count_by_pair = np.bincount(pairs, minlength=bins)
+
+        self.balance = balance
+        self.unrealized = float(pnl.sum())
+        self.equity = balance + self.unrealized
+        self.peak_equity = max(self.peak_equity, self.equity)
+        if self.peak_equity > 0:
+            self.max_drawdown = max(self.max_drawdown, (self.peak_equity - self.equity) / self.peak_equity)
+        return self.equity
+
+    def metrics(self):
+        by_pair = {}
+        for pair_id in np.flatnonzero(self._count_by_pair):
+            by_pair[PAIR_NAMES[pair_id]] = {
+                "open_trades": int(self._count_by_pair[pair_id]),
+                "unrealized_pnl": round(float(self._unrealized_by_pair[pair_id]), 2),
+                "exposure": round(float(self._exposure_by_pair[pair_id]), 2),
+                "net_exposure": round(float(self._net_by_pair[pair_id]), 2),
+            }
+        drawdown = (self.peak_equity - self.equity) / self.peak_equity if self.peak_equity > 0 else 0.0
+        return {
+            "balance": round(self.balance, 2),
+            "unrealized_pnl": round(self.unrealized, 2),
+            "equity": round(self.equity, 2),
+            "peak_equity": round(self.peak_equity, 2),
+            "drawdown": round(drawdown, 4),
+            "max_drawdown": round(self.max_drawdown, 4),
+            "exposure": round(float(self._exposure_by_pair.sum()), 2),
+            "open_trades": len(self._ids),
+            "by_pair": by_pair,
+        }
@@ -0,0 +1,123 @@
+# trading/rules.py
+"""
+Compiles the declarative STRATEGY_RULES into two forms with the same semantics:
+
+    rule_set.passes(features, horizon)    -> bool, stops at the first failing rule
+    rule_set.failures(features, horizon)  -> names of every failing rule
+    rule_set.mask(cols, horizon, n)       -> bool[N], True where the filter passes
+
+cols is one horizon of the trading/strategy_batch column layout. Failing rules
+are counted per rule instead of being printed.
+"""
+import operator
+from collections import Counter
+
+import numpy as np
+
+from config import STRATEGY_RULES
+
+OPS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge, "==": operator.eq, "!=": operator.ne}
+
+
+def column_get(cols, name, default, n):
+    """Vectorized features.get(name, default); a None default becomes NaN so comparisons never fire."""
+    default = np.nan if default is None else default
+    values = cols["features"].get(name)
+    if values is None:
+        return np.full(n, default, dtype=np.float64)
+    missing = cols.get("missing", {}).get(name)
+    if missing is None or not missing.any():
+        return values
+    return np.where(missing, default, values)
+
+
+def _compile_value(spec):
+    """Returns (scalar(features, horizon, params), vector(cols, horizon, n, params)) for a right-hand side."""
+    if not isinstance(spec, dict):
+        return (lambda features, horizon, params: spec), (lambda cols, horizon, n, params: spec)
+
+    if "feature" in spec:
+        name, default, offset = spec["feature"], spec.get("default"), spec.get("offset", 0)
+
+        def scalar(features, horizon, params):
+            value = features.get(name, default)
+            return None if value is None else value + offset
+
+        def vector(cols, horizon, n, params):
+            return column_get(cols, name, default, n) + offset
+        return scalar, vector
+
+    table, default, param = spec["by_horizon"], spec.get("default"), spec.get("param")
+
+    def lookup(horizon, params):
+        if params and param in params:
+            return params[param]
+        return table.get(horizon, default)
+    return (lambda features, horizon, params: lookup(horizon, params)), (lambda cols, horizon, n, params: lookup(horizon, params))
+
+
+def _compile_condition(spec):
+    if "all" in spec:
+        parts = [_compile_condition(part) for part in spec["all"]]
+
+        def scalar(features, horizon, params):
+            return all(check(features, horizon, params) for check, _ in parts)
+
+        def vector(cols, horizon, n, params):
+            fired = np.ones(n, dtype=bool)
+            for _, check in parts:
+                fired &= check(cols, horizon, n, params)
+            return fired
+        return scalar, vector
+
+    name, default, op = spec["feature"], spec.get("default"), OPS[spec["op"]]
+    value_scalar, value_vector = _compile_value(spec["value"])
+
+    def scalar(features, horizon, params):
+        left = features.get(name, default)
+        if left is None:
+            return False
+        right = value_scalar(features, horizon, params)
+        return right is not None and op(left, right)
+
+    def vector(cols, horizon, n, params):
+        return np.asarray(op(column_get(cols, name, default, n), value_vector(cols, horizon, n, params)), dtype=bool)
+    return scalar, vector
+
+
+class RuleSet:
+    def __init__(self, name, specs):
+        self.name = name
+        self.rules = [(spec["name"], *_compile_condition(spec)) for spec in specs]
+        self.failure_counts = Counter()
+
+    def passes(self, features, horizon=None, params=None):
+        for rule, fired, _ in self.rules:
+            if fired(features, horizon, params):
+                self.failure_counts[rule] += 1
+                return False
+        return True
+
+    def failures(self, features, horizon=None, params=None):
+        failed = [rule for rule, fired, _ in self.rules if fired(features, horizon, params)]
+        self.failure_counts.update(failed)
+        return failed
+
+    def mask(self, cols, horizon, n, params=None):
+        ok = np.ones(n, dtype=bool)
+        for _, _, fired in self.rules:
+            ok &= ~fired(cols, horizon, n, params)
+        return ok
+
+
+RULES = {name: RuleSet(name, specs) for name, specs in STRATEGY_RULES.items()}
+
+
+def rule_failure_counts():
+    """{rule set: {rule: times it blocked a signal}}, most frequent first."""
+    return {name: dict(rule_set.failure_counts.most_common()) for name, rule_set in RULES.items()}
+
+
+def reset_rule_failure_counts():
+    for rule_set in RULES.values():
+        rule_set.failure_counts.clear()
@@ -2,10 +2,15 @@ import math
 
 import numpy as np
 from utils.logger import log_confidence
-from config import STRATEGY_CONFIG, HORIZON_WINDOWS, MIN_TREND
+from config import STRATEGY_CONFIG, HORIZON_WINDOWS, DOJI_THRESHOLDS
+from trading.rules import RULES
 
 from datetime import timedelta
 
+BASE_FILTERS = RULES["base_filters"]
+MACD_LONG = RULES["macd_long"]
+SHORT_SETUP = RULES["short_setup"]
+
 
 
 
@@ -166,60 +171,19 @@ def check_singals_print_prediction_to_terminal( token, low_confidences, high_con
     return False
 
 def doji_threshold_for(horizon):
-    return {
-        "1m": 5,
-        "15m": 4,
-        "1h": 3,
-        "1d": 2,
-    }.get(horizon, 4)
+    return DOJI_THRESHOLDS.get(horizon, 4)
 
 def base_filters(features, horizon="1m"):
-    failures = []
-
-    doji_count = features.get("doji_count", 0)
-    trend_strength = features.get("trend_strength_5", 1)
-    noise_ratio = features.get("noise_ratio", 0)
-
-    # Smarter doji filter: Only fail if both doji_count is high AND trend is weak
-    if doji_count > doji_threshold_for(horizon) and trend_strength < MIN_TREND.get(horizon, 0.4):
-        failures.append(f"high doji_count: {doji_count}, weak trend: {trend_strength}")
-
-    if noise_ratio > 0.75:
-        failures.append(f"high noise ratio: {noise_ratio}")
-
-    if trend_strength < MIN_TREND.get(horizon, 0.4):
-        failures.append(f"weak trend: {trend_strength}")
-
-    if failures:
-        return False, failures
-    return True, []
+    # Rules live in config.STRATEGY_RULES["base_filters"]; failures are the names of the rules that fired
+    failures = BASE_FILTERS.failures(features, horizon)
+    return not failures, failures
 
 
 def validate_macd_long(features):
     # Softer version of MACD long validation
-    if features.get("rsi") is not None and features.get("rsi") < 48:
-        return False
-    if features.get("macd_histogram", -1) < -0.01:
-        return False
-    if features.get("macd_direction_3", -1) < 0:
-        return False
-    if features.get("volume_surge", 0) < 0.5:
-        return False
-    return True
+    return MACD_LONG.passes(features)
 
 
 def validate_short_setup(features):
     # Softer version of short filter
-    if features.get("rsi") is not None and features.get("rsi") > 55:
-        return False
-    if features.get("macd_histogram", 0) > 0.01:
-        return False
-    if features.get("ema_20", 0) >= features.get("ema_20_prev", 0) + 0.1:
-        return False
-    if features.get("sma_20", 0) >= features.get("sma_20_prev", 0) + 0.1:
-        return False
-    if features.get("momentum_5", 0) > -0.0005:
-        return False
-    if features.get("bearish_count_5", 0) < 2:
-        return False
-    return True
+    return SHORT_SETUP.passes(features)
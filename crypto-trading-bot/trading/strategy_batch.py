@@ -0,0 +1,180 @@
+# trading/strategy_batch.py
+"""
+Columnar version of trading/strategy.evaluate_multi_signal for backtests.
+
+Input is one entry per horizon, each holding aligned arrays over N timestamps:
+
+    columns["15m"] = {
+        "present":    bool[N]     # prediction and features both available (non-empty)
+        "confidence": float[N]
+        "direction":  object[N]   # "up" / "down" / None
+        "features":   {name: float[N]}
+        "missing":    {name: bool[N]}   # key absent (or None) in the feature dict
+    }
+
+horizon_columns() builds that from per-row dicts. evaluate_multi_signal_batch
+returns a decision per timestamp that matches the scalar function row for row.
+"""
+import numpy as np
+
+from config import STRATEGY_CONFIG
+from trading.rules import column_get
+from trading.strategy import BASE_FILTERS, MACD_LONG, SHORT_SETUP
+
+HORIZON_ORDER = ["1m", "15m", "1h", "1d"]
+DEFAULT_THRESHOLDS = {"1m": 0.75, "15m": 0.7, "1h": 0.7, "1d": 0.65}
+BASE_MINUTES = {"1m": 5, "15m": 15, "1h": 60, "1d": 240}
+
+
+def horizon_columns(predictions, features, names=None):
+    """
+    predictions / features: lists of length N holding the per-row dicts of one
+    horizon (None or {} when the horizon had nothing at that timestamp).
+    """
+    n = len(predictions)
+    if names is None:
+        names = sorted({k for f in features if f for k in f})
+
+    present = np.array([bool(p) and bool(f) for p, f in zip(predictions, features)], dtype=bool)
+    confidence = np.array([(p or {}).get("confidence", 0) for p in predictions], dtype=np.float64)
+    direction = np.array([(p or {}).get("direction") for p in predictions], dtype=object)
+
+    values = {name: np.full(n, np.nan) for name in names}
+    missing = {name: np.ones(n, dtype=bool) for name in names}
+    for i, f in enumerate(features):
+        if not f:
+            continue
+        for name, value in f.items():
+            if value is not None and name in values:
+                values[name][i] = value
+                missing[name][i] = False
+
+    return {"present": present, "confidence": confidence, "direction": direction,
+            "features": values, "missing": missing}
+
+
+def base_filters_mask(cols, horizon, n, min_trend=None, doji_threshold=None):
+    """True where trading/strategy.base_filters would pass; min_trend / doji_threshold override the config tables."""
+    params = {}
+    if min_trend is not None:
+        params["min_trend"] = min_trend
+    if doji_threshold is not None:
+        params["doji_threshold"] = doji_threshold
+    return BASE_FILTERS.mask(cols, horizon, n, params)
+
+
+def validate_macd_long_mask(cols, n):
+    return MACD_LONG.mask(cols, None, n)
+
+
+def validate_short_setup_mask(cols, n):
+    return SHORT_SETUP.mask(cols, None, n)
+
+
+def hold_duration_array(horizon, confidence, cols, n):
+    """Vectorized calculate_hold_duration, same operation order so floats match exactly."""
+    minutes = np.full(n, BASE_MINUTES.get(horizon, 15), dtype=np.float64)
+
+    minutes = np.where(confidence >= 0.95, minutes * 2,
+              np.where(confidence >= 0.9, minutes * 1.3,
+              np.where(confidence >= 0.85, minutes * 1.15,
+              np.where(confidence < 0.75, minutes * 0.75, minutes))))
+
+    trend = column_get(cols, "trend_strength_5", 1, n)
+    minutes = np.where(trend > 1.5, minutes * 1.3, np.where(trend < 0.5, minutes * 0.7, minutes))
+
+    macd_hist = column_get(cols, "macd_histogram", 0, n)
+    macd_dir = column_get(cols, "macd_direction_3", 0, n)
+    minutes = np.where((macd_dir > 0) & (macd_hist > 0), minutes * 1.2,
+              np.where((macd_dir < 0) | (macd_hist < 0), minutes * 0.8, minutes))
+
+    volume_surge = column_get(cols, "volume_surge", 1, n)
+    minutes = np.where(volume_surge > 2, minutes * 1.2, np.where(volume_surge < 1, minutes * 0.8, minutes))
+
+    return np.trunc(np.maximum(3, np.minimum(minutes, 240))).astype(np.int64)
+
+
+def evaluate_multi_signal_batch(token, columns, thresholds=None, base_filter_params=None):
+    """
+    Returns a dict of arrays over N timestamps:
+        signal (bool), direction, horizon (object, None without a signal),
+        confidence (15m confidence, as in the scalar result), duration (int, 0
+        without a signal), multiplier (float, NaN without a signal)
+
+    thresholds overrides the token's confidence thresholds. The live function
+    only prints base_filters failures; passing base_filter_params
+    ({horizon: (min_trend, doji_threshold)}) also makes them break the stack,
+    which is what a parameter sweep over MIN_TREND/doji thresholds needs.
+    """
+    horizons = [h for h in HORIZON_ORDER if h in columns]
+    n = len(next(iter(columns.values()))["present"]) if columns else 0
+    if thresholds is None:
+        thresholds = STRATEGY_CONFIG.get(token.upper(), {}).get("confidence_thresholds", DEFAULT_THRESHOLDS)
+
+    alive = np.ones(n, dtype=bool)
+    last_direction = np.full(n, None, dtype=object)
+    best = np.full(n, -1, dtype=np.int64)
+    best_direction = np.full(n, None, dtype=object)
+    high_count = np.zeros(n, dtype=np.int64)
+    high_sum = np.zeros(n, dtype=np.float64)
+    durations = []
+
+    for k, horizon in enumerate(horizons):
+        cols = columns[horizon]
+        present = cols["present"]
+        confidence = cols["confidence"]
+        direction = cols["direction"]
+        threshold = thresholds.get(horizon, 0.75)
+
+        high = present & (confidence >= threshold)
+        high_count += high
+        high_sum += np.where(high, confidence, 0.0)
+
+        active = alive & present
+        mismatch = active & (last_direction != None) & (direction != last_direction)  # noqa: E711
+
+        is_up = direction == "up"
+        long_branch = is_up | (column_get(cols, "macd_cross", np.nan, n) == 1)
+        short_branch = ~long_branch & (direction == "down")
+        valid = high & (
+            (long_branch & validate_macd_long_mask(cols, n))
+            | (short_branch & validate_short_setup_mask(cols, n))
+        )
+        if base_filter_params and horizon in base_filter_params:
+            min_trend, doji_threshold = base_filter_params[horizon]
+            valid &= base_filters_mask(cols, horizon, n, min_trend, doji_threshold)
+
+        ok = active & ~mismatch & valid
+        alive &= ~(active & ~ok)
+        best = np.where(ok, k, best)
+        last_direction = np.where(ok, direction, last_direction)
+        best_direction = np.where(ok, direction, best_direction)
+        durations.append(hold_duration_array(horizon, confidence, cols, n))
+
+    signal = best >= 0
+    duration = np.zeros(n, dtype=np.int64)
+    horizon_out = np.full(n, None, dtype=object)
+    for k, horizon in enumerate(horizons):
+        chosen = best == k
+        duration[chosen] = durations[k][chosen]
+        horizon_out[chosen] = horizon
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg_conf = high_sum / high_count
+    multiplier = np.select(
+        [(high_count >= 4) & (avg_conf >= 0.9), (high_count >= 3) & (avg_conf >= 0.85), (high_count >= 2) & (avg_conf >= 0.8)],
+        [3.0, 2.0, 1.5],
+        1.0,
+    )
+    multiplier = np.where(signal, multiplier, np.nan)
+
+    confidence_15m = columns["15m"]["confidence"] if "15m" in columns else np.zeros(n)
+
+    return {
+        "signal": signal,
+        "direction": np.where(signal, best_direction, None),
+        "horizon": horizon_out,
+        "confidence": np.where(signal, confidence_15m, np.nan),
+        "duration": duration,
+        "multiplier": multiplier,
+    }
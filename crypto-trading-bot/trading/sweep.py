@@ -0,0 +1,310 @@
+# trading/sweep.py
+"""
+Parallel parameter sweep over the multi-horizon strategy.
+
+The historical features and logged predictions are loaded once, packed into a
+single shared-memory block, and every worker of the process pool attaches to it
+in its initializer. Each candidate only re-runs evaluate_multi_signal_batch and
+the trade simulation.
+
+    python -m trading.sweep BTC [--predictions logs/predictions/BTC_predictions.csv]
+                                [--random 500] [--workers 8] [--out logs/sweep_BTC.csv]
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from config import FEATURE_DIR, MIN_TREND, SWEEP_GRID
+from features.bar_builder import BAR_MS
+from trading.strategy import doji_threshold_for
+from trading.strategy_batch import HORIZON_ORDER, evaluate_multi_signal_batch
+from utils.ring_buffer import to_epoch_ms
+
+DIRECTION_CODES = {"up": 1, "down": -1}
+PRICE_COLUMNS = ("close", "high", "low")
+
+
+# --- shared memory --------------------------------------------------------
+
+class SharedArrays:
+    """Named numpy arrays packed into one SharedMemory block."""
+
+    def __init__(self, arrays):
+        self.layout = []
+        offset = 0
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            offset = (offset + 7) // 8 * 8
+            self.layout.append((name, array.dtype.str, array.shape, offset))
+            offset += array.nbytes
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for (name, _, _, start), array in zip(self.layout, arrays.values()):
+            view = np.ndarray(array.shape, dtype=array.dtype, buffer=self.shm.buf, offset=start)
+            view[...] = array
+
+    @property
+    def spec(self):
+        return self.shm.name, self.layout
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def attach_shared(spec):
+    name, layout = spec
+    shm = shared_memory.SharedMemory(name=name)
+    arrays = {
+        key: np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+        for key, dtype, shape, offset in layout
+    }
+    return shm, arrays
+
+
+# --- data loading ---------------------------------------------------------
+
+def load_feature_rows(token, path=None):
+    path = path or os.path.join(FEATURE_DIR, f"{token.upper()}_features.jsonl")
+    with open(path, "r") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    rows.sort(key=lambda r: to_epoch_ms(r["timestamp"]))
+    return rows
+
+
+def load_prediction_log(path):
+    """
+    Prediction log rows as a DataFrame with timestamp (epoch ms), frame,
+    direction and confidence. Reads the CSV log (timestamp, token, value,
+    threshold, direction[, frame]) or JSONL with the same field names. The logged
+    value may be a probability or a confidence; max(v, 1 - v) is the confidence
+    either way.
+    """
+    if path.endswith(".jsonl"):
+        df = pd.read_json(path, lines=True)
+        value = df["confidence"] if "confidence" in df else df["probability"]
+    else:
+        df = pd.read_csv(path, header=None)
+        df.columns = ["timestamp", "token", "value", "threshold", "direction", "frame"][:len(df.columns)]
+        value = df["value"]
+    if "frame" not in df:
+        df["frame"] = "1m"
+    value = value.astype(float)
+    return pd.DataFrame({
+        "timestamp": [to_epoch_ms(ts) for ts in df["timestamp"]],
+        "frame": df["frame"].astype(str),
+        "direction": df["direction"],
+        "confidence": np.maximum(value, 1 - value),
+    })
+
+
+def build_dataset(feature_rows, predictions):
+    """
+    Aligns predictions to the 1m feature rows (latest prediction at or before
+    each row, per frame, and no older than one bar of that frame) and returns
+    the flat array dict that goes into shared memory. Every horizon reads the same 1m feature columns, like the live
+    projections of one feature snapshot.
+    """
+    n = len(feature_rows)
+    stamps = np.array([to_epoch_ms(r["timestamp"]) for r in feature_rows], dtype=np.int64)
+    arrays = {"timestamp": stamps}
+
+    names = sorted({k for r in feature_rows for k, v in r.items()
+                    if k != "timestamp" and isinstance(v, (int, float)) and not isinstance(v, bool)})
+    for name in names:
+        values = np.full(n, np.nan)
+        missing = np.ones(n, dtype=bool)
+        for i, row in enumerate(feature_rows):
+            value = row.get(name)
+            if isinstance(value, (int, float)):
+                values[i] = value
+                missing[i] = False
+        arrays[f"f.{name}"] = values
+        arrays[f"m.{name}"] = missing
+    for col in PRICE_COLUMNS:
+        arrays[col] = arrays.get(f"f.{col}", np.full(n, np.nan))
+
+    for frame in HORIZON_ORDER:
+        rows = predictions[predictions["frame"] == frame].sort_values("timestamp")
+        confidence = np.zeros(n)
+        direction = np.zeros(n, dtype=np.int8)
+        present = np.zeros(n, dtype=bool)
+        if len(rows):
+            pred_ts = rows["timestamp"].to_numpy()
+            idx = np.searchsorted(pred_ts, stamps, side="right") - 1
+            # A prediction older than its horizon's bar is stale, as if the model had not run
+            has = (idx >= 0) & (stamps - pred_ts[np.maximum(idx, 0)] <= BAR_MS[frame])
+            confidence[has] = rows["confidence"].to_numpy()[idx[has]]
+            direction[has] = [DIRECTION_CODES.get(d, 0) for d in rows["direction"].to_numpy()[idx[has]]]
+            present = has
+        arrays[f"{frame}.confidence"] = confidence
+        arrays[f"{frame}.direction"] = direction
+        arrays[f"{frame}.present"] = present
+    return arrays
+
+
+def columns_from_arrays(arrays):
+    """Rebuilds the evaluate_multi_signal_batch input from the shared arrays (views, no copies)."""
+    features = {k[2:]: v for k, v in arrays.items() if k.startswith("f.")}
+    missing = {k[2:]: v for k, v in arrays.items() if k.startswith("m.")}
+    columns = {}
+    for frame in HORIZON_ORDER:
+        codes = arrays[f"{frame}.direction"]
+        direction = np.full(len(codes), None, dtype=object)
+        direction[codes == 1] = "up"
+        direction[codes == -1] = "down"
+        columns[frame] = {
+            "present": arrays[f"{frame}.present"],
+            "confidence": arrays[f"{frame}.confidence"],
+            "direction": direction,
+            "features": features,
+            "missing": missing,
+        }
+    return columns
+
+
+# --- evaluation -----------------------------------------------------------
+
+def simulate_trades(decisions, close, high, low, stop_loss_pct, take_profit_pct):
+    """
+    One position at a time: enter at the signal candle's close, exit on the
+    first candle that touches TP or SL (SL first if both), else at the close
+    after the signal's duration. Returns per-trade returns (fraction, x multiplier).
+    """
+    n = len(close)
+    returns = []
+    next_free = 0
+    for i in np.flatnonzero(decisions["signal"]):
+        if i < next_free:
+            continue
+        entry = close[i]
+        end = min(i + int(decisions["duration"][i]), n - 1)
+        if end <= i or not entry > 0:
+            continue
+        sign = 1.0 if decisions["direction"][i] == "up" else -1.0
+        hi, lo = high[i + 1:end + 1], low[i + 1:end + 1]
+        if sign > 0:
+            tp_hit = hi >= entry * (1 + take_profit_pct)
+            sl_hit = lo <= entry * (1 - stop_loss_pct)
+        else:
+            tp_hit = lo <= entry * (1 - take_profit_pct)
+            sl_hit = hi >= entry * (1 + stop_loss_pct)
+        tp_at = np.argmax(tp_hit) if tp_hit.any() else len(hi)
+        sl_at = np.argmax(sl_hit) if sl_hit.any() else len(hi)
+
+        if sl_at <= tp_at and sl_at < len(hi):
+            change, exit_at = -stop_loss_pct, sl_at
+        elif tp_at < len(hi):
+            change, exit_at = take_profit_pct, tp_at
+        else:
+            change, exit_at = sign * (close[end] - entry) / entry, len(hi) - 1
+        returns.append(change * decisions["multiplier"][i])
+        next_free = i + 1 + exit_at + 1
+    return np.array(returns)
+
+
+def score(returns):
+    """Trades compound on one account: pnl_pct and final_equity are the same compounded return."""
+    if not len(returns):
+        return {"trades": 0, "pnl_pct": 0.0, "win_rate": 0.0, "max_drawdown_pct": 0.0, "final_equity": 1.0}
+    equity = np.cumprod(1 + returns)
+    peak = np.maximum.accumulate(np.concatenate([[1.0], equity]))[1:]
+    return {
+        "trades": int(len(returns)),
+        "pnl_pct": round(float((equity[-1] - 1) * 100), 4),
+        "win_rate": round(float((returns > 0).mean()), 4),
+        "max_drawdown_pct": round(float(((peak - equity) / peak).max() * 100), 4),
+        "final_equity": round(float(equity[-1]), 6),
+    }
+
+
+def candidate_arguments(params):
+    thresholds = {h: params[f"threshold_{h}"] for h in HORIZON_ORDER if f"threshold_{h}" in params}
+    base_filter_params = None
+    if params.get("min_trend_scale") is not None:
+        base_filter_params = {
+            h: (MIN_TREND.get(h, 0.4) * params["min_trend_scale"], doji_threshold_for(h) + params.get("doji_offset", 0))
+            for h in HORIZON_ORDER
+        }
+    return thresholds or None, base_filter_params
+
+
+_worker = {}
+
+
+def _init_worker(spec, token):
+    shm, arrays = attach_shared(spec)
+    _worker.update(shm=shm, arrays=arrays, token=token, columns=columns_from_arrays(arrays))
+
+
+def evaluate_candidate(params):
+    arrays = _worker["arrays"]
+    thresholds, base_filter_params = candidate_arguments(params)
+    decisions = evaluate_multi_signal_batch(_worker["token"], _worker["columns"], thresholds, base_filter_params)
+    returns = simulate_trades(decisions, arrays["close"], arrays["high"], arrays["low"],
+                              params["stop_loss_pct"], params["take_profit_pct"])
+    return {**params, **score(returns)}
+
+
+def parameter_sets(grid, samples=None, seed=0):
+    keys = list(grid)
+    if samples is None:
+        return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    total = 1
+    for k in keys:
+        total *= len(grid[k])
+    rng = random.Random(seed)
+    seen = set()
+    while len(seen) < min(samples, total):
+        seen.add(tuple(rng.randrange(len(grid[k])) for k in keys))
+    return [{k: grid[k][i] for k, i in zip(keys, picks)} for picks in sorted(seen)]
+
+
+def run_sweep(token, arrays, candidates, workers=None):
+    shared = SharedArrays(arrays)
+    try:
+        ctx = get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=ctx,
+                                 initializer=_init_worker, initargs=(shared.spec, token)) as pool:
+            chunk = max(1, len(candidates) // ((workers or os.cpu_count()) * 8))
+            results = list(pool.map(evaluate_candidate, candidates, chunksize=chunk))
+    finally:
+        shared.close()
+    return pd.DataFrame(results).sort_values(["pnl_pct", "win_rate"], ascending=False).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep strategy thresholds and SL/TP over historical data")
+    parser.add_argument("token")
+    parser.add_argument("--features", help="1m feature JSONL (defaults to data/daily/features/<TOKEN>_features.jsonl)")
+    parser.add_argument("--predictions", help="prediction log (defaults to logs/predictions/<TOKEN>_predictions.csv)")
+    parser.add_argument("--random", type=int, help="sample this many parameter sets instead of the full grid")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--out", help="results CSV (defaults to logs/sweep_<TOKEN>.csv)")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    token = args.token.upper()
+    started = time.time()
+    rows = load_feature_rows(token, args.features)
+    predictions = load_prediction_log(args.predictions or f"logs/predictions/{token}_predictions.csv")
+    arrays = build_dataset(rows, predictions)
+    candidates = parameter_sets(SWEEP_GRID, args.random, args.seed)
+    print(f"📦 Loaded {len(rows)} rows, {len(predictions)} predictions in {time.time() - started:.1f}s; "
+          f"evaluating {len(candidates)} parameter sets")
+
+    started = time.time()
+    results = run_sweep(token, arrays, candidates, args.workers)
+    out = args.out or f"logs/sweep_{token}.csv"
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    results.to_csv(out, index=False)
+    print(f"✅ Swept {len(candidates)} sets in {time.time() - started:.1f}s → {out}")
+    print(results.head(args.top).to_string(index=False))
@@ -1,7 +1,8 @@
 # trading/trade_executor.py
-from datetime import datetime, timezone
 import time
 from .btcc_auth import generate_signature
+from trading import multi_account
+from utils import clock
 from trading.paper_wallet import simulate_trade
 
 import requests
@@ -20,7 +21,7 @@ def execute_trade(pair: str, decision: dict):
     duration = decision["duration"]
     features = decision["features"]
     price = decision.get("price") or features.get("close")
-    timestamp = datetime.now(timezone.utc).isoformat()
+    timestamp = clock.now().isoformat()
     multiplier = decision.get("multiplier", 1.0)
     
 
@@ -51,6 +52,9 @@ def execute_trade(pair: str, decision: dict):
         duration_minutes=duration,
         multiplier=multiplier,
     )
+    if multi_account.multi_accounts is not None:
+        # Same decision, every configured paper account sizes and filters it with its own settings
+        multi_account.multi_accounts.on_signal(pair, decision, price)
   
   
   
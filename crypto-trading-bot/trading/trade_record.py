@@ -0,0 +1,132 @@
+# trading/trade_record.py
+import uuid
+from datetime import datetime, timezone
+from types import MappingProxyType
+
+NO_FEATURES = MappingProxyType({})
+
+# Interned pair names: records store a small int, the name is looked up on access
+PAIR_IDS = {}
+PAIR_NAMES = []
+
+
+def intern_pair(pair):
+    pair_id = PAIR_IDS.get(pair)
+    if pair_id is None:
+        pair_id = PAIR_IDS[pair] = len(PAIR_NAMES)
+        PAIR_NAMES.append(pair)
+    return pair_id
+
+
+def ms_to_iso(ms):
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).isoformat()
+
+
+def new_trade_id():
+    # UUID string, as before: JSON consumers (the frontend's trade_id: string) can't hold 64-bit ints exactly
+    return str(uuid.uuid4())
+
+
+class TradeRecord:
+    """
+    Slotted paper trade. Times are epoch ms, the pair is an interned id and
+    features is a reference to the decision's feature dict (not a copy).
+
+    Reads like the old trade dict (trade["pair"], trade.get("features", {}),
+    trade["timestamp"] as ISO) so existing callers keep working. The ISO strings
+    are only built when asked for, i.e. at the logging boundary via to_dict().
+    """
+
+    __slots__ = (
+        "id", "pair_id", "direction", "confidence", "entry_price", "trade_size",
+        "opened_ms", "check_after_ms", "duration_minutes", "multiplier",
+        "peak_price", "peak_confidence", "evaluated", "status", "features",
+    )
+
+    def __init__(self, pair, direction, confidence, entry_price, trade_size, opened_ms,
+                 duration_minutes=15, multiplier=1.0, features=None, trade_id=None):
+        self.id = new_trade_id() if trade_id is None else trade_id
+        self.pair_id = intern_pair(pair)
+        self.direction = direction
+        self.confidence = float(confidence)
+        self.entry_price = entry_price
+        self.trade_size = trade_size
+        self.opened_ms = int(opened_ms)
+        self.check_after_ms = self.opened_ms + int(duration_minutes * 60_000)
+        self.duration_minutes = duration_minutes
+        self.multiplier = multiplier
+        self.peak_price = entry_price
+        self.peak_confidence = float(confidence)
+        self.evaluated = False
+        self.status = "open"
+        self.features = features
+
+    @property
+    def pair(self):
+        return PAIR_NAMES[self.pair_id]
+
+    def __getitem__(self, key):
+        if key == "pair":
+            return PAIR_NAMES[self.pair_id]
+        if key == "features":
+            return self.features if self.features is not None else NO_FEATURES
+        if key == "timestamp":
+            return ms_to_iso(self.opened_ms)
+        if key == "check_after":
+            return ms_to_iso(self.check_after_ms)
+        if key in self.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__ or key in ("id", "pair_id"):
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__ or key in ("pair", "timestamp", "check_after")
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        """The legacy trade dict, for JSON logs and exports."""
+        return {
+            "id": self.id,
+            "pair": self.pair,
+            "direction": self.direction,
+            "confidence": self.confidence,
+            "entry_price": self.entry_price,
+            "trade_size": self.trade_size,
+            "timestamp": ms_to_iso(self.opened_ms),
+            "check_after": ms_to_iso(self.check_after_ms),
+            "evaluated": self.evaluated,
+            "status": self.status,
+            "duration_minutes": self.duration_minutes,
+            "features": dict(self.features or {}),
+            "multiplier": self.multiplier,
+            "peak_price": self.peak_price,
+            "peak_confidence": self.peak_confidence,
+        }
+
+    def to_state(self):
+        """Compact form for the wallet journal: epoch-ms times, pair by name (pair ids are per process)."""
+        state = {name: getattr(self, name) for name in self.__slots__ if name != "pair_id"}
+        state["pair"] = self.pair
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        record = cls.__new__(cls)
+        for name in cls.__slots__:
+            if name != "pair_id":
+                setattr(record, name, state[name])
+        record.pair_id = intern_pair(state["pair"])
+        record.id = str(record.id)  # journals written while ids were ints
+        return record
+
+    def __repr__(self):
+        return f"TradeRecord({self.id}, {self.pair}, {self.direction}, {self.entry_price}, {self.status})"
@@ -0,0 +1,47 @@
+# trading/trade_store.py
+from collections import deque
+
+
+class TradeStore:
+    """
+    Paper-wallet trades split into an open index and a closed archive.
+
+    Open trades are indexed by pair (then id) and the open count / risk exposure
+    are kept as running totals, so per-tick work scales with open trades only.
+    Closed trades move to an append-only archive (bounded by archive_size).
+    """
+
+    def __init__(self, archive_size=None):
+        self._open = {}
+        self.closed = deque(maxlen=archive_size)
+        self.open_count = 0
+        self.risk_exposure = 0.0
+
+    def add(self, trade):
+        self._open.setdefault(trade["pair"], {})[trade["id"]] = trade
+        self.open_count += 1
+        self.risk_exposure += trade["trade_size"]
+
+    def close(self, trade):
+        """Moves an open trade to the archive; call after marking it evaluated."""
+        by_id = self._open.get(trade["pair"])
+        if not by_id or by_id.pop(trade["id"], None) is None:
+            return
+        if not by_id:
+            del self._open[trade["pair"]]
+        self.open_count -= 1
+        self.risk_exposure = self.risk_exposure - trade["trade_size"] if self.open_count else 0.0
+        self.closed.append(trade)
+
+    def has_open(self, pair):
+        return pair in self._open
+
+    def open_for(self, pair):
+        """Snapshot of the pair's open trades, safe to close while iterating."""
+        return list(self._open.get(pair, {}).values())
+
+    def open_trades(self):
+        return [trade for by_id in self._open.values() for trade in by_id.values()]
+
+    def __len__(self):
+        return self.open_count + len(self.closed)
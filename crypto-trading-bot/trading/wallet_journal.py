@@ -0,0 +1,96 @@
+# trading/wallet_journal.py
+import atexit
+import json
+import os
+
+from utils.log_writer import LogWriter, json_default
+
+
+class WalletJournal:
+    """
+    Write-ahead journal of paper-wallet events plus compact snapshots.
+
+    Every event gets a sequence number and goes to the journal's own group-commit
+    writer thread, so record() never blocks the event loop on a write or an
+    fsync. With fsync on, each batch the thread writes is fsynced, so an event is
+    on disk within about flush_interval_ms. After snapshot_every events, the owner
+    passes the full wallet state to snapshot(). That drains the writer, writes the
+    state to a temp file which is then renamed into place, and truncates the journal.
+
+    load() returns the last snapshot and the events after it. A crash between
+    the rename and the truncate is harmless, because replay skips events whose
+    seq the snapshot already covers. A torn last line, from a crash mid-write,
+    is cut off; a bad line anywhere else raises instead of dropping the events
+    after it.
+    """
+
+    def __init__(self, directory, snapshot_every=200, fsync=True, flush_interval_ms=50):
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, "wallet_snapshot.json")
+        self.journal_path = os.path.join(directory, "wallet_journal.jsonl")
+        self.snapshot_every = snapshot_every
+        self.seq = 0
+        self.since_snapshot = 0
+        self._writer = LogWriter(flush_interval_ms=flush_interval_ms, fsync="batch" if fsync else "never")
+        atexit.register(self._writer.close)
+
+    def load(self):
+        """(snapshot state or None, [events after it]); also resumes the sequence numbering."""
+        state = None
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.seq = state["seq"]
+
+        events = []
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "rb") as f:
+                lines = f.readlines()
+            good_bytes = 0
+            for number, line in enumerate(lines, 1):
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    event = None
+                if event is None or not line.endswith(b"\n"):
+                    if number < len(lines):
+                        raise ValueError(f"Wallet journal {self.journal_path} has a corrupt record at line {number} "
+                                         f"(after seq {self.seq}) with {len(lines) - number} more after it")
+                    # Cut the torn tail so new events are not appended after it
+                    print(f"⚠️ Wallet journal ends in a partial record after seq {self.seq}; dropping it")
+                    os.truncate(self.journal_path, good_bytes)
+                    break
+                good_bytes += len(line)
+                if event["seq"] <= self.seq:
+                    continue
+                events.append(event)
+                self.seq = event["seq"]
+        self.since_snapshot = len(events)
+        return state, events
+
+    def record(self, kind, **data):
+        self.seq += 1
+        # Serialized here: the caller's data may change before the writer thread gets to it
+        self._writer.append(self.journal_path, json.dumps({"seq": self.seq, "type": kind, **data}, default=json_default))
+        self.since_snapshot += 1
+        return self.seq
+
+    def snapshot_due(self):
+        return self.since_snapshot >= self.snapshot_every
+
+    def snapshot(self, state):
+        # Every event the snapshot covers must be in the journal before the journal is cut
+        self._writer.flush()
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({**state, "seq": self.seq}, f, default=json_default)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+
+        open(self.journal_path, "w", encoding="utf-8").close()
+        self.since_snapshot = 0
+
+    def close(self):
+        self._writer.close()
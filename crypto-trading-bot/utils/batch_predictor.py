@@ -0,0 +1,130 @@
+# utils/batch_predictor.py
+import asyncio
+
+import numpy as np
+
+from config import BATCH_PREDICTION_WINDOW_MS, models
+from features.feature_schema import schema_for
+from model.predictor import predict
+
+
+class _Probability:
+    """Stands in for the model inside predict(): hands back a probability the batch already computed."""
+
+    def __init__(self, probability):
+        self.probability = float(probability)
+
+    def predict_proba(self, X):
+        return np.array([[1.0 - self.probability, self.probability]])
+
+
+def prediction_from_probability(probability, threshold, features, feature_names, token, frame):
+    """predict()'s own dict for a batched probability, so both paths share one conversion (direction, confidence, fields)."""
+    return predict(_Probability(probability), features, feature_names, threshold, token, frame)
+
+
+def predict_proba_matrix(model, X):
+    """P(up) for every row of a float32 matrix, without building a DataFrame."""
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    if hasattr(booster, "inplace_predict"):
+        proba = np.asarray(booster.inplace_predict(X))
+    else:
+        proba = np.asarray(model.predict_proba(X))
+    if proba.ndim == 2:
+        proba = proba[:, -1]
+    return proba
+
+
+class BatchPredictor:
+    """
+    Runs one vectorized predict per model for a batch of (token, frame, features)
+    rows. Input matrices are float32 and preallocated per model; they only grow
+    when a batch is bigger than anything seen before. Each model's compiled
+    FeatureSchema writes the features straight into its matrix row; missing
+    features are NaN, which XGBoost treats as missing values.
+    """
+
+    def __init__(self):
+        self._matrices = {}
+
+    def _matrix_for(self, model, rows, cols):
+        key = id(model)
+        matrix = self._matrices.get(key)
+        if matrix is None or matrix[0] is not model or matrix[1].shape[0] < rows or matrix[1].shape[1] != cols:
+            capacity = max(rows, 4 if matrix is None else matrix[1].shape[0] * 2)
+            matrix = self._matrices[key] = (model, np.empty((capacity, cols), dtype=np.float32))
+        return matrix[1][:rows]
+
+    def predict_batch(self, entries):
+        """
+        entries: list of (token, frame, features, threshold[, missing_mask])
+        Returns a list of prediction dicts in the same order.
+        """
+        results = [None] * len(entries)
+        groups = {}
+        for i, entry in enumerate(entries):
+            info = models[entry[0]][entry[1]]
+            groups.setdefault(id(info["model"]), (info, []))[1].append(i)
+
+        for info, indexes in groups.values():
+            model = info["model"]
+            schema = schema_for(info)
+            X = self._matrix_for(model, len(indexes), schema.size)
+            for row, i in enumerate(indexes):
+                entry = entries[i]
+                schema.fill(entry[2], X[row], entry[4] if len(entry) > 4 else None)
+
+            proba = predict_proba_matrix(model, X)
+            for row, i in enumerate(indexes):
+                token, frame, features, threshold = entries[i][:4]
+                results[i] = prediction_from_probability(proba[row], threshold, features, info["features"], token, frame)
+
+        return results
+
+
+class BatchPredictionService:
+    """
+    Collects prediction requests from every pair that ticks inside the same
+    window and flushes them through one BatchPredictor call.
+    """
+
+    def __init__(self, window_ms=BATCH_PREDICTION_WINDOW_MS):
+        self.window = window_ms / 1000.0
+        self.predictor = BatchPredictor()
+        self._pending = []
+        self._futures = []
+        self._flush_handle = None
+
+    async def predict_tick(self, token, features_by_frame, thresholds, missing_by_frame=None):
+        """Returns {frame: prediction} for one pair's tick."""
+        missing_by_frame = missing_by_frame or {}
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        frames = list(features_by_frame)
+        for frame in frames:
+            self._pending.append((token, frame, features_by_frame[frame], thresholds[frame], missing_by_frame.get(frame)))
+        self._futures.append((future, frames, len(self._pending) - len(frames)))
+
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        entries, self._pending = self._pending, []
+        futures, self._futures = self._futures, []
+        self._flush_handle = None
+
+        try:
+            results = self.predictor.predict_batch(entries)
+        except Exception as e:
+            for future, _, _ in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, frames, start in futures:
+            if not future.done():
+                future.set_result({frame: results[start + k] for k, frame in enumerate(frames)})
+
+
+prediction_service = BatchPredictionService()
@@ -0,0 +1,71 @@
+# utils/clock.py
+"""
+Wall clock for the trading path, swappable so a backtest can replay history.
+
+Code that stamps or ages trades calls clock.now() / clock.timestamp() /
+clock.now_ms() instead of datetime.now(timezone.utc) or time.time(). Live, that is
+the system clock; trading/backtest.py installs a SimulatedClock and moves it to
+each candle's timestamp.
+"""
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+
+class SystemClock:
+    def timestamp(self):
+        return time.time()
+
+    def now(self):
+        return datetime.now(timezone.utc)
+
+
+class SimulatedClock:
+    def __init__(self, start=0.0):
+        self._t = float(start)
+
+    def set(self, seconds):
+        self._t = float(seconds)
+
+    def set_ms(self, ms):
+        self._t = ms / 1000
+
+    def advance(self, seconds):
+        self._t += seconds
+
+    def timestamp(self):
+        return self._t
+
+    def now(self):
+        return datetime.fromtimestamp(self._t, tz=timezone.utc)
+
+
+_active = SystemClock()
+
+
+def now():
+    return _active.now()
+
+
+def timestamp():
+    return _active.timestamp()
+
+
+def now_ms():
+    return int(_active.timestamp() * 1000)
+
+
+def set_clock(clock):
+    """Installs clock and returns the previous one."""
+    global _active
+    previous, _active = _active, clock
+    return previous
+
+
+@contextmanager
+def use_clock(clock):
+    previous = set_clock(clock)
+    try:
+        yield clock
+    finally:
+        set_clock(previous)
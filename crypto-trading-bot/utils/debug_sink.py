@@ -0,0 +1,154 @@
+# utils/debug_sink.py
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from config import FEATURE_DEBUG
+from utils.logger import make_json_safe
+
+
+class FeatureDebugSink:
+    """
+    Background writer for per-tick feature snapshots.
+
+    submit_tick() only samples and enqueues; formatting and disk I/O happen on
+    a daemon thread. When the queue is full the snapshot is dropped and counted,
+    so the tick path never waits on the filesystem.
+    """
+
+    def __init__(self, path, every_n_ticks=60, queue_size=256, max_bytes=50_000_000):
+        self.path = path
+        self.every_n_ticks = max(1, int(every_n_ticks))
+        self.max_bytes = max_bytes
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._ticks = defaultdict(int)
+        self._thread = None
+        self.written = 0
+        self.dropped = 0
+
+    def submit_tick(self, pair, features_by_frame, signal=False):
+        """Queues one snapshot per frame if this tick is sampled. Returns True if queued."""
+        self._ticks[pair] += 1
+        if not signal and self._ticks[pair] % self.every_n_ticks:
+            return False
+
+        record = {
+            "ts": int(time.time() * 1000),
+            "pair": pair,
+            "signal": bool(signal),
+            "frames": {frame: dict(features) for frame, features in features_by_frame.items()},
+        }
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="feature-debug-sink", daemon=True)
+            self._thread.start()
+        return True
+
+    def _run(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                print(f"⚠️ Feature debug sink failed to write: {e}")
+
+    def _write(self, batch):
+        if os.path.exists(self.path) and os.path.getsize(self.path) > self.max_bytes:
+            os.replace(self.path, self.path + ".1")
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            for record in batch:
+                f.write(json.dumps(make_json_safe(compact_record(record)), separators=(",", ":")) + "\n")
+        self.written += len(batch)
+
+
+def compact_record(record):
+    """
+    Horizon projections share almost every key, so the line stores the merged
+    features once plus, per frame, the keys that frame does not have.
+    """
+    merged = {}
+    for features in record["frames"].values():
+        merged.update(features)
+    absent = {
+        frame: [k for k in merged if k not in features]
+        for frame, features in record["frames"].items()
+    }
+    return {"ts": record["ts"], "pair": record["pair"], "signal": record["signal"], "features": merged, "absent": absent}
+
+
+def expand_record(record):
+    frames = {}
+    for frame, absent in record["absent"].items():
+        skip = set(absent)
+        frames[frame] = {k: v for k, v in record["features"].items() if k not in skip}
+    return {**record, "frames": frames}
+
+
+feature_debug_sink = FeatureDebugSink(
+    FEATURE_DEBUG["path"],
+    every_n_ticks=FEATURE_DEBUG["every_n_ticks"],
+    queue_size=FEATURE_DEBUG["queue_size"],
+    max_bytes=FEATURE_DEBUG["max_bytes"],
+)
+
+
+def read_snapshots(path, pair=None):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if pair and record["pair"] != pair:
+                continue
+            yield expand_record(record)
+
+
+def format_snapshot(record, frame=None):
+    lines = []
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(record["ts"] / 1000))
+    for name, features in record["frames"].items():
+        if frame and name != frame:
+            continue
+        tag = " 🚨 signal" if record.get("signal") else ""
+        lines.append(f"🔎 Feature Snapshot for {record['pair']} {name} @ {stamp}{tag}")
+        lines.append("=" * 40)
+        for key in sorted(features):
+            val = features[key]
+            if isinstance(val, float):
+                lines.append(f"{key:<30}: {val:.6f}")
+            else:
+                lines.append(f"{key:<30}: {val}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pretty-print feature debug snapshots")
+    parser.add_argument("path", nargs="?", default=FEATURE_DEBUG["path"])
+    parser.add_argument("--pair", help="e.g. BTC/USDT")
+    parser.add_argument("--frame", help="e.g. 1m, 15m, 1h, 1d")
+    parser.add_argument("--last", type=int, default=1, help="number of snapshots to show")
+    parser.add_argument("--signals", action="store_true", help="only snapshots taken on a signal")
+    args = parser.parse_args()
+
+    records = [r for r in read_snapshots(args.path, args.pair) if r.get("signal") or not args.signals]
+    if not records:
+        print(f"❌ No snapshots found in {args.path}")
+    for record in records[-args.last:]:
+        print(format_snapshot(record, args.frame))
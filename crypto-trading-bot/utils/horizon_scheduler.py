@@ -0,0 +1,153 @@
+# utils/horizon_scheduler.py
+import numpy as np
+
+from config import HORIZON_SCHEDULING, models
+from features.bar_builder import BAR_MS
+from features.feature_schema import schema_for
+from utils import clock
+from utils.ring_buffer import to_epoch_ms
+
+
+class _HorizonState:
+    __slots__ = ("bucket", "inputs", "model", "pending", "prediction", "computed_at")
+
+    def __init__(self):
+        self.bucket = None
+        self.inputs = None
+        self.model = None
+        self.pending = None   # (bucket, inputs, model) of a run whose prediction has not come back yet
+        self.prediction = None
+        self.computed_at = 0.0
+
+
+def _timeframe_of(name):
+    for tf in BAR_MS:
+        if name.endswith(f"_{tf}"):
+            return tf
+    return None
+
+
+class HorizonScheduler:
+    """
+    Decides per tick which horizons need a fresh prediction.
+
+    A horizon is re-run when its timeframe bar rolls over, when its model was
+    reloaded, or when one of the inputs its own timeframe drives moved by more
+    than that feature's relative epsilon since its last run. Those are the model's
+    features suffixed with the horizon's timeframe or a slower one ("rsi_1h" for
+    1h); unsuffixed, 1m-driven inputs move every minute and are picked up at the
+    bar roll. A model without such features watches all of its inputs.
+    Otherwise the last prediction is served again, stamped cached=True with its
+    age_seconds, so evaluate_multi_signal sees the same dict shape.
+
+    A run only becomes the new reference once merge() gets its prediction, so a
+    failed or dropped prediction is retried on the next tick.
+    """
+
+    def __init__(self, epsilon=0.001, always=("1m",), enabled=True, epsilon_by_feature=None):
+        self.epsilon = epsilon
+        self.epsilon_by_feature = dict(epsilon_by_feature or {})
+        self.always = set(always)
+        self.enabled = enabled
+        self._states = {}
+        self._watched = {}
+        self.runs = {}
+        self.skips = {}
+
+    def _watch(self, frame, schema):
+        """(slots, epsilons) of the inputs that decide whether frame's model must re-run."""
+        watched = self._watched.get((frame, schema))
+        if watched is None:
+            bar_ms = BAR_MS.get(frame, 0)
+            slots = [i for i, name in enumerate(schema.names)
+                     if _timeframe_of(name) is not None and BAR_MS[_timeframe_of(name)] >= bar_ms]
+            if not slots:
+                slots = list(range(schema.size))
+            epsilons = np.array([self.epsilon_by_feature.get(schema.names[i], self.epsilon) for i in slots])
+            watched = self._watched[(frame, schema)] = (np.array(slots, dtype=np.int64), epsilons)
+        return watched
+
+    def _changed(self, old, new, watched):
+        if old is None or old.shape != new.shape:
+            return True
+        slots, epsilons = watched
+        old, new = old[slots], new[slots]
+        old_nan, new_nan = np.isnan(old), np.isnan(new)
+        if (old_nan != new_nan).any():
+            return True
+        return bool((np.abs(new - old) > epsilons * np.abs(old))[~old_nan].any())
+
+    def reset(self):
+        self._states.clear()
+        self._watched.clear()
+        self.runs.clear()
+        self.skips.clear()
+
+    def due_frames(self, pair, token, latest_data, features_by_horizon):
+        """Frames that must be predicted on this tick; the others get their cached prediction."""
+        if not self.enabled:
+            return list(features_by_horizon)
+
+        ts = latest_data.get("timestamp")
+        ts_ms = to_epoch_ms(ts) if ts is not None else None
+        due = []
+        for frame, features in features_by_horizon.items():
+            state = self._states.get((pair, frame))
+            if state is None:
+                state = self._states[(pair, frame)] = _HorizonState()
+            info = models[token][frame]
+            schema = schema_for(info)
+            inputs = schema.fill(features)
+            bar_ms = BAR_MS.get(frame)
+            bucket = ts_ms - ts_ms % bar_ms if ts_ms is not None and bar_ms else None
+
+            run = (
+                frame in self.always
+                or state.prediction is None
+                or state.model is not info["model"]
+                or bucket is None
+                or bucket != state.bucket
+                or self._changed(state.inputs, inputs, self._watch(frame, schema))
+            )
+            if run:
+                state.pending = (bucket, inputs, info["model"])
+                due.append(frame)
+        return due
+
+    def merge(self, pair, predictions, frames):
+        """
+        Stores the fresh predictions (committing the runs that produced them) and
+        fills the skipped frames from the cache, in frames order.
+        """
+        now = clock.timestamp()
+        merged = {}
+        for frame in frames:
+            state = self._states.get((pair, frame))
+            if predictions.get(frame) is not None:
+                prediction = dict(predictions[frame], cached=False, age_seconds=0.0)
+                if state is not None:
+                    if state.pending is not None:
+                        state.bucket, state.inputs, state.model = state.pending
+                        state.pending = None
+                    state.prediction = prediction
+                    state.computed_at = now
+                self.runs[frame] = self.runs.get(frame, 0) + 1
+            elif state is not None and state.prediction is not None:
+                prediction = dict(state.prediction, cached=True, age_seconds=round(now - state.computed_at, 1))
+                self.skips[frame] = self.skips.get(frame, 0) + 1
+            else:
+                continue
+            merged[frame] = prediction
+        return merged
+
+    def stats(self):
+        return {frame: {"runs": self.runs.get(frame, 0), "cached": self.skips.get(frame, 0)}
+                for frame in set(self.runs) | set(self.skips)}
+
+
+horizon_scheduler = HorizonScheduler(
+    epsilon=HORIZON_SCHEDULING["epsilon"],
+    always=HORIZON_SCHEDULING["always"],
+    enabled=HORIZON_SCHEDULING["enabled"],
+    epsilon_by_feature=HORIZON_SCHEDULING.get("epsilon_by_feature"),
+)
@@ -0,0 +1,157 @@
+# utils/latency.py
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+from config import LATENCY_METRICS
+
+SUB_BUCKETS = 64  # values below this (µs) get exact buckets; above, ~3% relative precision
+HALF = SUB_BUCKETS // 2
+
+
+def bucket_index(us):
+    if us < SUB_BUCKETS:
+        return us
+    shift = us.bit_length() - HALF.bit_length()
+    return SUB_BUCKETS + (shift - 1) * HALF + ((us >> shift) - HALF)
+
+
+def bucket_value(index):
+    """Upper edge (µs) of a bucket, so percentiles never under-report."""
+    if index < SUB_BUCKETS:
+        return index
+    shift, offset = divmod(index - SUB_BUCKETS, HALF)
+    shift += 1
+    return ((HALF + offset + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of microsecond values with sparse buckets."""
+    __slots__ = ("counts", "count", "total_us", "max_us")
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def record(self, us):
+        self.counts[bucket_index(us)] += 1
+        self.count += 1
+        self.total_us += us
+        if us > self.max_us:
+            self.max_us = us
+
+    def percentile(self, pct):
+        if not self.count:
+            return None
+        target = max(1, int(self.count * pct / 100.0 + 0.5))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(bucket_value(index), self.max_us)
+        return self.max_us
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "p50_ms": _ms(self.percentile(50)),
+            "p99_ms": _ms(self.percentile(99)),
+            "max_ms": _ms(self.max_us if self.count else None),
+            "mean_ms": _ms(self.total_us / self.count if self.count else None),
+        }
+
+
+def _ms(us):
+    return None if us is None else round(us / 1000.0, 3)
+
+
+class LatencyRecorder:
+    """
+    Per-pair, per-stage histograms for the tick pipeline. Each dump writes the
+    interval since the previous dump as JSONL lines and starts fresh, so a
+    regression after a model reload shows up in the next interval.
+    """
+
+    def __init__(self, path, dump_seconds=60, enabled=True):
+        self.path = path
+        self.dump_seconds = dump_seconds
+        self.enabled = enabled
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._interval_start = time.time()
+        self._thread = None
+
+    def record(self, pair, stage, elapsed_ns):
+        if not self.enabled:
+            return
+        key = (pair, stage)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.record(elapsed_ns // 1000)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="latency-dump", daemon=True)
+            self._thread.start()
+
+    def snapshot(self, reset=False):
+        with self._lock:
+            histograms = self._histograms
+            if reset:
+                self._histograms = {}
+        return {key: h.summary() for key, h in histograms.items()}
+
+    def _run(self):
+        while True:
+            time.sleep(self.dump_seconds)
+            try:
+                self.dump()
+            except Exception as e:
+                print(f"⚠️ Failed to write latency metrics: {e}")
+
+    def dump(self):
+        now = time.time()
+        summaries = self.snapshot(reset=True)
+        start, self._interval_start = self._interval_start, now
+        if not summaries:
+            return
+
+        lines = [
+            json.dumps({"timestamp": now, "interval_s": round(now - start, 1), "pid": os.getpid(),
+                        "pair": pair, "stage": stage, **summary})
+            for (pair, stage), summary in sorted(summaries.items())
+        ]
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+tick_latency = LatencyRecorder(
+    LATENCY_METRICS["path"],
+    dump_seconds=LATENCY_METRICS["dump_seconds"],
+    enabled=LATENCY_METRICS["enabled"],
+)
+
+
+class timed:
+    """
+    with timed(pair, "predict"):
+        ...
+    """
+    __slots__ = ("pair", "stage", "start")
+
+    def __init__(self, pair, stage):
+        self.pair = pair
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        tick_latency.record(self.pair, self.stage, time.perf_counter_ns() - self.start)
+        return False
@@ -0,0 +1,186 @@
+# utils/log_writer.py
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Mapping
+
+from config import LOG_WRITER
+from utils.logger import safe_jsonify
+
+FSYNC_POLICIES = ("never", "batch", "interval")
+
+
+def json_default(obj):
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    return safe_jsonify(obj)
+
+
+def dumps(record):
+    """One JSON line; numpy scalars and timestamps are converted on demand instead of by a full tree walk."""
+    if isinstance(record, str):
+        return record
+    return json.dumps(record, default=json_default)
+
+
+class LogWriter:
+    """
+    Background group-commit writer for append-only JSONL streams.
+
+    A stream is a file path. append() adds a line and replace() sets the whole
+    file to the latest record (written to a temp file, then renamed). Callers
+    only enqueue. A daemon thread waits flush_interval_ms for more records, then
+    writes each stream's batch with one open/write/flush. fsync follows the
+    policy: never, after every batch, or at most every fsync_interval_seconds.
+
+    Records are serialized on the writer thread, so a caller must not mutate a
+    record after handing it over. close() runs at exit and drains the queue.
+    """
+
+    def __init__(self, flush_interval_ms=200, max_batch=1000, fsync="interval", fsync_interval_seconds=5.0):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch = max_batch
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval_seconds
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self._last_fsync = time.monotonic()
+        self._dirs = set()
+        self.written = defaultdict(int)
+        self.batches = 0
+        self.errors = 0
+        self.root = None  # when set, relative paths are written under it (a backtest's output dir)
+
+    def append(self, path, record):
+        self._put(("append", self._resolve(path), record))
+
+    def replace(self, path, record, indent=None):
+        self._put(("replace", self._resolve(path), (record, indent)))
+
+    def flush(self, timeout=5.0):
+        """Blocks until everything queued before the call is on disk (or timeout). Returns True if drained."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(("flush", None, done))
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(("stop", None, None))
+            self._thread.join(timeout)
+
+    def _put(self, item):
+        if self._closed:
+            self._write([item])  # after shutdown there is no thread left to hand off to
+            return
+        self._queue.put(item)
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch and batch[-1][0] not in ("flush", "stop"):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            control = [item for item in batch if item[0] in ("flush", "stop")]
+            try:
+                self._write([item for item in batch if item[0] not in ("flush", "stop")])
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️ Log writer failed to write: {e}")
+            for kind, _, done in control:
+                if kind == "flush":
+                    done.set()
+            if any(kind == "stop" for kind, _, _ in control):
+                self._drain()
+                return
+
+    def _drain(self):
+        leftover = []
+        while True:
+            try:
+                leftover.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self._write([item for item in leftover if item[0] in ("append", "replace")], final=True)
+
+    def _write(self, batch, final=False):
+        if not batch:
+            return
+        appends = defaultdict(list)
+        replaces = {}
+        for kind, path, record in batch:
+            if kind == "append":
+                appends[path].append(dumps(record))
+            elif kind == "replace":
+                replaces[path] = record
+
+        sync = self.fsync == "batch" or (final and self.fsync != "never") or (
+            self.fsync == "interval" and time.monotonic() - self._last_fsync >= self.fsync_interval
+        )
+        for path, lines in appends.items():
+            self._ensure_dir(path)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+                if sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            self.written[path] += len(lines)
+
+        for path, (record, indent) in replaces.items():
+            self._ensure_dir(path)
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(record, f, indent=indent, default=json_default)
+                if sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp, path)
+            self.written[path] += 1
+
+        if sync:
+            self._last_fsync = time.monotonic()
+        self.batches += 1
+
+    def _resolve(self, path):
+        if self.root is None or os.path.isabs(path):
+            return path
+        return os.path.join(self.root, path)
+
+    def _ensure_dir(self, path):
+        directory = os.path.dirname(path)
+        if directory and directory not in self._dirs:
+            os.makedirs(directory, exist_ok=True)
+            self._dirs.add(directory)
+
+
+log_writer = LogWriter(
+    flush_interval_ms=LOG_WRITER["flush_interval_ms"],
+    max_batch=LOG_WRITER["max_batch"],
+    fsync=LOG_WRITER["fsync"],
+    fsync_interval_seconds=LOG_WRITER["fsync_interval_seconds"],
+)
+atexit.register(log_writer.close)
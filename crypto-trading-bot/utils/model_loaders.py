@@ -6,6 +6,7 @@ from stable_baselines3 import PPO
 from model.predictor import load_model_for_token, load_threshold_for_token,  load_feature_names_for_token
 from config import models, RL_MODELS
 from config import    HORIZONS,  WATCHED_PAIRS
+from features.feature_schema import FeatureSchema
 from datetime import datetime, timezone
 import os
 
@@ -37,6 +38,7 @@ def reload_llm_model(token, frame):
         models[token.upper()][frame] = {
             "model": model,
             "features": feature_names,
+            "schema": FeatureSchema(feature_names),
             "threshold": threshold,
         }
 
@@ -50,8 +52,8 @@ def reload_llm_model(token, frame):
         print(msg)
         log_reload_event(msg)
 
-def load_all_models():
-        for pair in WATCHED_PAIRS:
+def load_all_models(pairs=WATCHED_PAIRS):
+        for pair in pairs:
             token = pair.split("/")[0].upper()
             model_filename = f"ppo_trading_{token}.zip"
             model_path = os.path.join("models", "ppo_trading_agent", token, model_filename)
@@ -66,7 +68,7 @@ def load_all_models():
                 print(f"✅ Loaded RL model for {token}")
             except Exception as e:
                 print(f"❌ Failed to load model for {token}: {e}")
-        for pair in WATCHED_PAIRS:
+        for pair in pairs:
             token = pair.split("/")[0]
             models[token] = {}
 
@@ -75,9 +77,12 @@ def load_all_models():
                     frame = info["frame"]
                     threshold = info["threshold"]
                     
+                    feature_names = load_feature_names_for_token(token, frame)
+
                     models[token][frame] = {
                         "model": load_model_for_token(token, frame),
-                        "features": load_feature_names_for_token(token, frame),
+                        "features": feature_names,
+                        "schema": FeatureSchema(feature_names),
                         "threshold": threshold,
                     }
                 except Exception as e:
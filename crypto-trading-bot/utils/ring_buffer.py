@@ -0,0 +1,175 @@
+# utils/ring_buffer.py
+from datetime import datetime
+from numbers import Number
+
+import numpy as np
+import pandas as pd
+
+from config import MAX_CANDLES_PER_PAIR
+
+OHLCV = ("open", "high", "low", "close", "volume")
+
+
+def to_epoch_ms(ts):
+    """Candle timestamps arrive as epoch ms/seconds, ISO strings or datetimes; returns int epoch ms."""
+    if isinstance(ts, Number):
+        return int(ts if ts > 1e11 else ts * 1000)
+    if isinstance(ts, str):
+        try:
+            return to_epoch_ms(float(ts))
+        except ValueError:
+            pass
+    if isinstance(ts, (str, datetime)):
+        ts = pd.Timestamp(ts)
+        if ts.tzinfo is None:
+            ts = ts.tz_localize("UTC")
+        return int(ts.value // 1_000_000)
+    return int(ts)
+
+
+def _column_dtype(name, value, float_dtype):
+    if name == "timestamp":
+        return np.int64
+    if name in OHLCV:
+        return np.float64
+    if value is None or isinstance(value, (Number, np.number)):
+        return float_dtype
+    return object
+
+
+class ColumnarRingBuffer:
+    """
+    Fixed-capacity history of candle or feature rows, one numpy array per column.
+
+    Every row is written twice (at i and i + capacity), so the newest n rows
+    are always one contiguous slice and window()/column() return views without
+    copying. Timestamps are int64 epoch ms. Columns are taken from the first
+    row; keys that show up later are ignored.
+
+    Indexing and slicing return row dicts, so code written for the old
+    list-of-dicts buffers keeps working.
+    """
+
+    def __init__(self, capacity=MAX_CANDLES_PER_PAIR, columns=None, float_dtype=np.float32):
+        self.capacity = capacity
+        self.float_dtype = float_dtype
+        self._arrays = {}
+        self._count = 0      # rows ever written
+        self._len = 0
+        if columns:
+            self._init_columns({name: 0.0 for name in columns})
+
+    @classmethod
+    def from_rows(cls, rows, capacity=MAX_CANDLES_PER_PAIR, **kwargs):
+        buffer = cls(capacity, **kwargs)
+        for row in list(rows)[-capacity:]:
+            buffer.append(row)
+        return buffer
+
+    def _init_columns(self, row):
+        columns = ["timestamp"] + [name for name in row if name != "timestamp"]
+        for name in columns:
+            dtype = _column_dtype(name, row.get(name), self.float_dtype)
+            fill = 0 if dtype is np.int64 else (None if dtype is object else np.nan)
+            self._arrays[name] = np.full(self.capacity * 2, fill, dtype=dtype)
+        self.columns = columns
+
+    def _write(self, slot, row):
+        mirror = slot + self.capacity
+        for name, array in self._arrays.items():
+            value = row.get(name)
+            if name == "timestamp":
+                value = to_epoch_ms(value) if value is not None else 0
+            elif value is None and array.dtype != object:
+                value = np.nan
+            try:
+                array[slot] = value
+            except (TypeError, ValueError):
+                value = np.nan if array.dtype != np.int64 else 0
+                array[slot] = value
+            array[mirror] = value
+
+    def append(self, row):
+        if not self._arrays:
+            self._init_columns(row)
+        self._write(self._count % self.capacity, row)
+        self._count += 1
+        self._len = min(self._len + 1, self.capacity)
+
+    def upsert(self, row, lookback=4):
+        """Replaces the row with the same timestamp among the newest `lookback`, else appends."""
+        if self._len and self._arrays:
+            ts = to_epoch_ms(row["timestamp"])
+            stamps = self.column("timestamp", min(lookback, self._len))
+            for k in range(len(stamps) - 1, -1, -1):
+                if stamps[k] == ts:
+                    self._write((self._count - len(stamps) + k) % self.capacity, row)
+                    return
+        self.append(row)
+
+    def copy(self, until_ms=None):
+        """Independent copy; with until_ms, rows newer than that timestamp are left out."""
+        other = ColumnarRingBuffer.__new__(ColumnarRingBuffer)
+        other.__dict__.update(self.__dict__)
+        other._arrays = {name: array.copy() for name, array in self._arrays.items()}
+        if until_ms is not None and self._len:
+            stamps = self.column("timestamp")
+            newer = len(stamps) - int(np.searchsorted(stamps, until_ms, side="right"))
+            other._count -= newer
+            other._len -= newer
+        return other
+
+    def __len__(self):
+        return self._len
+
+    def _end(self):
+        return self._count % self.capacity + self.capacity
+
+    def column(self, name, n=None):
+        """Zero-copy view of the newest n values of one column (oldest first)."""
+        n = self._len if n is None else min(n, self._len)
+        end = self._end()
+        return self._arrays[name][end - n:end]
+
+    def window(self, n=None):
+        """{column: view} for the newest n rows."""
+        return {name: self.column(name, n) for name in self._arrays}
+
+    def timestamps(self, n=None):
+        return self.column("timestamp", n)
+
+    def _row(self, i):
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError("ring buffer index out of range")
+        slot = self._end() - self._len + i
+        return {name: array[slot].item() if array.dtype != object else array[slot]
+                for name, array in self._arrays.items()}
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(self._len))]
+        return self._row(index)
+
+    def __iter__(self):
+        for i in range(self._len):
+            yield self._row(i)
+
+    def to_frame(self, n=None, index=False):
+        """DataFrame copy of the newest n rows; only for code that really needs pandas."""
+        df = pd.DataFrame({name: np.array(view) for name, view in self.window(n).items()})
+        if index:
+            df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms", utc=True)
+            df = df.set_index("timestamp")
+        return df
+
+    def nbytes(self):
+        return sum(array.nbytes for array in self._arrays.values())
+
+
+def as_frame(buffer, n=None):
+    """pd.DataFrame of the newest n rows (all by default); a column copy for ring buffers."""
+    if isinstance(buffer, ColumnarRingBuffer):
+        return buffer.to_frame(n)
+    return pd.DataFrame(buffer if n is None else list(buffer)[-n:])
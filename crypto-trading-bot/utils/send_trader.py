@@ -1,9 +1,12 @@
 
 
+import asyncio
 import aiohttp
 import numpy as np
 import pandas as pd
 from datetime import datetime
+from config import SIGNAL_SERVER
+from utils.latency import timed
 
 def serialize_payload(obj):
     if isinstance(obj, dict):
@@ -25,7 +28,7 @@ def serialize_payload(obj):
     else:
         return obj
     
-async def send_signal_to_trading_server(token, candle, features_by_horizon, predictions, rl_response=None):
+async def send_signal_to_trading_server(token, candle, features_by_horizon, predictions, rl_response=None, url=SIGNAL_SERVER["url"]):
     signal_payload = {
         "token": token,
         "candle": candle,
@@ -38,10 +41,149 @@ async def send_signal_to_trading_server(token, candle, features_by_horizon, pred
 
     try:
         async with aiohttp.ClientSession() as session:
-            async with session.post("http://localhost:5000/signal/update", json=serialized_payload) as resp:
+            async with session.post(url, json=serialized_payload) as resp:
                 if resp.status != 200:
                     print(f"❌ Failed to send signal: {await resp.text()}")
                 else:
                     print(f"📤 Sent signal for {token} → Trading Server")
     except Exception as e:
-        print(f"⚠️ Could not connect to trading server: {e}")
\ No newline at end of file
+        print(f"⚠️ Could not connect to trading server: {e}")
+
+def _serialize_flat(d):
+    """serialize_payload for a flat dict of scalars, without the per-value recursion."""
+    out = {}
+    for k, v in d.items():
+        if isinstance(v, float) or isinstance(v, np.floating):
+            out[k] = float(round(v, 6))
+        elif isinstance(v, str) or v is None:
+            out[k] = v
+        elif isinstance(v, (int, np.integer, np.bool_)):
+            out[k] = int(v)  # bools go out as 1/0, as serialize_payload sends them
+        else:
+            out[k] = serialize_payload(v)
+    return out
+
+
+def build_signal_payload(token, candle, features_by_horizon, predictions, rl_response=None):
+    return {
+        "token": token,
+        "candle": _serialize_flat(candle),
+        "features": {frame: _serialize_flat(f) for frame, f in features_by_horizon.items()},
+        "predictions": serialize_payload(predictions),
+        "rl_response": serialize_payload(rl_response),
+    }
+
+
+class SignalPublisher:
+    """
+    Keeps one pooled aiohttp session open and sends signals from a background task.
+
+    publish() never awaits: it stores the signal under its token, replacing
+    any signal for that token that has not gone out yet (latest wins).
+    Payloads are only serialized when they are actually sent.
+    """
+
+    def __init__(self, url, batch_url=None, batch_size=1, max_pending=64, max_in_flight=4, timeout_seconds=2.0):
+        self.url = url
+        self.batch_url = batch_url
+        self.batch_size = max(1, batch_size)
+        self.max_pending = max_pending
+        self.max_in_flight = max_in_flight
+        self.timeout = aiohttp.ClientTimeout(total=timeout_seconds)
+
+        self._pending = {}
+        self._wakeup = None
+        self._task = None
+        self._session = None
+        self._in_flight = set()
+        self._slots = None
+
+        self.stats = {"published": 0, "coalesced": 0, "dropped": 0, "sent": 0, "failed": 0, "posts": 0}
+
+    def publish(self, token, candle, features_by_horizon, predictions, rl_response=None):
+        self.stats["published"] += 1
+        if token in self._pending:
+            self.stats["coalesced"] += 1
+            del self._pending[token]  # re-insert at the back of the send order
+        elif len(self._pending) >= self.max_pending:
+            oldest = next(iter(self._pending))
+            del self._pending[oldest]
+            self.stats["dropped"] += 1
+        self._pending[token] = (token, candle, features_by_horizon, predictions, rl_response)
+
+        if self._task is None:
+            self._start()
+        self._wakeup.set()
+
+    def _start(self):
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_in_flight, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._pending:
+                await self._slots.acquire()
+                batch = []
+                while self._pending and len(batch) < self.batch_size:
+                    token = next(iter(self._pending))
+                    batch.append(self._pending.pop(token))
+                task = asyncio.create_task(self._send(batch))
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+
+    async def _send(self, batch):
+        try:
+            payloads = [build_signal_payload(*signal) for signal in batch]
+            session = await self._get_session()
+            with timed(f"{batch[0][0]}/USDT", "signal_post"):
+                if len(payloads) > 1 and self.batch_url:
+                    await self._post(session, self.batch_url, payloads, len(payloads))
+                else:
+                    for payload in payloads:
+                        await self._post(session, self.url, payload, 1)
+        except Exception as e:
+            self.stats["failed"] += len(batch)
+            print(f"⚠️ Could not send signal to trading server: {e}")
+        finally:
+            self._slots.release()
+
+    async def _post(self, session, url, body, count):
+        self.stats["posts"] += 1
+        async with session.post(url, json=body) as resp:
+            if resp.status != 200:
+                self.stats["failed"] += count
+                print(f"❌ Failed to send signal: {await resp.text()}")
+            else:
+                self.stats["sent"] += count
+
+    async def close(self, timeout=5.0):
+        """Sends whatever is still pending, then closes the session."""
+        if self._task is not None:
+            deadline = asyncio.get_running_loop().time() + timeout
+            while (self._pending or self._in_flight) and asyncio.get_running_loop().time() < deadline:
+                self._wakeup.set()
+                await asyncio.sleep(0.01)
+            self._task.cancel()
+            self._task = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+signal_publisher = SignalPublisher(
+    SIGNAL_SERVER["url"],
+    batch_url=SIGNAL_SERVER.get("batch_url"),
+    batch_size=SIGNAL_SERVER.get("batch_size", 1),
+    max_pending=SIGNAL_SERVER.get("max_pending", 64),
+    max_in_flight=SIGNAL_SERVER.get("max_in_flight", 4),
+    timeout_seconds=SIGNAL_SERVER.get("timeout_seconds", 2.0),
+)
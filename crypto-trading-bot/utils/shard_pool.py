@@ -0,0 +1,275 @@
+# utils/shard_pool.py
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from config import MAX_CANDLES_PER_PAIR, SHARDING
+from utils.ring_buffer import ColumnarRingBuffer
+
+# Newest buffer entries re-sent with every update; covers the forming candle and the one that just closed
+TAIL = 2
+
+
+def upsert_tail(buffer, tail, max_len=MAX_CANDLES_PER_PAIR):
+    """Merges the newest entries of the main-process buffer into a shard's copy by timestamp."""
+    if isinstance(buffer, ColumnarRingBuffer):
+        for item in tail:
+            buffer.upsert(item, lookback=TAIL * 2)
+        return
+    for item in tail:
+        ts = item.get("timestamp")
+        for i in range(len(buffer) - 1, max(-1, len(buffer) - 1 - TAIL * 2), -1):
+            if buffer[i].get("timestamp") == ts:
+                buffer[i] = item
+                break
+        else:
+            buffer.append(item)
+    if len(buffer) > max_len:
+        del buffer[:len(buffer) - max_len]
+
+
+def _percentiles(samples):
+    if not samples:
+        return {"p50": None, "p99": None, "max": None}
+    ordered = sorted(samples)
+    return {
+        "p50": round(ordered[len(ordered) // 2], 2),
+        "p99": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 2),
+        "max": round(ordered[-1], 2),
+    }
+
+
+def _shard_main(shard_id, pairs, inbox, outbox, heartbeat_seconds):
+    """
+    Worker process: owns the buffers and models for its pairs and runs the tick pipeline.
+    Every tick ends in exactly one "result" or "error" message, so the pool's backlog drains either way.
+    """
+    from model.utils.model_watcher import start_model_reload_watcher
+    from utils.batch_predictor import BatchPredictor
+    from utils.debug_sink import feature_debug_sink
+    from utils.latency import tick_latency
+    from utils.model_loaders import load_all_models
+    from utils.tick_pipeline import batch_entries, finish_tick, prepare_tick
+
+    load_all_models(pairs)
+    threading.Thread(target=start_model_reload_watcher, daemon=True).start()
+    root, ext = os.path.splitext(feature_debug_sink.path)
+    feature_debug_sink.path = f"{root}.shard{shard_id}{ext}"
+
+    candle_history = {}
+    feature_buffer = {}
+    predictor = BatchPredictor()
+    outbox.put(("ready", shard_id, os.getpid()))
+    last_heartbeat = 0.0
+
+    while True:
+        try:
+            messages = [inbox.get(timeout=heartbeat_seconds)]
+        except queue.Empty:
+            messages = []
+        while True:
+            try:
+                messages.append(inbox.get_nowait())
+            except queue.Empty:
+                break
+
+        ticks = []
+        for message in messages:
+            if message is None:
+                return
+            kind, pair = message[0], message[1]
+            if kind == "seed":
+                # Columnar copies: a fraction of the memory of dict rows, and no per-tick DataFrames
+                candle_history[pair] = ColumnarRingBuffer.from_rows(message[2], float_dtype=np.float64)
+                feature_buffer[pair] = ColumnarRingBuffer.from_rows(message[3])
+                continue
+
+            _, _, latest_data, latest_feature, candle_tail, feature_tail, sent_at = message
+            started = time.time()
+            try:
+                upsert_tail(candle_history.setdefault(pair, ColumnarRingBuffer(float_dtype=np.float64)), candle_tail)
+                upsert_tail(feature_buffer.setdefault(pair, ColumnarRingBuffer()), feature_tail)
+                tick = prepare_tick(pair, latest_data, latest_feature, candle_history[pair], feature_buffer[pair])
+                ticks.append((tick, sent_at, started))
+            except Exception as e:
+                outbox.put(("error", shard_id, pair, repr(e)))
+
+        if ticks:
+            # Every pair of this shard that ticked since the last pass shares one predict per model
+            entries = [entry for tick, _, _ in ticks for entry in batch_entries(tick)]
+            try:
+                predict_started = time.perf_counter_ns()
+                results = predictor.predict_batch(entries)
+                predict_ns = time.perf_counter_ns() - predict_started
+                for tick, _, _ in ticks:
+                    tick_latency.record(tick["pair"], "predict", predict_ns)
+            except Exception as e:
+                for tick, _, _ in ticks:
+                    outbox.put(("error", shard_id, tick["pair"], repr(e)))
+                results = None
+
+            offset = 0
+            for tick, sent_at, started in ticks:
+                frames = tick["due_frames"]
+                if results is None:
+                    continue
+                predictions = {frame: results[offset + k] for k, frame in enumerate(frames)}
+                offset += len(frames)
+                try:
+                    predictions = finish_tick(tick, predictions)
+                except Exception as e:
+                    outbox.put(("error", shard_id, tick["pair"], repr(e)))
+                    continue
+                compute_ms = (time.time() - started) * 1000
+                tick_latency.record(tick["pair"], "total", int(compute_ms * 1e6))
+                outbox.put(("result", shard_id, tick, predictions, sent_at, compute_ms))
+
+        now = time.time()
+        if now - last_heartbeat >= heartbeat_seconds:
+            outbox.put(("heartbeat", shard_id, now))
+            last_heartbeat = now
+
+
+class _Shard:
+    def __init__(self, shard_id, pairs):
+        self.shard_id = shard_id
+        self.pairs = pairs
+        self.process = None
+        self.inbox = None
+        self.seeded = set()
+        self.submitted = 0
+        self.completed = 0
+        self.errors = 0
+        self.restarts = 0
+        self.last_heartbeat = None
+        self.latency_ms = deque(maxlen=1000)   # submit -> result back on the event loop
+        self.compute_ms = deque(maxlen=1000)   # time spent inside the worker
+
+
+class ShardPool:
+    """
+    Runs the tick pipeline in worker processes, one per shard of pairs.
+
+    The event loop only forwards each update (plus the newest buffer entries)
+    to the shard that owns the pair and receives finished predictions back
+    through on_result(tick, predictions), called on the loop thread.
+    """
+
+    def __init__(self, pairs, shard_count, on_result):
+        self.ctx = mp.get_context("spawn")
+        self.on_result = on_result
+        self.heartbeat_seconds = SHARDING.get("heartbeat_seconds", 5)
+        shard_count = max(1, min(shard_count, len(pairs)))
+        self.shards = [_Shard(i, pairs[i::shard_count]) for i in range(shard_count)]
+        self.shard_of = {pair: shard for shard in self.shards for pair in shard.pairs}
+        self.outbox = self.ctx.Queue()
+        self._loop = None
+
+    def start(self, loop):
+        self._loop = loop
+        for shard in self.shards:
+            self._spawn(shard)
+        threading.Thread(target=self._read_results, name="shard-results", daemon=True).start()
+        print(f"🧩 Started {len(self.shards)} shard(s): " + ", ".join(f"{s.shard_id}={s.pairs}" for s in self.shards))
+
+    def _spawn(self, shard):
+        shard.inbox = self.ctx.Queue()
+        shard.seeded = set()
+        shard.process = self.ctx.Process(
+            target=_shard_main,
+            args=(shard.shard_id, shard.pairs, shard.inbox, self.outbox, self.heartbeat_seconds),
+            name=f"tick-shard-{shard.shard_id}",
+            daemon=True,
+        )
+        shard.process.start()
+
+    def submit(self, pair, latest_data, latest_feature, candle_history, feature_buffer):
+        """Non-blocking hand-off of one price update; candle_history/feature_buffer are this pair's buffers."""
+        shard = self.shard_of[pair]
+        if not shard.process.is_alive():
+            print(f"❌ Shard {shard.shard_id} died (exit code {shard.process.exitcode}) — restarting")
+            shard.restarts += 1
+            shard.submitted = shard.completed  # updates queued to the dead process are gone
+            self._spawn(shard)
+
+        if pair not in shard.seeded:
+            shard.inbox.put(("seed", pair, list(candle_history), list(feature_buffer)))
+            shard.seeded.add(pair)
+
+        shard.inbox.put((
+            "tick", pair, latest_data, latest_feature,
+            list(candle_history[-TAIL:]), list(feature_buffer[-TAIL:]), time.time(),
+        ))
+        shard.submitted += 1
+
+    def _read_results(self):
+        while True:
+            try:
+                message = self.outbox.get()
+            except (EOFError, OSError):
+                return
+            self._loop.call_soon_threadsafe(self._handle, message)
+
+    def _handle(self, message):
+        kind, shard = message[0], self.shards[message[1]]
+        if kind == "result":
+            _, _, tick, predictions, sent_at, compute_ms = message
+            shard.completed += 1
+            shard.latency_ms.append((time.time() - sent_at) * 1000)
+            shard.compute_ms.append(compute_ms)
+            try:
+                self.on_result(tick, predictions)
+            except Exception as e:
+                print(f"❌ Failed to handle shard result for {tick['pair']}: {e}")
+        elif kind == "error":
+            shard.completed += 1  # a failed tick is finished too; it just has no result
+            shard.errors += 1
+            print(f"❌ Shard {shard.shard_id} failed on {message[2]}: {message[3]}")
+        elif kind == "heartbeat":
+            shard.last_heartbeat = message[2]
+        elif kind == "ready":
+            shard.last_heartbeat = time.time()
+            print(f"✅ Shard {shard.shard_id} ready (pid {message[2]})")
+
+    def health(self):
+        now = time.time()
+        return {
+            shard.shard_id: {
+                "pid": shard.process.pid if shard.process else None,
+                "alive": bool(shard.process and shard.process.is_alive()),
+                "pairs": shard.pairs,
+                "submitted": shard.submitted,
+                "completed": shard.completed,
+                "backlog": shard.submitted - shard.completed,
+                "errors": shard.errors,
+                "restarts": shard.restarts,
+                "heartbeat_age_s": round(now - shard.last_heartbeat, 1) if shard.last_heartbeat else None,
+                "latency_ms": _percentiles(shard.latency_ms),
+                "compute_ms": _percentiles(shard.compute_ms),
+            }
+            for shard in self.shards
+        }
+
+    def log_health(self):
+        """
+        Prints one line per shard and returns health(). Call it from the event loop
+        (main.log_health), the thread that updates the counters in _handle.
+        """
+        health = self.health()
+        for shard_id, h in health.items():
+            print(f"🧩 Shard {shard_id} | alive={h['alive']} backlog={h['backlog']} errors={h['errors']} "
+                  f"latency p50/p99={h['latency_ms']['p50']}/{h['latency_ms']['p99']} ms")
+        return health
+
+    def stop(self):
+        for shard in self.shards:
+            if shard.process and shard.process.is_alive():
+                shard.inbox.put(None)
+        for shard in self.shards:
+            if shard.process:
+                shard.process.join(timeout=5)
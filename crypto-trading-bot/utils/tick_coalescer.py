@@ -0,0 +1,143 @@
+# utils/tick_coalescer.py
+import asyncio
+import time
+from collections import deque
+
+from utils.ring_buffer import ColumnarRingBuffer, to_epoch_ms
+
+
+def is_closed_update(latest_data):
+    """Explicit close flags (Binance kline 'x', or our own 'is_closed')."""
+    return bool(latest_data.get("is_closed") or latest_data.get("x"))
+
+
+def _snapshot(buffer, until_ms):
+    """Copy of one pair's buffer holding only rows up to until_ms."""
+    if isinstance(buffer, ColumnarRingBuffer):
+        return buffer.copy(until_ms)
+    rows = list(buffer)
+    while rows and until_ms is not None and to_epoch_ms(rows[-1].get("timestamp")) > until_ms:
+        rows.pop()
+    return rows
+
+
+def _frozen(update):
+    """The update with its pair's buffers copied as of its own candle, so a later run sees what it would have seen."""
+    received_at, (pair, latest_data, latest_feature, candle_history, symbol, feature_buffer) = update
+    ts = latest_data.get("timestamp")
+    until_ms = to_epoch_ms(ts) if ts is not None else None
+    return received_at, (
+        pair, latest_data, latest_feature,
+        {symbol: _snapshot(candle_history[symbol], until_ms)}, symbol,
+        {symbol: _snapshot(feature_buffer[symbol], until_ms)},
+    )
+
+
+class _PairSlot:
+    __slots__ = ("closed", "pending", "wakeup", "task", "received", "processed",
+                 "merged", "dropped", "max_depth", "last_lag_ms", "max_lag_ms")
+
+    def __init__(self, max_closed):
+        self.closed = deque(maxlen=max_closed)  # (received_at, args) for candles that must still run
+        self.pending = None                     # newest update for the forming candle
+        self.wakeup = asyncio.Event()
+        self.task = None
+        self.received = 0
+        self.processed = 0
+        self.merged = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+    @property
+    def depth(self):
+        return len(self.closed) + (self.pending is not None)
+
+
+class TickCoalescer:
+    """
+    Sits between start_ws_listener and on_price_update.
+
+    submit() has the callback's signature and returns immediately. Each pair
+    has one consumer task; while it is busy, newer updates for the same candle
+    replace the pending one (latest wins). An update that closes a candle (an
+    explicit close flag, or the last one seen before the timestamp moves on)
+    is never replaced: it still goes through the callback, in order, before the
+    newest pending update. Its pair's buffers are copied up to its candle when
+    it is queued, because the listener keeps appending to the live ones.
+    """
+
+    def __init__(self, callback, max_closed_backlog=16):
+        self.callback = callback
+        self.max_closed_backlog = max_closed_backlog
+        self._slots = {}
+
+    async def submit(self, pair, latest_data, latest_feature, candle_history, symbol, feature_buffer):
+        slot = self._slots.get(pair)
+        if slot is None:
+            slot = self._slots[pair] = _PairSlot(self.max_closed_backlog)
+            slot.task = asyncio.get_running_loop().create_task(self._consume(pair, slot))
+
+        slot.received += 1
+        update = (time.perf_counter(), (pair, latest_data, latest_feature, candle_history, symbol, feature_buffer))
+
+        if slot.pending is not None:
+            if slot.pending[1][1].get("timestamp") != latest_data.get("timestamp"):
+                self._keep_closed(slot, slot.pending)
+            else:
+                slot.merged += 1
+            slot.pending = None
+
+        if is_closed_update(latest_data):
+            self._keep_closed(slot, update)
+        else:
+            slot.pending = update
+
+        slot.max_depth = max(slot.max_depth, slot.depth)
+        slot.wakeup.set()
+
+    def _keep_closed(self, slot, update):
+        if len(slot.closed) == slot.closed.maxlen:
+            slot.dropped += 1  # deque drops the oldest closed candle
+        slot.closed.append(_frozen(update))
+
+    async def _consume(self, pair, slot):
+        while True:
+            await slot.wakeup.wait()
+            slot.wakeup.clear()
+            while slot.closed or slot.pending is not None:
+                if slot.closed:
+                    received_at, args = slot.closed.popleft()
+                else:
+                    (received_at, args), slot.pending = slot.pending, None
+
+                lag_ms = (time.perf_counter() - received_at) * 1000
+                slot.last_lag_ms = lag_ms
+                slot.max_lag_ms = max(slot.max_lag_ms, lag_ms)
+                try:
+                    await self.callback(*args)
+                except Exception as e:
+                    print(f"❌ Price update failed for {pair}: {e}")
+                slot.processed += 1
+
+    def queue_depth(self, pair=None):
+        if pair is not None:
+            slot = self._slots.get(pair)
+            return slot.depth if slot else 0
+        return sum(slot.depth for slot in self._slots.values())
+
+    def stats(self):
+        return {
+            pair: {
+                "received": slot.received,
+                "processed": slot.processed,
+                "merged": slot.merged,
+                "dropped": slot.dropped,
+                "queue_depth": slot.depth,
+                "max_depth": slot.max_depth,
+                "last_lag_ms": round(slot.last_lag_ms, 2),
+                "max_lag_ms": round(slot.max_lag_ms, 2),
+            }
+            for pair, slot in self._slots.items()
+        }
@@ -0,0 +1,121 @@
+# utils/tick_pipeline.py
+from config import HORIZONS, CONFIDENCE_THRESHOLD, models, RL_MODELS
+from features.feature_schema import schema_for
+from features.feature_snapshot import build_feature_snapshot
+from model.predictor import log_prediction_batch, predict
+from robot.helper_function import evaluate_rl_bot
+from utils.debug_sink import feature_debug_sink
+from utils.horizon_scheduler import horizon_scheduler
+from utils.latency import timed
+
+
+def validate_features(schema, features):
+    """Bitmask of the schema's features that are missing from the features dictionary."""
+    mask = schema.missing_mask(features)
+    if mask:
+        print(f"⚠️ Missing features: {schema.missing_names(mask)}")
+    return mask
+
+
+def horizon_thresholds():
+    return {info["frame"]: info["threshold"] for info in HORIZONS.values()}
+
+
+def prepare_tick(pair, latest_data, latest_feature, candle_history, feature_buffer):
+    """
+    Everything on_price_update does before prediction: RL agent step and the
+    per-horizon feature dicts. candle_history/feature_buffer are this pair's buffers.
+    """
+    token = pair.split("/")[0]
+
+    # RL agent (per token)
+    with timed(pair, "evaluate_rl_bot"):
+        result = evaluate_rl_bot(token, latest_feature, RL_MODELS)
+    if result:
+        print(f"[RL] {token} | Action: {result['action']} | Reward: {result['reward']:.4f}")
+
+    schemas = {info["frame"]: schema_for(models[token][info["frame"]]) for info in HORIZONS.values()}
+
+    # Build features once for the union of all horizon models, then project per horizon
+    snapshot = build_feature_snapshot(
+        pair,
+        feature_buffer,
+        latest_feature,
+        {frame: schema.names for frame, schema in schemas.items()},
+        candle_history
+    )
+    features_by_horizon = {}
+    missing_by_horizon = {}
+    for frame, schema in schemas.items():
+        features = snapshot.for_frame(schema.names)
+        missing_by_horizon[frame] = validate_features(schema, features)
+        features_by_horizon[frame] = features
+
+    return {
+        "pair": pair,
+        "token": token,
+        "latest_data": latest_data,
+        "features_by_horizon": features_by_horizon,
+        "missing_by_horizon": missing_by_horizon,
+        # Slow horizons whose bar hasn't closed and whose inputs barely moved reuse their last prediction
+        "due_frames": horizon_scheduler.due_frames(pair, token, latest_data, features_by_horizon),
+        "rl_result": result,
+    }
+
+
+def due_features(tick):
+    """features_by_horizon restricted to the frames that need a fresh prediction."""
+    return {frame: tick["features_by_horizon"][frame] for frame in tick["due_frames"]}
+
+
+def predict_tick(tick):
+    """Unbatched path: one predict() call per due horizon."""
+    token = tick["token"]
+    predictions = {}
+    with timed(tick["pair"], "predict"):
+        for _, info in HORIZONS.items():
+            frame = info["frame"]
+            if frame not in tick["due_frames"]:
+                continue
+            model = models[token][frame]["model"]
+            feature_names = models[token][frame]["features"]
+            predictions[frame] = predict(model, tick["features_by_horizon"][frame], feature_names, info["threshold"], token, frame)
+    return predictions
+
+
+def batch_entries(tick):
+    """Rows for BatchPredictor.predict_batch for the due horizons, in HORIZONS order."""
+    thresholds = horizon_thresholds()
+    missing = tick.get("missing_by_horizon", {})
+    return [
+        (tick["token"], frame, features, thresholds[frame], missing.get(frame))
+        for frame, features in due_features(tick).items()
+    ]
+
+
+def finish_tick(tick, predictions):
+    """
+    Fills the skipped horizons from the scheduler's cache, then writes the debug
+    snapshot and prediction log. Returns the predictions for every horizon.
+    """
+    predictions = horizon_scheduler.merge(tick["pair"], predictions, list(tick["features_by_horizon"]))
+
+    # Sampled debug snapshot; written by a background thread. Only this tick's predictions
+    # count as a signal, or one confident cached horizon would flag every tick until it reruns
+    signal = any(p.get("confidence", 0) >= CONFIDENCE_THRESHOLD for p in predictions.values() if not p.get("cached"))
+    feature_debug_sink.submit_tick(tick["pair"], tick["features_by_horizon"], signal=signal)
+
+    prediction_entries = [
+        (
+            predictions[frame]["probability"],
+            predictions[frame]["threshold"],
+            predictions[frame]["direction"],
+            frame
+        )
+        for frame in predictions
+    ]
+
+    # Log predictions for all frames
+    with timed(tick["pair"], "log_prediction_batch"):
+        log_prediction_batch(tick["token"], tick["latest_data"]["close"], prediction_entries)
+    return predictions